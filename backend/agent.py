@@ -1,16 +1,23 @@
+import asyncio
 import csv
 import importlib
+import importlib.util
+import json
 import logging
 import os
+import signal
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
-from livekit import agents
+from livekit import agents, api
 from livekit.agents import AgentSession, Agent, RoomInputOptions
+from livekit.agents.voice.io import AudioInput, AudioOutput, AudioOutputCapabilities
 from livekit.plugins import noise_cancellation, google
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,7 +25,18 @@ PROJECT_ROOT = BASE_DIR.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from backend.amd import AMDConfig, Decision, Detector
+from backend.call_limits import CallLimits, Watchdog
 from backend.prompts import ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS, SESSION_INSTRUCTION
+from backend.prompt_tools import (
+    PROMPT_MODES,
+    apply_prompt_mode,
+    compile_template,
+    normalize_prompt_mode,
+    render_session_instructions,
+)
+from backend.retry_policy import OUTCOME_EXIT_CODES
+from backend import recording, transcripts
 
 load_dotenv()
 
@@ -123,18 +141,126 @@ def _load_campaign_prompts(module_name: str | None = None,
     agent_attr = agent_attr or os.getenv("CAMPAIGN_AGENT_NAME", "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS")
     session_attr = session_attr or os.getenv("CAMPAIGN_SESSION_NAME", "SESSION_INSTRUCTION")
 
+    agent_text, session_text, _ = _cached_campaign_prompts(module_name, agent_attr, session_attr)
+    return agent_text, session_text
+
+
+# ------------------------------
+# Per-process caches (filled by prewarm, reused by every job)
+# ------------------------------
+_cache_lock = threading.Lock()
+# (module, agent_attr, session_attr, prompt mode) -> (module file mtime, agent_text, session_text, compiled session template)
+_PROMPT_CACHE: Dict[tuple, tuple] = {}
+# csv path -> ((mtime, size), leads)
+_LEADS_CACHE: Dict[str, tuple] = {}
+_NOISE_FILTER = None
+
+
+def _module_mtime(module_name: str) -> float:
+    try:
+        spec = importlib.util.find_spec(module_name)
+        if spec and spec.origin:
+            return os.path.getmtime(spec.origin)
+    except Exception:
+        pass
+    return 0.0
+
+
+def _cached_campaign_prompts(module_name: str, agent_attr: str, session_attr: str, prompt_mode: str | None = None):
+    """Return (agent_text, session_text, compiled_session) in the given prompt mode.
+
+    The module is reloaded if its file changed since it was cached.
+    """
+    mode = normalize_prompt_mode(prompt_mode or os.getenv("CAMPAIGN_PROMPT_MODE"))
+    key = (module_name, agent_attr, session_attr, mode)
+    mtime = _module_mtime(module_name)
+    with _cache_lock:
+        hit = _PROMPT_CACHE.get(key)
+        if hit and hit[0] == mtime:
+            return hit[1], hit[2], hit[3]
+
     agent_text = ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS
     session_text = SESSION_INSTRUCTION
-
     try:
         mod = importlib.import_module(module_name)
+        if hit is not None:
+            # Campaign modules are regenerated on disk by the web backend
+            mod = importlib.reload(mod)
         agent_text = getattr(mod, agent_attr, agent_text)
         session_text = getattr(mod, session_attr, session_text)
     except Exception:
         # Fallback to defaults silently
         pass
 
-    return agent_text, session_text
+    agent_text = apply_prompt_mode(agent_text, mode)
+    session_text = apply_prompt_mode(session_text, mode)
+    compiled = compile_template(session_text)
+    with _cache_lock:
+        _PROMPT_CACHE[key] = (mtime, agent_text, session_text, compiled)
+    return agent_text, session_text, compiled
+
+
+def _read_leads_cached(leads_csv: str) -> List[Dict[str, str]]:
+    """_read_leads, re-parsed only when the file's mtime or size changes."""
+    try:
+        st = os.stat(leads_csv)
+        stamp = (st.st_mtime, st.st_size)
+    except OSError:
+        return []
+    with _cache_lock:
+        hit = _LEADS_CACHE.get(leads_csv)
+        if hit and hit[0] == stamp:
+            return hit[1]
+    leads = _read_leads(leads_csv)
+    with _cache_lock:
+        _LEADS_CACHE[leads_csv] = (stamp, leads)
+    return leads
+
+
+def _noise_filter():
+    global _NOISE_FILTER
+    if _NOISE_FILTER is None:
+        _NOISE_FILTER = noise_cancellation.BVCTelephony()
+    return _NOISE_FILTER
+
+
+def _prompt_modules_on_disk() -> List[tuple[str, str, str]]:
+    """Built-in campaigns plus every generated module under campaigns_prompts/."""
+    selections = list(CAMPAIGNS.values())
+    try:
+        for p in sorted((BASE_DIR / "campaigns_prompts").glob("*.py")):
+            if p.stem != "__init__":
+                selections.append((f"{CAMPAIGN_MODULE_PREFIX}.{p.stem}",
+                                   "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS", "SESSION_INSTRUCTION"))
+    except Exception:
+        pass
+    return selections
+
+
+def prewarm(proc=None) -> None:
+    """Load prompts, compile templates, build the noise filter and parse leads before jobs arrive.
+
+    Runs once per worker process (WorkerOptions.prewarm_fnc) so none of this
+    happens on a call's critical path.
+    """
+    t0 = time.perf_counter()
+    for mod_name, agent_attr, session_attr in _prompt_modules_on_disk():
+        for mode in PROMPT_MODES:
+            _cached_campaign_prompts(_normalize_prompt_module(mod_name), agent_attr, session_attr, mode)
+    env_mod = _normalize_prompt_module(os.getenv("CAMPAIGN_PROMPT_MODULE", "prompts"))
+    _cached_campaign_prompts(
+        env_mod,
+        os.getenv("CAMPAIGN_AGENT_NAME", "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS"),
+        os.getenv("CAMPAIGN_SESSION_NAME", "SESSION_INSTRUCTION"),
+    )
+    if os.getenv("AGENT_NOISE_CANCELLATION", "1") != "0":
+        try:
+            _noise_filter()
+        except Exception:
+            pass
+    _read_leads_cached(os.getenv("LEADS_CSV_PATH", str(BASE_DIR / "leads.csv")))
+    if proc is not None:
+        proc.userdata["prewarm_s"] = time.perf_counter() - t0
 
 
 def _select_campaign_from_console() -> tuple[str, str, str] | None:
@@ -163,6 +289,22 @@ def _select_campaign_from_console() -> tuple[str, str, str] | None:
         return None
 
 
+def _campaign_by_name(name: str) -> tuple[str, str, str] | None:
+    """A campaign by its menu name ("SplashBI"), full key or prompt module ("prompts2", a campaigns_prompts stem)."""
+    wanted = (name or "").strip()
+    for key, val in CAMPAIGNS.items():
+        if wanted.lower() in (key.lower(), _campaign_display_name(key).lower()):
+            return val
+    module = _normalize_prompt_module(wanted)
+    for val in _prompt_modules_on_disk():
+        if val[0] == module:
+            return val
+    return None
+
+
+LEAD_FIELDS = ("prospect_name", "resource_name", "job_title", "company_name", "email", "phone", "timezone")
+
+
 def _read_leads(leads_csv: str) -> List[Dict[str, str]]:
     """Read all leads from the CSV as a list of dicts. Returns empty list on error."""
     leads: List[Dict[str, str]] = []
@@ -171,15 +313,7 @@ def _read_leads(leads_csv: str) -> List[Dict[str, str]]:
             reader = csv.DictReader(f)
             for row in reader:
                 # Normalize keys to expected set and ensure presence
-                leads.append({
-                    "prospect_name": row.get("prospect_name", "").strip(),
-                    "resource_name": row.get("resource_name", "").strip(),
-                    "job_title": row.get("job_title", "").strip(),
-                    "company_name": row.get("company_name", "").strip(),
-                    "email": row.get("email", "").strip(),
-                    "phone": row.get("phone", "").strip(),
-                    "timezone": row.get("timezone", "").strip(),
-                })
+                leads.append({k: (row.get(k) or "").strip() for k in LEAD_FIELDS})
     except Exception:
         pass
     return leads
@@ -212,103 +346,395 @@ def _select_prospect_from_console(leads: List[Dict[str, str]]) -> Optional[Dict[
         return None
 
 
+def _resolve_factory(spec: str):
+    """Resolve a "package.module:callable" spec to the callable it names."""
+    mod_name, _, attr = spec.partition(":")
+    if not (mod_name and attr):
+        raise ValueError(f"Factory spec must look like 'module:callable', got {spec!r}")
+    return getattr(importlib.import_module(mod_name.strip()), attr.strip())
+
+
+def _build_realtime_model():
+    """Realtime model used by the agent. AGENT_LLM_FACTORY swaps in e.g. an offline fake."""
+    spec = os.getenv("AGENT_LLM_FACTORY", "").strip()
+    if spec:
+        return _resolve_factory(spec)()
+    return google.beta.realtime.RealtimeModel(
+        voice="Leda",
+        temperature=0.2,
+    )
+
+
+def _build_session():
+    """Session driving the call. AGENT_SESSION_FACTORY swaps in e.g. a loopback session."""
+    spec = os.getenv("AGENT_SESSION_FACTORY", "").strip()
+    if spec:
+        return _resolve_factory(spec)()
+    return AgentSession()
+
+
+def _room_input_options() -> RoomInputOptions:
+    # LiveKit Cloud enhanced noise cancellation
+    # - If self-hosting, omit this parameter (AGENT_NOISE_CANCELLATION=0)
+    # - For telephony applications, use `BVCTelephony` for best results
+    nc = None
+    if os.getenv("AGENT_NOISE_CANCELLATION", "1") != "0":
+        nc = _noise_filter()
+    return RoomInputOptions(video_enabled=False, noise_cancellation=nc)
+
+
 class Assistant(Agent):
-    def __init__(self, instructions_text: str) -> None:
+    def __init__(self, instructions_text: str, llm=None) -> None:
         super().__init__(
             instructions=instructions_text,
-            llm=google.beta.realtime.RealtimeModel(
-                voice="Leda",
-                temperature=0.2,
-            ),
+            llm=llm if llm is not None else _build_realtime_model(),
             tools=[],
         )
 
 
-async def entrypoint(ctx: agents.JobContext):
-    session = AgentSession(
-        
-    )
+# ------------------------------
+# Answering-machine detection
+# ------------------------------
+# The web controller passes a campaign's settings as AMD_CONFIG (JSON, see
+# backend/amd.py) to console calls; without it detection is off.
+_CALL_OUTCOME: Dict[str, str] = {}  # set when the agent ends a single-call run itself; picks its exit code
 
-    # Load leads from CSV and determine which prospect to use
-    leads_csv = os.getenv("LEADS_CSV_PATH", str(BASE_DIR / "leads.csv"))
-    all_leads = _read_leads(leads_csv)
-    lead: Optional[Dict[str, str]] = None
 
-    # Priority: env index > console selection > first row
-    # Use environment variable LEAD_INDEX (1-based) if provided
+def _amd_config() -> AMDConfig:
+    raw = os.getenv("AMD_CONFIG", "").strip()
+    if not raw:
+        return AMDConfig(mode="off")
     try:
-        env_idx = os.getenv("LEAD_INDEX")
-        if env_idx:
-            i = int(env_idx) - 1
-            if 0 <= i < len(all_leads):
-                lead = all_leads[i]
+        return AMDConfig.from_dict(json.loads(raw))
+    except (TypeError, ValueError):
+        logging.warning("Ignoring invalid AMD_CONFIG: %s", raw)
+        return AMDConfig(mode="off")
+
+
+class _AMDAudioInput(AudioInput):
+    """Passes the session's inbound audio through unchanged, feeding the detector until it decides."""
+
+    def __init__(self, source: AudioInput, detector: Detector, decided: asyncio.Future) -> None:
+        super().__init__(label="amd", source=source)
+        self._detector = detector
+        self._decided = decided
+
+    async def __anext__(self):
+        frame = await super().__anext__()
+        if not self._decided.done():
+            decision = self._detector.feed(frame.data, frame.sample_rate, frame.num_channels)
+            if decision is not None:
+                self._decided.set_result(decision)
+        return frame
+
+
+def _start_amd(session) -> Optional[Tuple[AMDConfig, asyncio.Future]]:
+    """Put the detector in front of the session's audio input; None if AMD is off or the session has none."""
+    cfg = _amd_config()
+    source = getattr(getattr(session, "input", None), "audio", None)
+    if cfg.mode == "off" or source is None:
+        return None
+    decided = asyncio.get_running_loop().create_future()
+    session.input.audio = _AMDAudioInput(source, Detector(cfg), decided)
+    return cfg, decided
+
+
+async def _await_amd(cfg: AMDConfig, decided: asyncio.Future) -> Optional[Decision]:
+    """The detector's decision, or None if audio stalls past its analysis window."""
+    try:
+        return await asyncio.wait_for(asyncio.shield(decided), timeout=cfg.total_analysis_ms / 1000 + 1.0)
+    except asyncio.TimeoutError:
+        return None
+
+
+def _end_call_early(ctx, session, outcome: str) -> None:
+    """End the call from inside the agent; a single-call run then exits with ``outcome``'s code."""
+    _CALL_OUTCOME["outcome"] = outcome
+    session.shutdown(drain=False)
+    shutdown = getattr(ctx, "shutdown", None)
+    if callable(shutdown):
+        shutdown(reason=outcome)
+    if os.getenv("RUN_SINGLE_CALL") == "1" and isinstance(ctx, agents.JobContext):
+        # A console run only exits on a signal; __main__ then exits with the outcome's code
+        signal.raise_signal(signal.SIGINT)
+
+
+def _call_limits(meta: Dict[str, Any]) -> CallLimits:
+    """Silence and duration limits from job metadata or CALL_LIMITS (set by the web controller)."""
+    raw = meta.get("limits")
+    try:
+        if raw is None:
+            env = os.getenv("CALL_LIMITS", "").strip()
+            raw = json.loads(env) if env else None
+        return CallLimits.from_dict(raw)
+    except (TypeError, ValueError):
+        logging.warning("Ignoring invalid call limits: %s", raw)
+        return CallLimits()
+
+
+def _start_watchdog(ctx, session, limits: CallLimits) -> Optional[asyncio.Task]:
+    """Watch the session's speech state and end the call on a silence timeout or at the maximum duration."""
+    if not (limits.silence_timeout_s or limits.max_duration_s) or not hasattr(session, "on"):
+        return None
+    dog = Watchdog(limits, time.monotonic())
+    session.on("user_state_changed", lambda ev: dog.user_state(ev.new_state, time.monotonic()))
+    session.on("agent_state_changed", lambda ev: dog.agent_state(ev.new_state, time.monotonic()))
+    session.on("conversation_item_added", lambda ev: dog.activity(time.monotonic()))
+
+    async def watch() -> None:
+        while True:
+            await asyncio.sleep(0.5)
+            reason = dog.check(time.monotonic())
+            if reason:
+                logging.warning("Ending the call: %s after %.0fs", reason, time.monotonic() - dog.started_at)
+                _end_call_early(ctx, session, reason)
+                return
+
+    task = asyncio.create_task(watch())
+    session.on("close", lambda ev: task.cancel())
+    return task
+
+
+# ------------------------------
+# Call recording
+# ------------------------------
+# With CALL_RECORDINGS=1 both directions are copied into the call's recorder
+# (backend/recording.py); the taps only enqueue, encoding happens off the loop.
+class _RecordingAudioInput(AudioInput):
+    """The caller's audio, passed through unchanged and copied to the recorder."""
+
+    def __init__(self, source: AudioInput, recorder: recording.CallRecorder) -> None:
+        super().__init__(label="recording", source=source)
+        self._recorder = recorder
+
+    async def __anext__(self):
+        frame = await super().__anext__()
+        self._recorder.caller_audio(frame.data, frame.sample_rate, frame.num_channels)
+        return frame
+
+
+class _RecordingAudioOutput(AudioOutput):
+    """The agent's audio, copied to the recorder once the sink below has taken it."""
+
+    def __init__(self, sink: AudioOutput, recorder: recording.CallRecorder) -> None:
+        super().__init__(label="recording", next_in_chain=sink, capabilities=AudioOutputCapabilities(pause=True))
+        self._recorder = recorder
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self._sample_rate or self.next_in_chain.sample_rate
+
+    async def capture_frame(self, frame) -> None:
+        await self.next_in_chain.capture_frame(frame)
+        await super().capture_frame(frame)
+        self._recorder.agent_audio(frame.data, frame.sample_rate, frame.num_channels)
+
+    def flush(self) -> None:
+        super().flush()
+        self.next_in_chain.flush()
+
+    def clear_buffer(self) -> None:
+        self._recorder.agent_cleared()
+        self.next_in_chain.clear_buffer()
+
+
+def _start_recording(session, call_id: str) -> Optional[recording.CallRecorder]:
+    """Tap the session's audio in both directions; None if it has no audio or the id can't name a file."""
+    audio_in = getattr(getattr(session, "input", None), "audio", None)
+    audio_out = getattr(getattr(session, "output", None), "audio", None)
+    if not transcripts.safe_call_id(call_id) or (audio_in is None and audio_out is None):
+        return None
+    recorder = recording.start(call_id)
+    if audio_in is not None:
+        session.input.audio = _RecordingAudioInput(audio_in, recorder)
+    if audio_out is not None:
+        session.output.audio = _RecordingAudioOutput(audio_out, recorder)
+    session.on("close", lambda ev: recorder.close())
+    return recorder
+
+
+# ------------------------------
+# Long-lived worker mode
+# ------------------------------
+# One registered worker serves many concurrent calls. Each job is dispatched
+# into its room with JSON metadata {"lead": {...}, "lead_index": n,
+# "campaign": [module, agent_attr, session_attr], "prompt_mode": "full"|"compact",
+# "limits": {...} (backend/call_limits.py), "call_id": controller call id}.
+AGENT_NAME = os.getenv("AGENT_NAME", "demandify-caller").strip() or "demandify-caller"
+
+
+def _is_worker_mode() -> bool:
+    return os.getenv("AGENT_WORKER_MODE") == "1"
+
+
+def _job_metadata(ctx) -> Dict[str, Any]:
+    """Parse the JSON metadata attached to the job; empty for process-per-call runs."""
+    try:
+        raw = getattr(getattr(ctx, "job", None), "metadata", "") or ""
+        data = json.loads(raw) if raw else {}
+        return data if isinstance(data, dict) else {}
     except Exception:
-        pass
-    # If no env index provided or invalid, offer console selection
-    if lead is None:
-        sel_lead = _select_prospect_from_console(all_leads)
-        if sel_lead is not None:
-            lead = sel_lead
-    # Fallback to first row if still None
-    if lead is None and all_leads:
-        lead = all_leads[0]
+        return {}
+
+
+def _worker_options() -> agents.WorkerOptions:
+    """WorkerOptions for worker mode.
+
+    AGENT_JOB_EXECUTOR=thread (default) runs jobs as threads of this process so
+    they share imported modules and model setup; "process" isolates each job.
+    AGENT_MAX_JOBS caps concurrent jobs per worker (0 = LiveKit's CPU-based load).
+    """
+    executor = agents.JobExecutorType.THREAD
+    if os.getenv("AGENT_JOB_EXECUTOR", "thread").strip().lower() == "process":
+        executor = agents.JobExecutorType.PROCESS
+    kwargs: Dict[str, Any] = {}
+    try:
+        max_jobs = int(os.getenv("AGENT_MAX_JOBS", "0"))
+    except ValueError:
+        max_jobs = 0
+    if max_jobs > 0:
+        kwargs["load_fnc"] = lambda server: len(server.active_jobs) / max_jobs
+        kwargs["load_threshold"] = 1.0
+    return agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        agent_name=AGENT_NAME,
+        job_executor_type=executor,
+        **kwargs,
+    )
+
+
+async def dispatch_call(room_name: str,
+                        lead: Optional[Dict[str, str]],
+                        campaign: Optional[tuple[str, str, str]] = None,
+                        lead_index: Optional[int] = None,
+                        prompt_mode: Optional[str] = None,
+                        limits: Optional[Dict[str, Any]] = None,
+                        call_id: Optional[str] = None) -> str:
+    """Ask the long-lived worker to join ``room_name`` for one call. Returns the dispatch id."""
+    metadata = {
+        "lead": lead or {},
+        "lead_index": lead_index,
+        "campaign": list(campaign) if campaign else None,
+        "prompt_mode": prompt_mode,
+        "limits": limits,
+        "call_id": call_id,
+    }
+    lkapi = api.LiveKitAPI()
+    try:
+        dispatch = await lkapi.agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(
+                agent_name=AGENT_NAME,
+                room=room_name,
+                metadata=json.dumps(metadata),
+            )
+        )
+        return dispatch.id
+    finally:
+        await lkapi.aclose()
+
+
+async def end_dispatched_call(room_name: str) -> None:
+    """Delete ``room_name`` so a dispatched job stops talking; the worker ends the job when its room closes."""
+    lkapi = api.LiveKitAPI()
+    try:
+        await lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
+    finally:
+        await lkapi.aclose()
+
+
+async def entrypoint(ctx: agents.JobContext):
+    session = _build_session()
+
+    # Worker-mode jobs carry lead and campaign in their metadata (see dispatch_call)
+    meta = _job_metadata(ctx)
+    headless = os.getenv("RUN_SINGLE_CALL") == "1" or _is_worker_mode()
+
+    lead: Optional[Dict[str, str]] = None
+    if isinstance(meta.get("lead"), dict):
+        lead = {k: str(meta["lead"].get(k) or "").strip() for k in LEAD_FIELDS}
+    else:
+        # Load leads from CSV and determine which prospect to use
+        leads_csv = os.getenv("LEADS_CSV_PATH", str(BASE_DIR / "leads.csv"))
+        all_leads = _read_leads_cached(leads_csv)
+
+        # Priority: env index > console selection > first row
+        # Use environment variable LEAD_INDEX (1-based) if provided
+        try:
+            env_idx = os.getenv("LEAD_INDEX")
+            if env_idx:
+                i = int(env_idx) - 1
+                if 0 <= i < len(all_leads):
+                    lead = all_leads[i]
+        except Exception:
+            pass
+        # If no env index provided or invalid, offer console selection (never in worker mode)
+        if lead is None and not _is_worker_mode():
+            sel_lead = _select_prospect_from_console(all_leads)
+            if sel_lead is not None:
+                lead = sel_lead
+        # Fallback to first row if still None
+        if lead is None and all_leads:
+            lead = all_leads[0]
 
     # Campaign selection:
+    # - Worker jobs use the campaign from job metadata
     # - In child single-call runs, DO NOT prompt; rely on environment set by parent
     # - In parent interactive run, allow console campaign selection
-    if os.getenv("RUN_SINGLE_CALL") == "1":
+    campaign = meta.get("campaign")
+    if isinstance(campaign, (list, tuple)) and len(campaign) == 3:
+        selection = tuple(str(c) for c in campaign)
+    elif headless:
         selection = CAMPAIGN_OVERRIDE  # use env/defaults
     else:
         selection = CAMPAIGN_OVERRIDE or _select_campaign_from_console()
     if selection:
         mod_name, agent_attr, session_attr = selection
-        agent_instructions_text, session_instructions_text = _load_campaign_prompts(
-            module_name=mod_name,
-            agent_attr=agent_attr,
-            session_attr=session_attr,
-        )
     else:
         # Use environment variables or defaults
-        agent_instructions_text, session_instructions_text = _load_campaign_prompts()
+        mod_name = os.getenv("CAMPAIGN_PROMPT_MODULE", "prompts")
+        agent_attr = os.getenv("CAMPAIGN_AGENT_NAME", "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS")
+        session_attr = os.getenv("CAMPAIGN_SESSION_NAME", "SESSION_INSTRUCTION")
+    # Prompt mode ("full" | "compact") is stored per campaign by the web backend
+    agent_instructions_text, session_instructions_text, session_template = _cached_campaign_prompts(
+        _normalize_prompt_module(mod_name), agent_attr, session_attr, meta.get("prompt_mode")
+    )
 
     await session.start(
         room=ctx.room,
         agent=Assistant(agent_instructions_text),
-        room_input_options=RoomInputOptions(
-            # LiveKit Cloud enhanced noise cancellation
-            # - If self-hosting, omit this parameter
-            # - For telephony applications, use `BVCTelephony` for best results
-            video_enabled=False,
-            noise_cancellation=noise_cancellation.BVCTelephony(),
-        ),
+        room_input_options=_room_input_options(),
     )
+    amd = _start_amd(session)
+    _start_watchdog(ctx, session, _call_limits(meta))
+    # The controller's call id names transcript and recording; bare agent runs fall back to the room
+    call_id = meta.get("call_id") or os.getenv("CALL_ID") or getattr(ctx.room, "name", "")
+    if recording.enabled() and _start_recording(session, call_id) is None:
+        logging.warning("Not recording call %r: no session audio or unusable call id", call_id)
+    if transcripts.enabled():
+        info = {"lead_index": meta.get("lead_index") or os.getenv("LEAD_INDEX"), "campaign": _normalize_prompt_module(mod_name)}
+        if not transcripts.record_session(session, call_id, info):
+            logging.warning("Not recording a transcript: unusable call id %r", call_id)
 
     await ctx.connect()
 
-    # Prepare session instructions with lead details (campaign-specific)
-    instructions = session_instructions_text
-    if lead:
-        # Replace bracket placeholders in the script when present
-        def repl(text, placeholder, value):
-            return text.replace(placeholder, value) if value else text
-
-        instructions = repl(instructions, "[Prospect Name]", lead.get("prospect_name", "there"))
-        instructions = repl(instructions, "[Resource Name]", lead.get("resource_name", "our team"))
-        instructions = repl(instructions, "[Job Title]", lead.get("job_title", "your role"))
-        instructions = repl(instructions, "[Company Name]", lead.get("company_name", "your company"))
-        instructions = repl(instructions, "[____@abc.com]", lead.get("email", "email@domain.com"))
-
-        # Also provide a structured preface the LLM can reference
-        instructions = (
-            f"Lead Context:\n"
-            f"- Prospect Name: {lead.get('prospect_name','')}\n"
-            f"- Job Title: {lead.get('job_title','')}\n"
-            f"- Company: {lead.get('company_name','')}\n"
-            f"- Email: {lead.get('email','')}\n"
-            f"- Phone: {lead.get('phone','')}\n"
-            f"- Timezone: {lead.get('timezone','')}\n"
-            f"- Caller (Resource Name): {lead.get('resource_name','')}\n\n"
-        ) + instructions
+    # Prepare session instructions with lead details (campaign-specific):
+    # bracket placeholders filled from the compiled template, plus a structured
+    # "Lead Context" preface the LLM can reference
+    instructions = render_session_instructions(session_template, lead)
+
+    if amd is not None:
+        cfg, decided = amd
+        if cfg.mode == "hangup":
+            # Hold the opening line until we know a person picked up
+            decision = await _await_amd(cfg, decided)
+            if decision is not None and decision.label == "machine":
+                logging.warning("Answering machine after %d ms (%s, %d words); ending the call",
+                                decision.at_ms, decision.reason, decision.words)
+                _end_call_early(ctx, session, "voicemail")
+                return
+        else:
+            decided.add_done_callback(lambda f: logging.warning("AMD: %s", f.result().to_dict()))
 
     await session.generate_reply(
         instructions=instructions,
@@ -316,10 +742,26 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 if __name__ == "__main__":
+    # Unattended calls over a lead range: `python -m backend.agent batch --csv leads.csv --range 1:500 ...`
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from backend import batch_calls
+        sys.exit(batch_calls.main(sys.argv[2:], _campaign_by_name, _read_leads, str(BASE_DIR / "leads.csv")))
+
+    # Long-lived worker: `python -m backend.agent worker [start|dev]`
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        os.environ["AGENT_WORKER_MODE"] = "1"
+        sys.argv = [sys.argv[0]] + (sys.argv[2:] or ["start"])
+        agents.cli.run_app(_worker_options())
+        sys.exit(0)
+
     # If invoked as a child single-call run, execute one session and exit
     if os.getenv("RUN_SINGLE_CALL") == "1":
-        agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
-        sys.exit(0)
+        try:
+            agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+        except (SystemExit, KeyboardInterrupt):
+            if not _CALL_OUTCOME:
+                raise
+        sys.exit(OUTCOME_EXIT_CODES[_CALL_OUTCOME["outcome"]] if _CALL_OUTCOME else 0)
 
     # Parent controller loop (console-only): choose campaign once, then repeatedly choose prospects
     # Determine and set campaign env for child calls
@@ -0,0 +1,161 @@
+"""Answering-machine detection on the first seconds of a call's inbound audio.
+
+A person picking up says something short ("Hello?") and waits; a voicemail
+greeting talks on ("Hi, you've reached Dana, I can't take your call...").
+``Detector`` tracks that cadence on 20 ms frames of 16-bit PCM, the way
+classic dialer AMD does, with no model and no network:
+
+- a voiced frame has RMS energy above ``silence_threshold`` (raised to a
+  multiple of the line's noise floor on noisy lines);
+- a word is a run of at least ``min_word_ms`` voiced frames, ended by at
+  least ``between_words_silence_ms`` of silence;
+- ``human``: speech followed by ``after_greeting_silence_ms`` of silence;
+- ``machine``: ``max_words`` words, more than ``greeting_ms`` of speech, one
+  word longer than ``max_word_ms``, or ``initial_silence_ms`` of dead air
+  before anyone speaks;
+- ``unknown``: no decision within ``total_analysis_ms``.
+
+Campaign setting ``amd`` (JSON), handed to console calls as ``AMD_CONFIG``:
+
+    {"mode": "hangup", "greeting_ms": 1500, "after_greeting_silence_ms": 800}
+
+Modes: ``off`` (the default) skips detection, ``observe`` only logs the
+decision, and ``hangup`` holds the agent's opening line until the detector
+decides and ends voicemail calls with the ``voicemail`` exit code. Holding
+the opening line delays every answered call by about two seconds and hangs
+up on some silent humans, so campaigns opt in.
+
+    python -m backend.tools.amd_eval --corpus path/to/greetings   # human/*.wav, machine/*.wav
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from typing import Any, Dict, NamedTuple, Optional
+
+MODES = ("off", "observe", "hangup")
+LABELS = ("human", "machine", "unknown")
+FRAME_MS = 20
+
+
+class AMDConfig(NamedTuple):
+    mode: str = "off"
+    initial_silence_ms: int = 2500
+    greeting_ms: int = 1500
+    after_greeting_silence_ms: int = 800
+    total_analysis_ms: int = 5000
+    min_word_ms: int = 100
+    between_words_silence_ms: int = 50
+    max_words: int = 3
+    max_word_ms: int = 5000
+    silence_threshold: int = 256  # RMS of 16-bit samples
+    noise_factor: float = 3.0  # voiced frames must also be this far above the noise floor
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "AMDConfig":
+        """Campaign AMD settings over the defaults; raises ValueError if invalid."""
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("amd must be an object")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"unknown amd fields: {', '.join(sorted(unknown))}")
+        cfg = cls(**data)
+        if cfg.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        ints = {f: int(getattr(cfg, f)) for f in cls._fields if f not in ("mode", "noise_factor")}
+        if any(v < 0 for v in ints.values()) or ints["max_words"] < 1:
+            raise ValueError("durations and thresholds must not be negative, max_words at least 1")
+        return cfg._replace(noise_factor=max(1.0, float(cfg.noise_factor)), **ints)
+
+
+class Decision(NamedTuple):
+    label: str  # one of LABELS
+    reason: str
+    at_ms: int  # audio time from the first frame to the decision
+    words: int
+    speech_ms: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def frame_rms(pcm: bytes, channels: int = 1) -> float:
+    """RMS energy of little-endian 16-bit PCM (first channel only)."""
+    samples = array("h")
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if channels > 1:
+        samples = samples[::channels]
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class Detector:
+    """Feed inbound audio as it arrives; ``feed`` returns the Decision once, then None."""
+
+    def __init__(self, cfg: Optional[AMDConfig] = None) -> None:
+        self.cfg = cfg or AMDConfig()
+        self.decision: Optional[Decision] = None
+        self._buf = b""
+        self._elapsed = 0
+        self._noise = 0.0  # running RMS of silent frames
+        self._speaking = False  # inside the greeting
+        self._in_word = False
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._word_ms = 0
+        self._words = 0
+        self._speech_ms = 0
+
+    def feed(self, pcm: bytes, sample_rate: int, channels: int = 1) -> Optional[Decision]:
+        if self.decision is not None:
+            return None
+        frame_bytes = sample_rate * FRAME_MS // 1000 * 2 * channels
+        self._buf += bytes(pcm)
+        while len(self._buf) >= frame_bytes and self.decision is None:
+            frame, self._buf = self._buf[:frame_bytes], self._buf[frame_bytes:]
+            self.decision = self._step(frame_rms(frame, channels))
+        return self.decision
+
+    def _decide(self, label: str, reason: str) -> Decision:
+        return Decision(label, reason, self._elapsed, self._words, self._speech_ms)
+
+    def _step(self, rms: float) -> Optional[Decision]:
+        cfg = self.cfg
+        self._elapsed += FRAME_MS
+        threshold = max(cfg.silence_threshold, self._noise * cfg.noise_factor)
+        if rms < threshold:
+            self._noise = rms if not self._noise else 0.95 * self._noise + 0.05 * rms
+            self._silent_run += FRAME_MS
+            self._voiced_run = 0
+            if self._in_word and self._silent_run >= cfg.between_words_silence_ms:
+                self._in_word = False
+            if not self._speaking and self._silent_run >= cfg.initial_silence_ms:
+                return self._decide("machine", "initial_silence")
+            if self._speaking and self._silent_run >= cfg.after_greeting_silence_ms:
+                return self._decide("human", "short_greeting")
+        else:
+            self._speaking = True
+            self._silent_run = 0
+            self._voiced_run += FRAME_MS
+            self._speech_ms += FRAME_MS
+            if not self._in_word and self._voiced_run >= cfg.min_word_ms:
+                self._in_word = True
+                self._word_ms = self._voiced_run - FRAME_MS
+                self._words += 1
+                if self._words >= cfg.max_words:
+                    return self._decide("machine", "max_words")
+            if self._in_word:
+                self._word_ms += FRAME_MS
+                if self._word_ms >= cfg.max_word_ms:
+                    return self._decide("machine", "long_word")
+            if self._speech_ms >= cfg.greeting_ms:
+                return self._decide("machine", "long_greeting")
+        if self._elapsed >= cfg.total_analysis_ms:
+            return self._decide("unknown", "timeout")
+        return None
@@ -0,0 +1,134 @@
+"""Streaming export of a lead list merged with its call attempts.
+
+Leads are read from the CSV one row at a time and merge-joined with calls
+ordered by lead index (``state.iter_calls_by_lead``), so memory stays flat
+however large the list is. Output is produced in ~64KB text chunks for a
+``StreamingResponse``.
+
+Row shapes:
+  - ``per="lead"`` (default): one row per lead. CSV gets the lead columns
+    plus attempt count and the last attempt's outcome; JSONL gets the lead
+    and the full list of attempts.
+  - ``per="attempt"``: one row per call attempt, lead columns repeated.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+FORMATS = ("csv", "jsonl")
+PER = ("lead", "attempt")
+
+ATTEMPT_FIELDS = ["call_id", "campaign", "status", "exit_code", "end_reason", "started_at", "ended_at", "duration_s"]
+LEAD_SUMMARY_FIELDS = ["attempts", "first_called_at", "last_called_at", "last_call_id", "last_campaign",
+                       "last_status", "last_exit_code", "last_end_reason", "last_duration_s"]
+
+CHUNK_BYTES = 64 * 1024
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def parse_time(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    """Epoch seconds from an epoch number, ISO date or ISO datetime (naive values are UTC).
+
+    A bare date used as an upper bound covers that whole day.
+    """
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    ts = dt.timestamp()
+    if end_of_day and len(value) == 10:
+        ts += 86400
+    return ts
+
+
+def attempt_view(call: Dict[str, Any]) -> Dict[str, Any]:
+    started, ended = call.get("started_at"), call.get("ended_at")
+    return {
+        "call_id": call.get("id"),
+        "campaign": call.get("campaign"),
+        "status": call.get("status"),
+        "exit_code": call.get("exit_code"),
+        "end_reason": call.get("end_reason"),
+        "started_at": _iso(started),
+        "ended_at": _iso(ended),
+        "duration_s": round(ended - started, 3) if started and ended else None,
+    }
+
+
+def _lead_summary(attempts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not attempts:
+        return {"attempts": 0}
+    last = attempts[-1]
+    return {
+        "attempts": len(attempts),
+        "first_called_at": attempts[0]["started_at"],
+        "last_called_at": last["started_at"],
+        **{f"last_{k}": last[k] for k in ("call_id", "campaign", "status", "exit_code", "end_reason", "duration_s")},
+    }
+
+
+def iter_export(lines: Iterable[str], calls: Iterable[Dict[str, Any]], fmt: str = "csv", per: str = "lead",
+                include_uncalled: bool = True) -> Iterator[str]:
+    """Yield text chunks of the export; ``calls`` must be ordered by lead_index, started_at."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if per not in PER:
+        raise ValueError(f"per must be one of {PER}")
+    reader = csv.DictReader(lines)
+    lead_cols = list(reader.fieldnames or [])
+    buf = io.StringIO()
+    writer: Optional[csv.writer] = None
+    if fmt == "csv":
+        writer = csv.writer(buf)
+        writer.writerow(["lead_index", *lead_cols, *(ATTEMPT_FIELDS if per == "attempt" else LEAD_SUMMARY_FIELDS)])
+
+    call_iter = iter(calls)
+    pending = next(call_iter, None)
+    for idx, row in enumerate(reader, 1):
+        # Calls pointing past the end of an edited list, or at rows skipped here, are dropped
+        while pending is not None and pending["lead_index"] < idx:
+            pending = next(call_iter, None)
+        attempts: List[Dict[str, Any]] = []
+        while pending is not None and pending["lead_index"] == idx:
+            attempts.append(attempt_view(pending))
+            pending = next(call_iter, None)
+        if not attempts and not include_uncalled:
+            continue
+        values = [row.get(c) or "" for c in lead_cols]
+        if writer is not None:
+            if per == "attempt":
+                for a in attempts:
+                    writer.writerow([idx, *values, *("" if a[k] is None else a[k] for k in ATTEMPT_FIELDS)])
+            else:
+                summary = _lead_summary(attempts)
+                writer.writerow([idx, *values, *("" if summary.get(k) is None else summary[k]
+                                                 for k in LEAD_SUMMARY_FIELDS)])
+        else:
+            lead = dict(zip(lead_cols, values))
+            if per == "attempt":
+                for a in attempts:
+                    buf.write(json.dumps({"lead_index": idx, "lead": lead, **a}, ensure_ascii=False))
+                    buf.write("\n")
+            else:
+                buf.write(json.dumps({"lead_index": idx, "lead": lead, "attempts": attempts}, ensure_ascii=False))
+                buf.write("\n")
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
@@ -0,0 +1,151 @@
+"""Stable lead identities and version-to-version diffs of a lead list.
+
+Calls and the lead queue refer to leads by position (``LEAD_INDEX``), which
+breaks as soon as an updated list is uploaded under the same name. Each lead
+therefore gets a key derived from its normalized phone and email; re-uploads
+are diffed against the stored index by key in one pass (O(n) dict lookups):
+
+  - added / removed   keys only in the new / old version
+  - changed           same key, different row content (re-validated)
+  - unchanged         same key and content; stored validation is reused
+  - moves             old index -> new index (None if removed) for everything
+                      whose position changed, used to carry calls and queue
+                      state over to the new positions
+
+Rows with neither phone nor email are keyed by their content. Repeated keys
+within one file get an occurrence suffix (``#2``, ``#3``...).
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+class LeadDiff(NamedTuple):
+    total: int
+    added: int
+    removed: int
+    changed: int
+    unchanged: int
+    invalid: int
+    revalidated: int
+    # (lead_key, lead_index, row_hash, problems) for every new or repositioned row
+    upserts: List[Tuple[str, int, str, Optional[List[str]]]]
+    removed_keys: List[str]
+    moves: Dict[int, Optional[int]]
+    old_keys: Dict[int, str]
+    new_positions: Dict[str, Optional[int]]
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "total": self.total,
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "moved": sum(1 for v in self.moves.values() if v is not None),
+            "invalid": self.invalid,
+            "revalidated": self.revalidated,
+        }
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    return _NON_DIGITS.sub("", phone or "")
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def base_key(row: Dict[str, Any]) -> str:
+    phone = normalize_phone(row.get("phone"))
+    email = (row.get("email") or "").strip().lower()
+    if phone or email:
+        return _digest(f"{phone}|{email}")
+    return "row:" + row_hash(row)
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    return _digest("\x1f".join(f"{k}={(row.get(k) or '').strip()}" for k in sorted(k for k in row if k)))
+
+
+def validate_lead(row: Dict[str, Any]) -> List[str]:
+    """Problems that would make a call to this lead fail or misfire."""
+    problems = []
+    digits = normalize_phone(row.get("phone"))
+    if not digits:
+        problems.append("missing phone")
+    elif not 7 <= len(digits) <= 15:
+        problems.append("phone must have 7-15 digits")
+    if not (row.get("prospect_name") or "").strip():
+        problems.append("missing prospect_name")
+    email = (row.get("email") or "").strip()
+    if email and "@" not in email:
+        problems.append("malformed email")
+    return problems
+
+
+def iter_keyed_rows(lines: Iterable[str]):
+    """Yield (lead_index, lead_key, row_hash, row) for every data row of a CSV."""
+    seen: Dict[str, int] = {}
+    for idx, row in enumerate(csv.DictReader(lines), 1):
+        key = base_key(row)
+        n = seen.get(key, 0) + 1
+        seen[key] = n
+        yield idx, (key if n == 1 else f"{key}#{n}"), row_hash(row), row
+
+
+def build_index(lines: Iterable[str],
+                validate: Callable[[Dict[str, Any]], List[str]] = validate_lead) -> Dict[str, Dict[str, Any]]:
+    """Index a list version from scratch (first time a list is seen)."""
+    return {
+        key: {"lead_index": idx, "row_hash": h, "problems": validate(row) or None}
+        for idx, key, h, row in iter_keyed_rows(lines)
+    }
+
+
+def diff(old: Dict[str, Dict[str, Any]], lines: Iterable[str],
+         validate: Callable[[Dict[str, Any]], List[str]] = validate_lead) -> LeadDiff:
+    """Diff the stored index ``old`` (lead_key -> {lead_index, row_hash, problems}) against a new CSV."""
+    upserts: List[Tuple[str, int, str, Optional[List[str]]]] = []
+    moves: Dict[int, Optional[int]] = {}
+    new_positions: Dict[str, Optional[int]] = {}
+    seen = set()
+    total = added = changed = unchanged = invalid = revalidated = 0
+    for idx, key, h, row in iter_keyed_rows(lines):
+        total = idx
+        seen.add(key)
+        prev = old.get(key)
+        if prev is not None and prev["row_hash"] == h:
+            unchanged += 1
+            problems = prev.get("problems")
+        else:
+            if prev is None:
+                added += 1
+            else:
+                changed += 1
+            problems = validate(row) or None
+            revalidated += 1
+        if problems:
+            invalid += 1
+        old_idx = prev["lead_index"] if prev is not None else None
+        if prev is None or old_idx != idx or prev["row_hash"] != h:
+            upserts.append((key, idx, h, problems))
+        if old_idx != idx:
+            new_positions[key] = idx
+            if old_idx is not None:
+                moves[old_idx] = idx
+    removed_keys = [k for k in old if k not in seen]
+    for key in removed_keys:
+        moves[old[key]["lead_index"]] = None
+        new_positions[key] = None
+    return LeadDiff(
+        total=total, added=added, removed=len(removed_keys), changed=changed, unchanged=unchanged,
+        invalid=invalid, revalidated=revalidated, upserts=upserts, removed_keys=removed_keys, moves=moves,
+        old_keys={v["lead_index"]: k for k, v in old.items()}, new_positions=new_positions,
+    )
@@ -36,11 +36,13 @@ def _load_campaigns_store() -> List[Dict[str, str]]:
             logger.debug("Fetching campaigns from Supabase")
             resp = supabase.table("campaigns").select("name,module,agent_text,session_text").execute()
             rows = getattr(resp, "data", []) or []
+            # Local writes not yet replayed to Supabase win over the remote copy
+            pending = SYNC_JOURNAL.pending_keys("campaigns")
             items: List[Dict[str, str]] = []
             for r in rows:
                 name = (r.get("name") or "").strip()
                 module = (r.get("module") or "").strip()
-                if not (name and module):
+                if not (name and module) or module in pending:
                     continue
                 agent_text = r.get("agent_text") or ""
                 session_text = r.get("session_text") or ""
@@ -49,6 +51,9 @@ def _load_campaigns_store() -> List[Dict[str, str]]:
                 except Exception:
                     pass
                 items.append({"name": name, "module": module})
+            for it in _local_campaigns_store():
+                if pending.get(it.get("module")) == "upsert":
+                    items.append(it)
             _save_campaigns_store(items)
             logger.info("Loaded %d campaigns from Supabase", len(items))
             return items
@@ -63,6 +68,16 @@ def _load_campaigns_store() -> List[Dict[str, str]]:
     return []
 
 
+def _local_campaigns_store() -> List[Dict[str, str]]:
+    """The local mirror only; write paths use this so they never wait on Supabase."""
+    try:
+        if CAMPAIGNS_STORE.exists():
+            return json.loads(CAMPAIGNS_STORE.read_text(encoding="utf-8"))
+    except Exception:
+        logger.exception("Failed to load campaigns from local cache")
+    return []
+
+
 def _save_campaigns_store(items: List[Dict[str, str]]) -> None:
     try:
         CAMPAIGNS_STORE.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -143,10 +158,50 @@ def _supabase_client():
         return None
 
 
+def _journal_write(table: str, op: str, key: str, row: Dict[str, Any]) -> str:
+    """Queue a remote write for the background syncer; the local copy is already updated."""
+    return _journal_write_many(table, op, key, [row])
+
+
+def _journal_write_many(table: str, op: str, key: str, rows: List[Dict[str, Any]]) -> str:
+    if not (_SUPABASE_URL and _SUPABASE_SERVICE_ROLE_KEY):
+        return "local_only"
+    SYNC_JOURNAL.append_many(table, op, key, rows)
+    return "queued"
+
+
 def _sync_from_supabase_if_available() -> List[Dict[str, str]]:
     """Fetch campaigns from Supabase and mirror to local cache."""
     return _load_campaigns_store()
 
+
+def _load_campaign_settings() -> Dict[str, Dict[str, Any]]:
+    """Per-campaign settings keyed by normalized prompt module (e.g. prompt_mode)."""
+    try:
+        if CAMPAIGN_SETTINGS_STORE.exists():
+            data = json.loads(CAMPAIGN_SETTINGS_STORE.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        logger.exception("Failed to load campaign settings")
+    return {}
+
+
+def _save_campaign_settings(settings: Dict[str, Dict[str, Any]]) -> None:
+    try:
+        CAMPAIGN_SETTINGS_STORE.write_text(json.dumps(settings, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception:
+        logger.exception("Failed to save campaign settings")
+
+
+def _campaign_setting(module: str, key: str, default: Any = None) -> Any:
+    return _load_campaign_settings().get(_normalize_prompt_module(module), {}).get(key, default)
+
+
+def _set_campaign_setting(module: str, key: str, value: Any) -> None:
+    settings = _load_campaign_settings()
+    settings.setdefault(_normalize_prompt_module(module), {})[key] = value
+    _save_campaign_settings(settings)
+
 import os
 import sys
 import csv
@@ -154,28 +209,50 @@ import math
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, Request, Form, BackgroundTasks, HTTPException, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 
 # Use project root as base
 BASE_DIR = Path(__file__).resolve().parents[1]
-AGENT_MODULE = "backend.agent"
-LEADS_CSV = os.getenv("LEADS_CSV_PATH", str(BASE_DIR / "leads.csv"))
+# Overridable so load tests can swap in backend.tools.fake_agent
+AGENT_MODULE = os.getenv("AGENT_MODULE", "backend.agent").strip() or "backend.agent"
+DEFAULT_LEADS_CSV = os.getenv("LEADS_CSV_PATH", str(BASE_DIR / "leads.csv"))
 CSV_DIR = Path(os.getenv("LEADS_CSV_DIR", str(BASE_DIR))).resolve()
 CSV_DIR.mkdir(parents=True, exist_ok=True)
 _SELECTED_FILE_STORE = BASE_DIR / ".leads_csv"
 CAMPAIGNS_DIR = BASE_DIR / "campaigns_prompts"
 CAMPAIGNS_DIR.mkdir(parents=True, exist_ok=True)
 CAMPAIGNS_STORE = BASE_DIR / "campaigns.json"
-SELECTED_CSV_REMOTE_KEY: Optional[str] = None
+CAMPAIGN_SETTINGS_STORE = BASE_DIR / "campaign_settings.json"
 
 # Import campaign mapping and display helper from backend
-from backend.agent import CAMPAIGNS, _campaign_display_name
+from backend.agent import CAMPAIGNS, _campaign_display_name, dispatch_call, end_dispatched_call
+from backend.prompt_tools import PROMPT_MODES, normalize_prompt_mode, prompt_report
+from backend.app import state as controller_state
+from backend.lead_queue import DEFAULT_LEASE_SECONDS, Lease, default_owner, open_queue
+from backend.app.sync_journal import CONTENT_FILE_FIELD, SyncJournal
+from backend.app import export as lead_export
+from backend.app import lead_diff
+from backend.app import proc_usage
+from backend.suppression import SuppressionIndex, country_for_timezone, normalize_number
+from backend.retry_policy import OUTCOME_EXIT_CODES, RetryPolicy, classify as classify_outcome
+from backend import pacing
+from backend.amd import AMDConfig
+from backend.call_limits import END_REASONS as LIMIT_END_REASONS, CallLimits
+from backend.lead_scoring import FEATURES as SCORE_FEATURES, ScoreModel, feature_values, local_hour
+from backend import call_outcomes, recording, transcripts
+
+# Campaign/CSV writes land locally first and are replayed to Supabase from this journal
+SYNC_JOURNAL = SyncJournal(Path(os.getenv("SYNC_JOURNAL_PATH", str(BASE_DIR / "sync_journal.jsonl"))),
+                           max_attempts=int(os.getenv("SYNC_JOURNAL_MAX_ATTEMPTS", "5") or 5))
+
+# "process" spawns one agent per browser room; "worker" dispatches jobs to a long-lived worker
+AGENT_DISPATCH_MODE = os.getenv("AGENT_DISPATCH_MODE", "process").strip().lower() or "process"
 app = FastAPI(title="AI Calling Agent - Web UI")
 
 # Configure CORS for frontend deployment
@@ -194,6 +271,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def _count_requests(request: Request, call_next):
+    _ensure_loop_lag_monitor()
+    path = request.url.path
+    with _metrics_lock:
+        METRICS["requests"][path] = METRICS["requests"].get(path, 0) + 1
+    return await call_next(request)
+
+
 # Mount static and templates
 STATIC_DIR = Path(__file__).resolve().parent / "static"
 TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
@@ -217,18 +303,108 @@ import httpx
 # Cache for vendor script to avoid repeated external fetches
 _LK_JS_CACHE: dict[str, bytes] = {}
 
-# Global state for managing a single running console call
+# Controller state (selected campaign, auto-next, active CSV, calls) lives in
+# backend/app/state.py so every uvicorn worker sees the same thing. Only the
+# Popen handles are per worker: the worker that spawned a call owns it.
 from threading import Lock, Thread
 import signal
+import uuid
 
+MAX_CONCURRENT_CALLS = max(1, int(os.getenv("MAX_CONCURRENT_CALLS", "1")))
+STOP_KILL_AFTER = 10.0  # seconds an agent may ignore SIGINT before it is killed
 _proc_lock = Lock()
-CURRENT_PROC: Optional[subprocess.Popen] = None
-CURRENT_STATUS: str = "idle"  # idle | running | stopping
-CURRENT_LEAD_INDEX: Optional[int] = None  # 1-based
-SELECTED_CAMPAIGN: Optional[str] = None
-AUTO_NEXT: bool = False
+_LOCAL_PROCS: Dict[str, subprocess.Popen] = {}  # call id -> agent process spawned by this worker
+_LEASE_BEATS: Dict[str, float] = {}  # call id -> last lead-lease renewal by this worker
 _WATCHER_STARTED: bool = False
 
+
+def _selected_campaign() -> Optional[str]:
+    return controller_state.get_setting("selected_campaign")
+
+
+def _auto_next() -> bool:
+    return bool(controller_state.get_setting("auto_next", False))
+
+
+def _leads_csv() -> str:
+    return controller_state.get_setting("leads_csv") or DEFAULT_LEADS_CSV
+
+
+def _selected_remote_key() -> Optional[str]:
+    return controller_state.get_setting("selected_csv_remote_key") or None
+
+# -----------------------------
+# Controller metrics
+# -----------------------------
+from collections import deque
+import asyncio
+
+_metrics_lock = Lock()
+METRICS: Dict[str, Any] = {
+    "started_at": time.time(),
+    "requests": {},  # path -> count
+    "calls_started": 0,
+    "calls_ended": 0,
+    "calls_suppressed": 0,
+    "budget_warnings": 0,
+    "last_exit_code": None,
+}
+_CALL_GAPS: deque = deque(maxlen=2000)  # seconds between a call ending and the next one starting
+_LOOP_LAG: deque = deque(maxlen=2000)  # event-loop scheduling delay samples in seconds
+_LAST_CALL_END_TS: Optional[float] = None
+_LOOP_LAG_TASK: Optional[asyncio.Task] = None
+LOOP_LAG_INTERVAL = 0.1
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    """Summarize samples as count/mean/p50/p95/p99/max (milliseconds)."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    n = len(ordered)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(n - 1, int(q * n))] * 1000, 2)
+
+    return {
+        "count": n,
+        "mean_ms": round(sum(ordered) / n * 1000, 2),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _record_call_started() -> None:
+    with _metrics_lock:
+        METRICS["calls_started"] += 1
+        if _LAST_CALL_END_TS is not None:
+            _CALL_GAPS.append(time.time() - _LAST_CALL_END_TS)
+
+
+def _record_call_ended(exit_code: Optional[int]) -> None:
+    global _LAST_CALL_END_TS
+    with _metrics_lock:
+        METRICS["calls_ended"] += 1
+        METRICS["last_exit_code"] = exit_code
+        _LAST_CALL_END_TS = time.time()
+
+
+async def _loop_lag_monitor() -> None:
+    """Sample how late the event loop wakes up compared to the requested sleep."""
+    loop = asyncio.get_running_loop()
+    while True:
+        before = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        _LOOP_LAG.append(max(0.0, loop.time() - before - LOOP_LAG_INTERVAL))
+
+
+def _ensure_loop_lag_monitor() -> None:
+    global _LOOP_LAG_TASK
+    if _LOOP_LAG_TASK is None or _LOOP_LAG_TASK.done():
+        _LOOP_LAG_TASK = asyncio.get_running_loop().create_task(_loop_lag_monitor())
+
 # -----------------------------
 # CSV management helpers
 # -----------------------------
@@ -306,43 +482,63 @@ def _download_csv_from_supabase(name: str, force: bool = False) -> Optional[Path
         return local_path if local_path.exists() else None
 
 
-def _upload_csv_to_supabase(name: str, content: bytes) -> Optional[str]:
-    client = _supabase_client()
-    if not client:
-        return None
-    sanitized = _safe_csv_name(name)
-    try:
-        text = content.decode("utf-8")
-    except UnicodeDecodeError:
-        text = content.decode("utf-8", errors="ignore")
-    payload = {
-        "name": sanitized,
-        "content": text,
-        "size": len(content),
-        "uploaded_at": datetime.utcnow().isoformat(),
-    }
-    try:
-        client.table(_SUPABASE_PROSPECTS_TABLE).upsert(payload, on_conflict="name").execute()
-    except Exception as exc:
-        logger.exception("Failed to upsert prospect CSV '%s' into Supabase", sanitized)
-        return None
-    return sanitized
+# Records kept in a remote preview column so previews never fetch the whole file. Opt-in: the
+# column must exist first, or every replayed prospects upsert would fail on it
+_SUPABASE_CSV_PREVIEW_COLUMN = os.getenv("SUPABASE_CSV_PREVIEW_COLUMN", "").strip()
+CSV_PREVIEW_ROWS = 50
+CSV_PREVIEW_MAX_LIMIT = 1000
 
 
-def _delete_supabase_csv(name: str) -> Optional[str]:
-    client = _supabase_client()
+def _csv_preview_text(content: bytes, rows: int = CSV_PREVIEW_ROWS) -> str:
+    """Header plus the first ``rows`` records of a CSV, re-serialized as CSV text."""
+    import io
+    text = content.decode("utf-8-sig", errors="ignore")
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for i, record in enumerate(csv.reader(io.StringIO(text))):
+        if i > rows:
+            break
+        writer.writerow(record)
+    return out.getvalue()
+
+
+def _read_csv_preview(lines, limit: int) -> tuple[List[str], List[Dict[str, str]]]:
+    """Parse only the header and the first ``limit`` records from an iterable of lines."""
+    reader = csv.DictReader(lines)
+    headers = list(reader.fieldnames or [])
+    rows: List[Dict[str, str]] = []
+    for row in reader:
+        if len(rows) >= limit:
+            break
+        rows.append({k: (row.get(k) or "") for k in headers})
+    return headers, rows
+
+
+def _supabase_csv_preview(name: str) -> Optional[str]:
+    """The stored preview of a remote CSV, or None if unavailable (no client, no row, older table)."""
+    client = _supabase_client() if _SUPABASE_CSV_PREVIEW_COLUMN else None
     if not client:
         return None
-    sanitized = _safe_csv_name(name)
     try:
-        client.table(_SUPABASE_PROSPECTS_TABLE).delete().eq("name", sanitized).execute()
-    except Exception as exc:
-        logger.exception("Failed to delete prospect CSV '%s' from Supabase", sanitized)
-        return str(exc)
-    return None
+        resp = (
+            client
+            .table(_SUPABASE_PROSPECTS_TABLE)
+            .select(_SUPABASE_CSV_PREVIEW_COLUMN)
+            .eq("name", _safe_csv_name(name))
+            .limit(1)
+            .execute()
+        )
+        rows = getattr(resp, "data", []) or []
+        preview = rows[0].get(_SUPABASE_CSV_PREVIEW_COLUMN) if rows else None
+        return preview if isinstance(preview, str) and preview else None
+    except Exception:
+        logger.debug("No stored preview for prospect CSV '%s'", name, exc_info=True)
+        return None
 
 
 def _persist_selected_csv(path: Path, remote_key: Optional[str]) -> None:
+    controller_state.set_setting("leads_csv", str(path))
+    controller_state.set_setting("selected_csv_remote_key", remote_key)
     try:
         data = {"local": str(path.resolve()), "remote": remote_key or ""}
         _SELECTED_FILE_STORE.write_text(json.dumps(data), encoding="utf-8")
@@ -375,8 +571,9 @@ def read_leads(csv_path: str) -> List[Dict[str, str]]:
     """Read leads with as many useful fields as available."""
     leads: List[Dict[str, str]] = []
     try:
-        if SELECTED_CSV_REMOTE_KEY:
-            _download_csv_from_supabase(SELECTED_CSV_REMOTE_KEY, force=False)
+        remote_key = _selected_remote_key()
+        if remote_key:
+            _download_csv_from_supabase(remote_key, force=False)
     except Exception:
         pass
     try:
@@ -398,7 +595,7 @@ def read_leads(csv_path: str) -> List[Dict[str, str]]:
 
 def get_lead_by_index_1based(idx1: int) -> Optional[Dict[str, str]]:
     try:
-        leads = read_leads(LEADS_CSV)
+        leads = read_leads(_leads_csv())
         if 1 <= idx1 <= len(leads):
             return leads[idx1 - 1]
     except Exception:
@@ -406,125 +603,919 @@ def get_lead_by_index_1based(idx1: int) -> Optional[Dict[str, str]]:
     return None
 
 
-# Initialize selected CSV from persisted file if available
+# Seed the shared state from the persisted selection; the first worker to start wins
 _persisted_path, _persisted_remote = _load_persisted_selected_csv()
-if _persisted_path:
-    LEADS_CSV = str(_persisted_path)
-    SELECTED_CSV_REMOTE_KEY = _persisted_remote
+controller_state.init_setting("leads_csv", str(_persisted_path) if _persisted_path else DEFAULT_LEADS_CSV)
+controller_state.init_setting("selected_csv_remote_key", _persisted_remote if _persisted_path else None)
+
+
+def _all_campaigns_map() -> Dict[str, tuple[str, str, str]]:
+    m = dict(CAMPAIGNS)
+    try:
+        m.update(_list_dynamic_campaigns())
+    except Exception:
+        pass
+    return m
+
+
+def _lead_queue_name() -> str:
+    """Queue for the active lead list; nodes dialing the same list share it."""
+    return _selected_remote_key() or os.path.basename(_leads_csv())
+
+
+def _claim_lead(lead_index_1based: Optional[int], after: Optional[int] = None,
+                total: Optional[int] = None, by_priority: bool = False) -> Optional[Lease]:
+    """Lease ``lead_index_1based`` (operator pick) or the next undialed lead of the active list.
+
+    ``by_priority`` takes the best-scored fresh lead instead of the next one in list order.
+    """
+    queue = open_queue()
+    name = _lead_queue_name()
+    queue.sync_size(name, len(read_leads(_leads_csv())) if total is None else total)
+    return queue.claim(name, default_owner(), DEFAULT_LEASE_SECONDS, lead_index=lead_index_1based, after=after,
+                       by_priority=by_priority)
+
+
+# Do-not-call list (backend/suppression.py) plus a cooldown on numbers any campaign dialed recently
+SUPPRESSION = SuppressionIndex()
+SUPPRESSION_CALLED_WITHIN = float(os.getenv("SUPPRESSION_CALLED_WITHIN_HOURS", "24") or 0) * 3600
+SUPPRESSION_SKIP_LIMIT = 50  # suppressed leads skipped per auto-next before giving up
+_RECENT_DIALS: Dict[int, float] = {}  # normalized number -> last start time
+_RECENT_DIALS_ROWID = 0
+_recent_dials_lock = Lock()
+
+
+def _refresh_recent_dials(now: float) -> None:
+    """Pull numbers dialed since the last refresh (by any worker) into the in-memory cooldown map."""
+    global _RECENT_DIALS_ROWID
+    since = now - SUPPRESSION_CALLED_WITHIN
+    with _recent_dials_lock:
+        for r in controller_state.dialed_numbers_after(_RECENT_DIALS_ROWID, since):
+            _RECENT_DIALS[r["phone"]] = max(_RECENT_DIALS.get(r["phone"], 0.0), r["started_at"])
+            _RECENT_DIALS_ROWID = r["rowid"]
+        if len(_RECENT_DIALS) > 10000:
+            for key in [k for k, t in _RECENT_DIALS.items() if t < since]:
+                del _RECENT_DIALS[key]
+
+
+def _suppression_reason(phone: Optional[str], explicit: bool = False, country: Optional[str] = None) -> Optional[str]:
+    """Why ``phone`` must not be dialed now, or None. Operator re-dials skip the cooldown.
+
+    ``country`` qualifies national-format numbers (see country_for_timezone);
+    numbers that still can't be normalized are not checkable and pass.
+    """
+    key = normalize_number(phone, country)
+    if key is None:
+        if phone:
+            logger.warning("Cannot check %r against the do-not-call list (no country for a national number?)", phone)
+        return None
+    if key in SUPPRESSION:
+        return "dnc"
+    if explicit or SUPPRESSION_CALLED_WITHIN <= 0:
+        return None
+    now = time.time()
+    _refresh_recent_dials(now)
+    last = _RECENT_DIALS.get(key)
+    if last is not None and now - last < SUPPRESSION_CALLED_WITHIN:
+        return "called_recently"
+    return None
+
+
+def _dedupe_lead_csv(content: bytes) -> tuple[bytes, Dict[str, int]]:
+    """Drop rows repeating an earlier row's phone number and count rows already on the DNC list."""
+    import io
+    text = content.decode("utf-8-sig", errors="ignore")
+    reader = csv.reader(io.StringIO(text, newline=""))
+    header = next(reader, None)
+    report = {"duplicates_removed": 0, "on_dnc_list": 0, "not_checkable": 0}
+    if not header or "phone" not in header:
+        return content, report
+    col = header.index("phone")
+    tz_col = header.index("timezone") if "timezone" in header else None
+    seen = set()
+    kept = [header]
+    for record in reader:
+        phone = record[col] if col < len(record) else ""
+        country = country_for_timezone(record[tz_col]) if tz_col is not None and tz_col < len(record) else None
+        key = normalize_number(phone, country)
+        if key is None and phone.strip():
+            report["not_checkable"] += 1
+        if key is not None:
+            if key in seen:
+                report["duplicates_removed"] += 1
+                continue
+            seen.add(key)
+            if key in SUPPRESSION:
+                report["on_dnc_list"] += 1
+        kept.append(record)
+    if not report["duplicates_removed"]:
+        return content, report
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(kept)
+    return out.getvalue().encode("utf-8"), report
+
+
+def _leads_csv_aliases(target: Path) -> List[str]:
+    """Every spelling of ``target`` that calls were recorded under (relative, absolute...)."""
+    aliases = []
+    for used in controller_state.leads_csvs_used():
+        try:
+            if Path(used).resolve() == target:
+                aliases.append(used)
+        except Exception:
+            continue
+    return aliases
+
+
+def _reindex_lead_list(name: str, content: bytes, dest: Path) -> Optional[Dict[str, Any]]:
+    """Diff a (re-)uploaded list against its indexed version and carry call progress over.
+
+    Leads are matched by stable key (phone + email), so calls, outcomes and lead-queue
+    state follow a lead to its new position; only added or changed rows are re-validated.
+    The summary lists the leads that failed validation (``invalid_leads``).
+    """
+    import io
+    old = controller_state.lead_index_rows(name)
+    if not old and not dest.exists():
+        # A list only Supabase has: diff against the copy calls were made against, not nothing
+        _download_csv_from_supabase(name)
+    if not old and dest.exists():
+        # First re-upload since keys were introduced: index the version calls were made against
+        with open(dest, "r", encoding="utf-8-sig", newline="") as f:
+            old = lead_diff.build_index(f)
+    text = content.decode("utf-8-sig", errors="ignore")
+    d = lead_diff.diff(old, io.StringIO(text, newline=""))
+    controller_state.apply_lead_index(name, d.upserts, d.removed_keys)
+    if d.new_positions:
+        controller_state.rekey_calls(_leads_csv_aliases(dest.resolve()), d.old_keys, d.new_positions)
+    if d.moves or old:
+        open_queue().remap(name, d.moves, d.total)
+    summary: Dict[str, Any] = d.summary()
+    summary["invalid_leads"] = controller_state.invalid_leads(name)["leads"]
+    return summary
+
+
+def _campaign_module(campaign_key: Optional[str]) -> Optional[str]:
+    """Prompt module of a campaign key without listing campaigns (which may hit Supabase)."""
+    if not campaign_key:
+        return None
+    if campaign_key in CAMPAIGNS:
+        return CAMPAIGNS[campaign_key][0]
+    if campaign_key.endswith(")") and " (" in campaign_key:
+        return _normalize_prompt_module(campaign_key.rsplit(" (", 1)[1][:-1])
+    return None
+
+
+def _retry_policy(campaign_key: Optional[str]) -> RetryPolicy:
+    """Redial policy of a campaign (DEFAULT_POLICY merged with its stored overrides)."""
+    module = _campaign_module(campaign_key)
+    overrides = _campaign_setting(module, "retry_policy") if module else None
+    try:
+        return RetryPolicy.from_dict(overrides)
+    except (TypeError, ValueError):
+        logger.warning("Invalid retry policy for %s; using the default", campaign_key)
+        return RetryPolicy.from_dict(None)
+
+
+def _amd_config(module: Optional[str]) -> AMDConfig:
+    """Answering-machine detection settings of a campaign (backend/amd.py); off unless it opted in."""
+    try:
+        return AMDConfig.from_dict(_campaign_setting(module, "amd") if module else None)
+    except (TypeError, ValueError):
+        logger.warning("Invalid AMD settings for %s; using the defaults", module)
+        return AMDConfig()
 
 
-def spawn_call(lead_index_1based: int, campaign_key: Optional[str]) -> None:
+def _call_limits(module: Optional[str]) -> CallLimits:
+    """Silence and duration limits of a campaign (backend/call_limits.py); defaults unless it changed them."""
+    try:
+        return CallLimits.from_dict(_campaign_setting(module, "limits") if module else None)
+    except (TypeError, ValueError):
+        logger.warning("Invalid call limits for %s; using the defaults", module)
+        return CallLimits()
+
+
+# Exit codes of agents that ended a call on their own watchdog -> end reason recorded on the call
+_LIMIT_EXIT_CODES = {OUTCOME_EXIT_CODES[reason]: reason for reason in LIMIT_END_REASONS}
+
+
+def _settle_lease(call: Dict[str, Any]) -> str:
+    """Classify a finished call, then complete its lead, schedule a redial, or hand it back if the agent never ran.
+
+    Returns the outcome.
+    """
+    policy = _retry_policy(call.get("campaign"))
+    duration = call["ended_at"] - call["started_at"] if call.get("ended_at") else None
+    outcome = classify_outcome(call.get("exit_code"), call.get("end_reason"), duration, policy.short_call_s)
+    controller_state.set_outcome(call["id"], outcome)
+    if not call.get("lease_token"):
+        return outcome
+    lease = Lease(call["lead_queue"], call["lead_index"], call["lease_token"], 0, 0.0)
+    try:
+        due_at = policy.next_attempt_at(outcome, call.get("attempt") or 1)
+        if call.get("exit_code") is None and call.get("end_reason") != "exited":
+            open_queue().release(lease)
+        elif due_at is not None:
+            if open_queue().schedule_retry(lease, due_at, result=outcome):
+                logger.info("Lead %s (%s) will be redialed in %.0fs", call["lead_index"], outcome, due_at - time.time())
+            else:
+                logger.warning("Lease on lead %s was lost before the call finished", call["lead_index"])
+        elif not open_queue().complete(lease, result=outcome):
+            logger.warning("Lease on lead %s was lost before the call finished", call["lead_index"])
+    except Exception:
+        logger.exception("Failed to settle lead lease for call %s", call["id"])
+    with _proc_lock:
+        _LEASE_BEATS.pop(call["id"], None)
+    return outcome
+
+
+def spawn_call(lead_index_1based: Optional[int], campaign_key: Optional[str], after: Optional[int] = None,
+               max_active: Optional[int] = None) -> Optional[str]:
+    """Start a console call and return its id.
+
+    ``lead_index_1based`` picks a lead explicitly; None pulls the next lead
+    from the lead queue (preferring leads after ``after``). Returns None if no
+    lead is available or MAX_CONCURRENT_CALLS (or the lower ``max_active``)
+    calls are already active.
+    """
+    explicit = lead_index_1based is not None
+    leads = read_leads(_leads_csv())
+    by_score = _orders_by_score(_campaign_module(campaign_key))
+    for _ in range(SUPPRESSION_SKIP_LIMIT):
+        lease = _claim_lead(lead_index_1based, after, total=len(leads), by_priority=by_score)
+        if lease is None:
+            return None
+        lead = leads[lease.lead_index - 1] if 1 <= lease.lead_index <= len(leads) else {}
+        phone, country = lead.get("phone"), country_for_timezone(lead.get("timezone"))
+        reason = _suppression_reason(phone, explicit=explicit, country=country)
+        if reason is None:
+            break
+        # Settled so no node dials it; the queue result records why
+        open_queue().complete(lease, result=f"suppressed:{reason}")
+        with _metrics_lock:
+            METRICS["calls_suppressed"] += 1
+        logger.info("Skipping lead %s: %s", lease.lead_index, reason)
+        if explicit:
+            return None
+        after = lease.lead_index
+    else:
+        return None
+    lead_index_1based = lease.lead_index
     env = os.environ.copy()
     env["RUN_SINGLE_CALL"] = "1"
     env["LEAD_INDEX"] = str(lead_index_1based)
 
     # Apply campaign env if provided
-    def _all_campaigns_map() -> Dict[str, tuple[str, str, str]]:
-        m = dict(CAMPAIGNS)
-        try:
-            m.update(_list_dynamic_campaigns())
-        except Exception:
-            pass
-        return m
-
     cmap = _all_campaigns_map()
     if campaign_key and campaign_key in cmap:
         mod, agent_attr, session_attr = cmap[campaign_key]
         env["CAMPAIGN_PROMPT_MODULE"] = _normalize_prompt_module(mod)
         env["CAMPAIGN_AGENT_NAME"] = agent_attr
         env["CAMPAIGN_SESSION_NAME"] = session_attr
-
+        env["CAMPAIGN_PROMPT_MODE"] = normalize_prompt_mode(_campaign_setting(mod, "prompt_mode"))
+    # Console calls dial out, so campaigns that opt in screen them for answering machines (browser rooms never)
+    module = _campaign_module(campaign_key)
+    if module and _campaign_setting(module, "amd"):
+        env["AMD_CONFIG"] = json.dumps(_amd_config(module)._asdict())
+    env["CALL_LIMITS"] = json.dumps(_call_limits(_campaign_module(campaign_key))._asdict())
+
+    # Claiming the slot is atomic across workers, so two requests can't both start a call
+    call_id = controller_state.claim_call(
+        "console", lead_index_1based, campaign_key, leads_csv=_leads_csv(),
+        max_active=min(MAX_CONCURRENT_CALLS, max_active or MAX_CONCURRENT_CALLS),
+        lead_queue=lease.queue, lease_token=lease.token,
+        lead_key=controller_state.lead_key_at(lease.queue, lead_index_1based), phone=normalize_number(phone, country),
+        attempt=lease.attempts,
+    )
+    if not call_id:
+        open_queue().release(lease)
+        return None
+    env["CALL_ID"] = call_id  # names the call's transcript (backend/transcripts.py)
+    creationflags = 0
+    if sys.platform == "win32":
+        # Create new process group to allow signal/termination management
+        creationflags = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
     # Launch console subcommand to get audio I/O and track process
-    global CURRENT_PROC, CURRENT_STATUS, CURRENT_LEAD_INDEX
-    with _proc_lock:
-        # If a process is already running, do not start another
-        if CURRENT_PROC and CURRENT_PROC.poll() is None:
-            return
-        creationflags = 0
-        if sys.platform == "win32":
-            # Create new process group to allow signal/termination management
-            creationflags = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
-        CURRENT_PROC = subprocess.Popen(
+    try:
+        proc = subprocess.Popen(
             [sys.executable, "-m", AGENT_MODULE, "console"], env=env, creationflags=creationflags
         )
-        CURRENT_STATUS = "running"
-        CURRENT_LEAD_INDEX = lead_index_1based
-
-
-def spawn_agent_connect_room(room_name: str, campaign_key: Optional[str]) -> None:
-    """Spawn agent to connect to a specific room so the browser can converse with it."""
+    except Exception:
+        controller_state.finish_call(call_id, status="failed", end_reason="spawn_failed")
+        open_queue().release(lease)
+        raise
+    with _proc_lock:
+        _LOCAL_PROCS[call_id] = proc
+        _LEASE_BEATS[call_id] = time.time()
+    if controller_state.attach_process(call_id, proc.pid) != "running":
+        # Ended while we were spawning
+        _stop_proc(proc)
+    _record_call_started()
+    return call_id
+
+
+def spawn_agent_connect_room(room_name: str, campaign_key: Optional[str], lead_index_1based: Optional[int] = None,
+                             session_id: Optional[str] = None) -> None:
+    """Spawn agent to connect to a specific room so the browser can converse with it.
+
+    With AGENT_DISPATCH_MODE=worker the room is handed to the long-lived worker
+    (`python -m backend.agent worker`) as a dispatched job instead of a new process.
+    The process (if any) is recorded on the browser session so it can be reaped.
+    """
+    campaign = _all_campaigns_map().get(campaign_key) if campaign_key else None
+    if AGENT_DISPATCH_MODE == "worker":
+        lead = get_lead_by_index_1based(lead_index_1based) if lead_index_1based else None
+        mod_campaign = (_normalize_prompt_module(campaign[0]), campaign[1], campaign[2]) if campaign else None
+        prompt_mode = normalize_prompt_mode(_campaign_setting(campaign[0], "prompt_mode")) if campaign else None
+        limits = _call_limits(campaign[0] if campaign else None)._asdict()
+        try:
+            asyncio.run(dispatch_call(room_name, lead, mod_campaign, lead_index_1based, prompt_mode, limits, session_id))
+        except Exception:
+            logger.exception("Failed to dispatch agent job for room '%s'", room_name)
+            if session_id:
+                controller_state.finish_call(session_id, status="failed", end_reason="dispatch_failed")
+            return
+        if session_id and controller_state.attach_process(session_id, None) == "stopping":
+            # Ended while we were dispatching: the job is on its way into the room
+            _close_dispatched_room(room_name)
+            controller_state.finish_call(session_id)
+        return
     env = os.environ.copy()
     env["RUN_SINGLE_CALL"] = "1"
-    if campaign_key and campaign_key in CAMPAIGNS:
-        mod, agent_attr, session_attr = CAMPAIGNS[campaign_key]
+    if lead_index_1based:
+        env["LEAD_INDEX"] = str(lead_index_1based)
+    if campaign:
+        mod, agent_attr, session_attr = campaign
         env["CAMPAIGN_PROMPT_MODULE"] = _normalize_prompt_module(mod)
         env["CAMPAIGN_AGENT_NAME"] = agent_attr
         env["CAMPAIGN_SESSION_NAME"] = session_attr
+        env["CAMPAIGN_PROMPT_MODE"] = normalize_prompt_mode(_campaign_setting(mod, "prompt_mode"))
+    env["CALL_LIMITS"] = json.dumps(_call_limits(campaign[0] if campaign else None)._asdict())
+    if session_id:
+        env["CALL_ID"] = session_id
+    creationflags = 0
+    if sys.platform == "win32":
+        creationflags = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
     # Use LiveKit CLI subcommand 'connect' with a room name; the Agents CLI will join that room
-    subprocess.Popen([sys.executable, "-m", AGENT_MODULE, "connect", "--room", room_name], env=env)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", AGENT_MODULE, "connect", "--room", room_name], env=env, creationflags=creationflags
+    )
+    if not session_id:
+        return
+    with _proc_lock:
+        _LOCAL_PROCS[session_id] = proc
+    if controller_state.attach_process(session_id, proc.pid) != "running":
+        # Session was ended while we were spawning; don't leave the agent behind
+        _stop_proc(proc)
+
+
+# -----------------------------
+# Call lifecycle (console and browser)
+# -----------------------------
+# Browser rooms get one agent each, tracked like console calls so they can be
+# ended, reaped after BROWSER_IDLE_TIMEOUT seconds without activity, and reused
+# when an operator rejoins the same room.
+BROWSER_IDLE_TIMEOUT = float(os.getenv("BROWSER_IDLE_TIMEOUT", "300"))
+BROWSER_SESSION_RETENTION = 600.0  # keep ended sessions visible in the API for this long
+
+
+def _call_view(call: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": call["id"],
+        "room": call.get("room"),
+        "lead_index": call.get("lead_index"),
+        "campaign": call.get("campaign"),
+        "status": call["status"],
+        "pid": call.get("pid"),
+        "owner_pid": call.get("owner_pid"),
+        "started_at": call["started_at"],
+        "last_activity": call["last_activity"],
+        "ended_at": call.get("ended_at"),
+        "exit_code": call.get("exit_code"),
+        "end_reason": call.get("end_reason"),
+        "result": call.get("result"),
+        "usage": None if call.get("cpu_s") is None else {
+            "peak_rss_mb": call["peak_rss_mb"], "cpu_s": call["cpu_s"], "peak_fds": call["peak_fds"],
+            "over_budget": call.get("over_budget"),
+        },
+    }
+
+
+def _open_browser_session(lead_index_1based: int, campaign: Optional[str], room: Optional[str]) -> tuple[Dict[str, Any], bool]:
+    """Return (session, created). An active session for ``room`` is reused instead of spawning again."""
+    if room:
+        existing = controller_state.find_active_room(room)
+        if existing:
+            controller_state.touch(call_id=existing["id"])
+            return existing, False
+    session_id = uuid.uuid4().hex[:12]
+    # Unique per session so two operators on the same lead never share a room
+    room_name = room or f"room-{lead_index_1based}-{session_id}"
+    if not controller_state.claim_call("browser", lead_index_1based, campaign, room=room_name, call_id=session_id):
+        # Another worker opened this room a moment ago
+        existing = controller_state.find_active_room(room_name)
+        if existing:
+            return existing, False
+        raise HTTPException(status_code=409, detail="Room is busy")
+    return controller_state.get_call(session_id), True
+
+
+def _stop_proc(proc: subprocess.Popen) -> None:
+    """Ask an agent process to stop the same way End Call does."""
+    try:
+        if sys.platform == "win32":
+            proc.terminate()
+        else:
+            proc.send_signal(signal.SIGINT)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
 
 
-def _end_current_call() -> bool:
-    """Attempt to gracefully stop the current console call. Returns True if a process was signaled/terminated."""
-    global CURRENT_PROC, CURRENT_STATUS
+def _signal_call(call: Dict[str, Any], kill: bool = False) -> bool:
+    """Signal a call's agent: through the Popen handle if this worker owns it, else by pid."""
     with _proc_lock:
-        proc = CURRENT_PROC
-        if not proc or proc.poll() is not None:
-            CURRENT_PROC = None
-            CURRENT_STATUS = "idle"
+        proc = _LOCAL_PROCS.get(call["id"])
+    if proc is not None:
+        if proc.poll() is not None:
             return False
-        CURRENT_STATUS = "stopping"
+        if kill:
+            proc.kill()
+        else:
+            _stop_proc(proc)
+        return True
+    pid = call.get("pid")
+    if not controller_state.pid_alive(pid):
+        return False
+    if kill:
+        sig = getattr(signal, "SIGKILL", signal.SIGTERM)
+    else:
+        sig = signal.SIGTERM if sys.platform == "win32" else signal.SIGINT
+    try:
+        os.kill(pid, sig)
+    except OSError:
+        return False
+    return True
+
+
+def _close_dispatched_room(room: Optional[str]) -> None:
+    """End a worker-mode job by deleting its room, off the caller's thread (it may be an event loop)."""
+    if not room:
+        return
+
+    def close() -> None:
         try:
-            if sys.platform == "win32":
-                # Best-effort terminate on Windows
-                proc.terminate()
-            else:
-                proc.send_signal(signal.SIGINT)
+            asyncio.run(end_dispatched_call(room))
         except Exception:
+            logger.warning("Failed to close room '%s'; its agent job may keep running", room, exc_info=True)
+
+    Thread(target=close, name="close-room", daemon=True).start()
+
+
+def _request_stop(call_id: str, reason: str = "ended") -> bool:
+    """Mark a call stopping and signal its agent. Returns True if a process was signaled."""
+    if not controller_state.update_call(call_id, status="stopping", stop_requested_at=time.time(), end_reason=reason):
+        return False
+    call = controller_state.get_call(call_id)
+    if call is None:
+        return False
+    if _signal_call(call):
+        return True
+    with _proc_lock:
+        owned = call_id in _LOCAL_PROCS
+    if not owned and not call.get("pid"):
+        # No agent process to wait for: a dispatched worker job, or a spawn that will see the stop
+        if call["kind"] == "browser" and AGENT_DISPATCH_MODE == "worker":
+            _close_dispatched_room(call.get("room"))
+        if controller_state.finish_call(call_id, end_reason=reason):
+            _settle_lease(controller_state.get_call(call_id))
+    return False
+
+
+def _end_current_call(call_id: Optional[str] = None) -> Tuple[Optional[str], bool]:
+    """Attempt to gracefully stop the current (or given) console call.
+
+    Returns the id of the call asked to stop (None if there was none) and whether a process was signaled.
+    """
+    _reap_calls()
+    calls = [c for c in controller_state.active_calls("console") if c["status"] != "stopping"]
+    if call_id:
+        calls = [c for c in calls if c["id"] == call_id]
+    if not calls:
+        return None, False
+    return calls[-1]["id"], _request_stop(calls[-1]["id"])
+
+
+def _reap_calls(auto_next: bool = True) -> List[Dict[str, Any]]:
+    """Record calls whose agent exited, escalate ignored stops and end idle browser sessions.
+
+    Returns the calls this worker finished. Only the worker that makes the
+    transition sees a call here, so auto-next fires once across all workers.
+    """
+    now = time.time()
+    me = os.getpid()
+    finished: List[Dict[str, Any]] = []
+    with _proc_lock:
+        local = list(_LOCAL_PROCS.items())
+    for call_id, proc in local:
+        code = proc.poll()
+        if code is not None:
+            with _proc_lock:
+                _LOCAL_PROCS.pop(call_id, None)
+            if controller_state.finish_call(call_id, exit_code=code, end_reason=_LIMIT_EXIT_CODES.get(code, "exited")):
+                finished.append(controller_state.get_call(call_id))
+            continue
+        call = controller_state.get_call(call_id)
+        _renew_lease(call, now)
+        stop_at = (call or {}).get("stop_requested_at") or (call or {}).get("ended_at")
+        if call and call["status"] in ("stopping", "ended", "failed") and stop_at and now - stop_at > STOP_KILL_AFTER:
+            # Ignored SIGINT; don't let it keep holding CPU and model quota
             try:
                 proc.kill()
             except Exception:
                 pass
-        return True
+    limits: Dict[Optional[str], CallLimits] = {}
+    for call in controller_state.active_calls():
+        owner_alive = call["owner_pid"] == me or controller_state.pid_alive(call["owner_pid"])
+        if call["kind"] == "browser" and call["status"] in ("starting", "running") \
+                and now - call["last_activity"] > BROWSER_IDLE_TIMEOUT:
+            _request_stop(call["id"], reason="idle_timeout")
+            continue
+        if call["status"] in ("starting", "running"):
+            # Backstop for agents whose own watchdog did not end the call (hung session, old agent)
+            if call["campaign"] not in limits:
+                limits[call["campaign"]] = _call_limits(_campaign_module(call["campaign"]))
+            backstop = limits[call["campaign"]].backstop_at(call["started_at"])
+            if backstop is not None and now > backstop:
+                logger.warning("Call %s ran past its maximum duration; stopping it", call["id"])
+                _request_stop(call["id"], reason="max_duration")
+                continue
+        if owner_alive:
+            continue
+        # The owning worker is gone: track its agent by pid until it exits
+        if call.get("pid") and controller_state.pid_alive(call["pid"]):
+            _renew_lease(call, now)
+            if call["status"] == "stopping" and now - (call.get("stop_requested_at") or now) > STOP_KILL_AFTER:
+                _signal_call(call, kill=True)
+            continue
+        if controller_state.finish_call(call["id"], end_reason="exited" if call.get("pid") else "owner_lost"):
+            if call["kind"] == "browser" and not call.get("pid") and AGENT_DISPATCH_MODE == "worker":
+                _close_dispatched_room(call.get("room"))  # nobody is left to end its job
+            finished.append(controller_state.get_call(call["id"]))
+    for call in finished:
+        if call and call["kind"] == "console":
+            _record_call_ended(call.get("exit_code"))
+            _record_call_score(call, _settle_lease(call))
+    if auto_next and _auto_next():
+        campaign = _selected_campaign()
+        if _pacing_config(campaign).mode == "predictive":
+            last = [c for c in finished if c and c["kind"] == "console"]
+            _pace_dials(campaign, now, after=last[-1].get("lead_index") if last else None)
+            return finished
+        for call in finished:
+            if call and call["kind"] == "console" and controller_state.claim_next(call["id"]):
+                try:
+                    spawn_call(None, campaign, after=call.get("lead_index"))
+                except Exception:
+                    logger.exception("Failed to auto-start the next call")
+        if not finished:
+            _dial_due_retry(now)
+    return finished
+
+
+_PACING_STATS: Dict[Optional[str], tuple] = {}  # campaign -> (computed_at, CallStats)
+PACING_STATS_TTL = 5.0
+
+
+def _pacing_config(campaign_key: Optional[str]) -> pacing.PacingConfig:
+    """Pacing settings of a campaign; fixed one-call-per-slot unless it opted into predictive mode."""
+    module = _campaign_module(campaign_key)
+    try:
+        return pacing.PacingConfig.from_dict(_campaign_setting(module, "pacing") if module else None)
+    except (TypeError, ValueError):
+        logger.warning("Invalid pacing settings for %s; using fixed pacing", campaign_key)
+        return pacing.PacingConfig()
+
+
+def _pacing_stats(campaign_key: Optional[str], cfg: pacing.PacingConfig, now: float) -> pacing.CallStats:
+    """Rolling answer rate, handle time and ring-out times from the campaign's last ``cfg.window`` calls."""
+    cached = _PACING_STATS.get(campaign_key)
+    if cached and now - cached[0] < PACING_STATS_TTL:
+        return cached[1]
+    stats = pacing.estimate(controller_state.recent_outcomes(campaign_key, cfg.window))
+    _PACING_STATS[campaign_key] = (now, stats)
+    return stats
+
+
+def _pacing_plan(campaign_key: Optional[str], now: float) -> Dict[str, Any]:
+    cfg = _pacing_config(campaign_key)
+    stats = _pacing_stats(campaign_key, cfg, now)
+    active = controller_state.active_calls("console")
+    probs = [pacing.live_probability(now - c["started_at"], stats) for c in active]
+    dials, rate = pacing.dials_to_start(cfg, stats, probs, MAX_CONCURRENT_CALLS - len(active))
+    return {"config": cfg, "stats": stats, "active": len(active), "expected_live": sum(probs),
+            "dials": dials, "predicted_abandon_rate": rate}
+
+
+def _pace_dials(campaign_key: Optional[str], now: float, after: Optional[int] = None) -> int:
+    """Top up lines in flight to what predictive pacing asks for; returns calls started."""
+    try:
+        plan = _pacing_plan(campaign_key, now)
+    except Exception:
+        logger.exception("Pacing failed")
+        return 0
+    # Every worker paces on its own tick; the shared ceiling keeps their sum at the planned total
+    ceiling = plan["active"] + plan["dials"]
+    started = 0
+    for _ in range(plan["dials"]):
+        try:
+            call_id = spawn_call(None, campaign_key, after=after, max_active=ceiling)
+        except Exception:
+            logger.exception("Failed to start a paced call")
+            break
+        if call_id is None:
+            break
+        started += 1
+        after = (controller_state.get_call(call_id) or {}).get("lead_index", after)
+    return started
+
+
+def _dial_due_retry(now: float) -> None:
+    """Restart auto-next for a redial that came due while no call was running to chain from."""
+    if len(controller_state.active_calls("console")) >= MAX_CONCURRENT_CALLS:
+        return
+    try:
+        due = open_queue().next_retry_at(_lead_queue_name())
+        if due is not None and due <= now:
+            spawn_call(None, _selected_campaign())
+    except Exception:
+        logger.exception("Failed to start a due redial")
+
+
+# Answer-likelihood ordering of fresh leads (backend/lead_scoring.py)
+LEAD_SCORING = os.getenv("LEAD_SCORING", "1").strip().lower() not in ("0", "false", "no", "off")
+LEAD_SCORE_REFRESH_S = 900.0  # full rescore period; local hours move (some zones on the quarter hour)
+LEAD_SCORE_EPSILON = 0.005  # smaller score moves after a call wait for the next full rescore
+_score_lock = Lock()
+_SCORER: Dict[str, Any] = {}  # "model", "groups" (active list by attributes), "written" (combo -> score), "period"
+
+
+def _orders_by_score(module: Optional[str]) -> bool:
+    """Whether a campaign dials fresh leads best score first; off (list order) unless the campaign opts in."""
+    return LEAD_SCORING and bool(module and _campaign_setting(module, "lead_scoring"))
+
+
+def _score_model() -> ScoreModel:
+    model = _SCORER.get("model")
+    if model is None:
+        model = _SCORER["model"] = ScoreModel().load(controller_state.score_counts())
+    return model
 
 
-def _cleanup_if_exited() -> None:
-    """Reset globals if the process has exited."""
-    global CURRENT_PROC, CURRENT_STATUS
+def _score_groups() -> Dict[str, Any]:
+    """Active list grouped by the attributes scoring looks at; rebuilt when the list or its file changes.
+
+    Leads with the same timezone, title and company always score the same,
+    so scores are computed per distinct combination ("combo"), not per lead.
+    """
+    path = _leads_csv()
+    try:
+        mtime: Optional[float] = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    stamp = (_lead_queue_name(), path, mtime)
+    groups = _SCORER.get("groups")
+    if groups is not None and groups["stamp"] == stamp:
+        return groups
+    leads = read_leads(path)
+    combos: Dict[tuple, List[int]] = {}
+    for i, lead in enumerate(leads, start=1):
+        combos.setdefault((lead["timezone"],) + feature_values(lead)[1:], []).append(i)
+    by_value: Dict[tuple, List[tuple]] = {}
+    for combo in combos:
+        for feature, value in zip(SCORE_FEATURES, feature_values(dict(zip(SCORE_FEATURES, combo)))):
+            if value:
+                by_value.setdefault((feature, value), []).append(combo)
+    groups = _SCORER["groups"] = {"stamp": stamp, "queue": stamp[0], "leads": leads, "combos": combos,
+                                  "by_value": by_value}
+    _SCORER["written"] = {}
+    return groups
+
+
+def _write_scores(groups: Dict[str, Any], combos: List[tuple], now: float, force: bool = False) -> int:
+    """Score ``combos`` for ``now`` and store moved scores as lead queue priorities; returns leads written."""
+    scores = _score_model().score_many([dict(zip(SCORE_FEATURES, c)) for c in combos], now)
+    written = _SCORER.setdefault("written", {})
+    rows: List[tuple] = []
+    for combo, score in zip(combos, scores):
+        if not force and abs(score - written.get(combo, -1.0)) < LEAD_SCORE_EPSILON:
+            continue
+        written[combo] = score
+        rows.extend((i, round(score, 6)) for i in groups["combos"][combo])
+    if rows:
+        open_queue().set_priorities(groups["queue"], rows)
+    return len(rows)
+
+
+def _record_call_score(call: Dict[str, Any], outcome: str) -> None:
+    """Count a finished call toward its lead's connect rates and rescore the leads sharing its attributes."""
+    if not LEAD_SCORING or outcome in pacing.IGNORED_OUTCOMES or not call.get("lead_index"):
+        return
+    try:
+        with _score_lock:
+            groups = _score_groups()
+            if call.get("lead_queue") not in (None, groups["queue"]) or call["lead_index"] > len(groups["leads"]):
+                return  # the list changed since the call started
+            lead = groups["leads"][call["lead_index"] - 1]
+            keys = ScoreModel.keys_for(lead, local_hour(lead["timezone"], call["started_at"]))
+            controller_state.add_score_counts(keys, outcome in pacing.CONNECTED_OUTCOMES)
+            # Re-read the touched counters: other workers count their calls too
+            _score_model().load(controller_state.score_counts(keys))
+            # The hour's base rate moved as well; on its many calls that is a small shift
+            # the periodic rescore picks up for the other leads
+            affected = {combo for feature, value in zip(SCORE_FEATURES, feature_values(lead)) if value
+                        for combo in groups["by_value"].get((feature, value), ())}
+            _write_scores(groups, list(affected), time.time())
+    except Exception:
+        logger.exception("Failed to update lead scores after call %s", call.get("id"))
+
+
+def _refresh_lead_scores(now: float) -> None:
+    """Rescore the whole active list once per LEAD_SCORE_REFRESH_S and whenever it changes.
+
+    Every worker reloads its counters each period; one of them (whichever
+    swaps the shared marker first) writes the priorities. With scoring
+    turned off, priorities are reset to CSV order once.
+    """
+    try:
+        with _score_lock:
+            groups = _score_groups()
+            if not groups["leads"]:
+                return
+            queue = open_queue()
+            if not LEAD_SCORING:
+                if controller_state.swap_setting("lead_scores_refreshed", [groups["queue"], "off"]):
+                    queue.set_priorities(groups["queue"], ((i, 0.0) for i in range(1, len(groups["leads"]) + 1)))
+                return
+            period = int(now // LEAD_SCORE_REFRESH_S)
+            if _SCORER.get("period") != period:
+                _SCORER["model"] = ScoreModel().load(controller_state.score_counts())
+                _SCORER["period"] = period
+            if not controller_state.swap_setting("lead_scores_refreshed", [*groups["stamp"], period]):
+                return
+            queue.sync_size(groups["queue"], len(groups["leads"]))
+            written = _write_scores(groups, list(groups["combos"]), now, force=True)
+        logger.info("Rescored %d leads of %s (%d calls counted)", written, groups["queue"], _score_model().calls)
+    except Exception:
+        logger.exception("Failed to refresh lead scores")
+
+
+def _renew_lease(call: Optional[Dict[str, Any]], now: float) -> None:
+    """Renew the lead lease of a call this worker is running, a few times per lease period."""
+    if not call or not call.get("lease_token") or call["status"] not in ("starting", "running"):
+        return
     with _proc_lock:
-        if CURRENT_PROC and CURRENT_PROC.poll() is not None:
-            CURRENT_PROC = None
-            CURRENT_STATUS = "idle"
+        last = _LEASE_BEATS.get(call["id"], 0.0)
+    if now - last < DEFAULT_LEASE_SECONDS / 3:
+        return
+    lease = Lease(call["lead_queue"], call["lead_index"], call["lease_token"], 0, 0.0)
+    try:
+        if open_queue().heartbeat(lease, DEFAULT_LEASE_SECONDS) is None:
+            logger.warning("Lease on lead %s expired during the call; another node may dial it", call["lead_index"])
+    except Exception:
+        logger.exception("Failed to renew lead lease for call %s", call["id"])
+        return
+    with _proc_lock:
+        _LEASE_BEATS[call["id"]] = now
+
+
+# Per-call resource accounting from /proc (backend/app/proc_usage.py); a budget of 0 means none
+CALL_USAGE_INTERVAL = max(1.0, float(os.getenv("CALL_USAGE_INTERVAL", "5") or 5))
+CALL_BUDGETS = {
+    "rss_mb": float(os.getenv("CALL_BUDGET_RSS_MB", "0") or 0),
+    "cpu_s": float(os.getenv("CALL_BUDGET_CPU_S", "0") or 0),
+    "fds": float(os.getenv("CALL_BUDGET_FDS", "0") or 0),
+}
+_USAGE_SAMPLED: Dict[str, float] = {}  # call id -> last sample time (watcher thread only)
+_OVER_BUDGET: Dict[str, set] = {}
+
+
+def _sample_call_usage(now: float) -> None:
+    """Sample this worker's agent children every CALL_USAGE_INTERVAL and warn once per resource over budget."""
+    if not proc_usage.AVAILABLE:
+        return
+    with _proc_lock:
+        local = [(call_id, proc.pid) for call_id, proc in _LOCAL_PROCS.items()]
+    for call_id, pid in local:
+        if now - _USAGE_SAMPLED.get(call_id, 0.0) < CALL_USAGE_INTERVAL:
+            continue
+        _USAGE_SAMPLED[call_id] = now
+        usage = proc_usage.sample(pid)
+        if usage is None:
+            continue
+        over = _OVER_BUDGET.setdefault(call_id, set())
+        new = [k for k, budget in CALL_BUDGETS.items() if budget and getattr(usage, k) > budget and k not in over]
+        for k in new:
+            logger.warning("Call %s went over its %s budget: %s > %s", call_id, k, getattr(usage, k), CALL_BUDGETS[k])
+        if new:
+            over.update(new)
+            with _metrics_lock:
+                METRICS["budget_warnings"] += len(new)
+        try:
+            controller_state.record_usage(call_id, usage.rss_mb, usage.cpu_s, usage.fds,
+                                          ",".join(sorted(over)) if new else None)
+        except Exception:
+            logger.exception("Failed to record resource usage of call %s", call_id)
+    live = {call_id for call_id, _ in local}
+    for call_id in [c for c in _USAGE_SAMPLED if c not in live]:
+        _USAGE_SAMPLED.pop(call_id, None)
+        _OVER_BUDGET.pop(call_id, None)
+
+
+def _usage_summary(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-call resource distribution and the cost model derived from it (for capacity planning)."""
+    if not rows:
+        return {"calls": 0}
+    n = len(rows)
+
+    def dist(key: str) -> Dict[str, float]:
+        vals = sorted(r[key] or 0 for r in rows)
+        return {"mean": round(sum(vals) / n, 2), "p50": vals[n // 2], "p95": vals[min(n - 1, int(0.95 * n))],
+                "max": vals[-1]}
+
+    call_s = sum(max(0.0, r["duration_s"] or 0.0) for r in rows)
+    cpu_per_call_s = sum(r["cpu_s"] or 0.0 for r in rows) / call_s if call_s else None
+    rss = dist("peak_rss_mb")
+    return {
+        "calls": n,
+        "peak_rss_mb": rss,
+        "cpu_s": dist("cpu_s"),
+        "peak_fds": dist("peak_fds"),
+        "over_budget": sum(1 for r in rows if r["over_budget"]),
+        # CPU seconds per minute on a call, and concurrent calls one core / one GB sustains
+        "cpu_s_per_call_minute": round(cpu_per_call_s * 60, 2) if cpu_per_call_s is not None else None,
+        "calls_per_core": round(1 / cpu_per_call_s, 1) if cpu_per_call_s else None,
+        "calls_per_gb": round(1024 / rss["p95"], 1) if rss["p95"] else None,
+    }
+
+
+# Post-call outcome extraction (backend/call_outcomes.py) for calls this worker ran; the
+# backfill CLI covers everything else. The pool keeps the regexes off the watcher thread.
+OUTCOME_INTERVAL = 10.0
+_EXTRACTOR: Dict[str, Any] = {"pool": None, "future": None, "next_at": 0.0}
+
+
+def _extract_call_outcomes(now: float) -> None:
+    """Collect the previous batch's outcomes, then hand the next finished calls to the pool."""
+    if not transcripts.enabled():
+        return
+    fut = _EXTRACTOR["future"]
+    if fut is not None:
+        if not fut.done():
+            return
+        _EXTRACTOR["future"] = None
+        try:
+            controller_state.record_extractions(fut.result(), call_outcomes.RULES_VERSION)
+        except Exception:
+            logger.exception("Failed to extract call outcomes")
+    if now < _EXTRACTOR["next_at"]:
+        return
+    _EXTRACTOR["next_at"] = now + OUTCOME_INTERVAL
+    calls = controller_state.calls_to_extract(call_outcomes.RULES_VERSION, owner_pid=os.getpid())
+    if not calls:
+        return
+    if _EXTRACTOR["pool"] is None:
+        _EXTRACTOR["pool"] = call_outcomes.pool(1)
+    _EXTRACTOR["future"] = _EXTRACTOR["pool"].submit(
+        call_outcomes.extract_batch, [(c["id"], c["ended_at"]) for c in calls], str(transcripts.transcript_dir()), now
+    )
 
 
 def _watcher_loop():
-    """Background loop to auto-start next call when a call ends and AUTO_NEXT is enabled."""
-    last_running = False
+    """Background loop to reap calls and auto-start the next call when one ends and auto-next is enabled."""
     while True:
         try:
-            with _proc_lock:
-                running = CURRENT_PROC is not None and CURRENT_PROC.poll() is None
-                lead_idx = CURRENT_LEAD_INDEX
-                campaign = SELECTED_CAMPAIGN
-            # Transition: running -> not running
-            if last_running and not running:
-                # Ensure cleanup
-                _cleanup_if_exited()
-                if AUTO_NEXT and lead_idx is not None:
-                    # Start next automatically
-                    try:
-                        spawn_call(lead_idx + 1, campaign)
-                    except Exception:
-                        pass
-            last_running = running
+            _reap_calls()
         except Exception:
-            pass
+            logger.debug("Call watcher iteration failed", exc_info=True)
+        _refresh_lead_scores(time.time())
+        try:
+            _sample_call_usage(time.time())
+        except Exception:
+            logger.debug("Resource sampling failed", exc_info=True)
+        try:
+            _extract_call_outcomes(time.time())
+        except Exception:
+            logger.debug("Outcome extraction failed", exc_info=True)
         time.sleep(1)
 
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, page: int = 1, campaign: Optional[str] = None):
-    leads = read_leads(LEADS_CSV)
+    leads_csv = _leads_csv()
+    leads = read_leads(leads_csv)
     total = len(leads)
     total_pages = max(1, math.ceil(total / PAGE_SIZE))
     page = max(1, min(page, total_pages))
@@ -554,7 +1545,7 @@ async def dashboard(request: Request, page: int = 1, campaign: Optional[str] = N
             "page": page,
             "total_pages": total_pages,
             "start_index": start,  # zero-based for row numbering
-            "active_csv": os.path.basename(LEADS_CSV) if LEADS_CSV else "",
+            "active_csv": os.path.basename(leads_csv) if leads_csv else "",
         },
     )
 
@@ -585,7 +1576,9 @@ async def call_lead(
 async def api_csv_list():
     supabase_items = _supabase_csv_list()
     files: List[Dict[str, Any]] = []
-    active_remote = _safe_csv_name(SELECTED_CSV_REMOTE_KEY or "") if SELECTED_CSV_REMOTE_KEY else None
+    leads_csv = _leads_csv()
+    remote_key = _selected_remote_key()
+    active_remote = _safe_csv_name(remote_key) if remote_key else None
 
     if supabase_items is not None:
         for item in supabase_items:
@@ -607,9 +1600,9 @@ async def api_csv_list():
             active = False
             if active_remote:
                 active = active_remote == name
-            elif LEADS_CSV:
+            elif leads_csv:
                 try:
-                    active = local_path.exists() and str(local_path) == str(Path(LEADS_CSV).resolve())
+                    active = local_path.exists() and str(local_path) == str(Path(leads_csv).resolve())
                 except Exception:
                     active = False
             files.append({
@@ -618,6 +1611,22 @@ async def api_csv_list():
                 "mtime": mtime,
                 "active": active,
             })
+        # Overlay uploads/deletes still waiting in the sync journal
+        pending = SYNC_JOURNAL.pending_keys(_SUPABASE_PROSPECTS_TABLE)
+        files = [f for f in files if f["name"] not in pending]
+        for name, op in pending.items():
+            local_path = _csv_local_path(name)
+            if op != "upsert" or not local_path.exists():
+                continue
+            stat = local_path.stat()
+            files.insert(0, {
+                "name": name,
+                "size": stat.st_size,
+                "mtime": int(stat.st_mtime),
+                "active": (active_remote == name) if active_remote else (
+                    bool(leads_csv) and str(local_path) == str(Path(leads_csv).resolve())),
+                "pending_sync": True,
+            })
         return JSONResponse({"ok": True, "files": files})
 
     # Fallback to local filesystem listing if Supabase unavailable
@@ -629,7 +1638,7 @@ async def api_csv_list():
                     "name": p.name,
                     "size": stat.st_size,
                     "mtime": int(stat.st_mtime),
-                    "active": str(p.resolve()) == str(Path(LEADS_CSV).resolve()) if LEADS_CSV else False,
+                    "active": str(p.resolve()) == str(Path(leads_csv).resolve()) if leads_csv else False,
                 })
             except Exception:
                 continue
@@ -649,10 +1658,24 @@ async def api_csv_upload(file: UploadFile = File(...)):
         # Basic size guard (10MB)
         if len(content) > 10 * 1024 * 1024:
             raise HTTPException(status_code=413, detail="File too large (max 10MB)")
-        # Upload to Supabase storage first (best effort)
-        remote_name = _upload_csv_to_supabase(name, content)
+        content, dedupe = _dedupe_lead_csv(content)
+        try:
+            diff = _reindex_lead_list(name, content, dest)
+        except Exception:
+            logger.exception("Failed to diff re-uploaded lead list '%s'; call progress may not carry over", name)
+            diff = None
         dest.write_bytes(content)
-        return JSONResponse({"ok": True, "name": name, "remote": remote_name or ""})
+        # The syncer reads the file when it replays, so the journal stays small
+        row = {
+            "name": name,
+            "uploaded_at": datetime.utcnow().isoformat(),
+            CONTENT_FILE_FIELD: str(dest.resolve()),
+        }
+        if _SUPABASE_CSV_PREVIEW_COLUMN:
+            row[_SUPABASE_CSV_PREVIEW_COLUMN] = _csv_preview_text(content)
+        sync = _journal_write(_SUPABASE_PROSPECTS_TABLE, "upsert", "name", row)
+        return JSONResponse({"ok": True, "name": name, "remote": name if sync == "queued" else "", "sync": sync,
+                             "diff": diff, "dedupe": dedupe})
     except HTTPException:
         raise
     except Exception:
@@ -661,81 +1684,79 @@ async def api_csv_upload(file: UploadFile = File(...)):
 
 @app.post("/api/csv/select")
 async def api_csv_select(name: str = Form(...)):
-    global LEADS_CSV, SELECTED_CSV_REMOTE_KEY
     name = _safe_csv_name(name)
     local = _download_csv_from_supabase(name, force=True)
     if local and local.exists():
-        LEADS_CSV = str(local)
-        SELECTED_CSV_REMOTE_KEY = name
-        _persist_selected_csv(local, SELECTED_CSV_REMOTE_KEY)
+        _persist_selected_csv(local, name)
         return JSONResponse({"ok": True, "active": name})
 
     target = _csv_local_path(name)
     if not target.exists() or target.suffix.lower() != ".csv":
         raise HTTPException(status_code=404, detail="CSV not found")
-    LEADS_CSV = str(target)
-    SELECTED_CSV_REMOTE_KEY = None
     _persist_selected_csv(target, None)
     return JSONResponse({"ok": True, "active": name})
 
 
 @app.delete("/api/csv/{name}")
 async def api_csv_delete(name: str):
-    global SELECTED_CSV_REMOTE_KEY, LEADS_CSV
     name = _safe_csv_name(name)
+    leads_csv = _leads_csv()
+    remote_key = _selected_remote_key()
     # Prevent deleting active CSV in-use
-    if SELECTED_CSV_REMOTE_KEY and SELECTED_CSV_REMOTE_KEY == name:
+    if remote_key and remote_key == name:
         raise HTTPException(status_code=400, detail="Cannot delete the active CSV. Select another file first.")
-    if LEADS_CSV:
+    if leads_csv:
         try:
-            if Path(LEADS_CSV).resolve() == _csv_local_path(name):
+            if Path(leads_csv).resolve() == _csv_local_path(name):
                 raise HTTPException(status_code=400, detail="Cannot delete the active CSV. Select another file first.")
         except HTTPException:
             raise
         except Exception:
             pass
 
-    supabase_error = _delete_supabase_csv(name)
-    if supabase_error is None:
-        local = _csv_local_path(name)
-        if local.exists():
-            try:
-                local.unlink()
-            except Exception:
-                pass
-        if SELECTED_CSV_REMOTE_KEY == name:
-            SELECTED_CSV_REMOTE_KEY = None
-        return JSONResponse({"ok": True, "supabase_error": None})
-
     target = _csv_local_path(name)
-    if not target.exists() or target.suffix.lower() != ".csv":
+    remote = bool(_SUPABASE_URL and _SUPABASE_SERVICE_ROLE_KEY)
+    # Remote-only files may not be cached locally; without Supabase the local file must exist
+    if not remote and (not target.exists() or target.suffix.lower() != ".csv"):
         raise HTTPException(status_code=404, detail="CSV not found")
     try:
-        target.unlink()
-        return JSONResponse({"ok": True, "supabase_error": supabase_error})
+        target.unlink(missing_ok=True)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to delete file")
+    if _selected_remote_key() == name:
+        controller_state.set_setting("selected_csv_remote_key", None)
+    sync = _journal_write(_SUPABASE_PROSPECTS_TABLE, "delete", "name", {"name": name})
+    return JSONResponse({"ok": True, "supabase_error": None, "sync": sync})
 
 
 @app.get("/api/csv/preview")
 async def api_csv_preview(name: str, limit: int = 10):
+    """First ``limit`` rows of a CSV without reading or downloading the rest of it."""
+    import io
     name = _safe_csv_name(name)
-    target = _download_csv_from_supabase(name, force=False)
-    if not target or not target.exists():
-        target = _csv_local_path(name)
-        if not target.exists():
-            raise HTTPException(statuscode=404, detail="CSV not found")
+    limit = max(1, min(limit, CSV_PREVIEW_MAX_LIMIT))
+    target = _csv_local_path(name)
+    source = "local"
     try:
-        rows = []
-        headers: List[str] = []
-        with open(target, "r", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            headers = list(reader.fieldnames or [])
-            for i, row in enumerate(reader):
-                if i >= max(1, limit):
-                    break
-                rows.append({k: (row.get(k) or "") for k in headers})
-        return JSONResponse({"ok": True, "headers": headers, "rows": rows})
+        if target.exists():
+            with open(target, "r", encoding="utf-8-sig", newline="") as f:
+                headers, rows = _read_csv_preview(f, limit)
+        else:
+            # Remote-only file: the stored preview column is enough for small limits
+            preview = _supabase_csv_preview(name) if limit <= CSV_PREVIEW_ROWS else None
+            if preview is not None:
+                headers, rows = _read_csv_preview(io.StringIO(preview, newline=""), limit)
+                source = "remote_preview"
+            else:
+                downloaded = _download_csv_from_supabase(name, force=False)
+                if not downloaded or not downloaded.exists():
+                    raise HTTPException(status_code=404, detail="CSV not found")
+                with open(downloaded, "r", encoding="utf-8-sig", newline="") as f:
+                    headers, rows = _read_csv_preview(f, limit)
+                source = "remote"
+        return JSONResponse({"ok": True, "headers": headers, "rows": rows, "source": source})
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to read CSV")
 
@@ -751,6 +1772,53 @@ async def api_csv_download(name: str):
     return FileResponse(str(target), media_type="text/csv", filename=name)
 
 
+@app.get("/api/export")
+async def api_export(name: Optional[str] = None, format: str = "csv", per: str = "lead",
+                     campaign: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                     include_uncalled: bool = True):
+    """Stream a lead list joined with its call attempts as CSV or JSONL.
+
+    ``name`` defaults to the active CSV. ``campaign``, ``since`` and ``until`` filter
+    the attempts (by start time); leads without a matching attempt are kept unless
+    ``include_uncalled`` is false.
+    """
+    if format not in lead_export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'jsonl'")
+    if per not in lead_export.PER:
+        raise HTTPException(status_code=400, detail="per must be 'lead' or 'attempt'")
+    try:
+        t_since = lead_export.parse_time(since)
+        t_until = lead_export.parse_time(until, end_of_day=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since/until must be epoch seconds or ISO dates")
+    if name:
+        target = _csv_local_path(name)
+        if not target.exists():
+            downloaded = _download_csv_from_supabase(name, force=False)
+            target = downloaded if downloaded else target
+    else:
+        target = Path(_leads_csv()).resolve()
+    if not target.exists():
+        raise HTTPException(status_code=404, detail="CSV not found")
+
+    # Calls store the list path as it was configured; match every spelling of this file
+    aliases = _leads_csv_aliases(target)
+    campaign_key = (campaign or "").strip() or None
+
+    def _generate():
+        with open(target, "r", encoding="utf-8-sig", newline="") as f:
+            calls = controller_state.iter_calls_by_lead(aliases, campaign=campaign_key, since=t_since, until=t_until)
+            yield from lead_export.iter_export(f, calls, fmt=format, per=per, include_uncalled=include_uncalled)
+
+    stem = target.stem + ("-attempts" if per == "attempt" else "-results")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{stem}.{format}"'},
+    )
+
+
 # -----------------------------
 # Campaigns Management API
 # -----------------------------
@@ -776,7 +1844,7 @@ async def api_campaigns_create(name: str = Form(...), agent_text: str = Form("")
     name = (name or "").strip()
     if not name:
         raise HTTPException(status_code=400, detail="Name required")
-    items = _load_campaigns_store()
+    items = _local_campaigns_store()
     # If a module was provided, prefer it; else derive from name
     provided = (module or "").strip()
     slug = _slugify(provided if provided else name)
@@ -788,31 +1856,21 @@ async def api_campaigns_create(name: str = Form(...), agent_text: str = Form("")
         slug = f"{base_slug}-{i}"; i += 1
     # write module file locally
     _generate_prompt_module(slug, agent_text or "", session_text or "")
-    # try supabase first
-    client = _supabase_client()
-    supabase_error = None
-    if client:
-        try:
-            client.table("campaigns").insert({
-                "name": name,
-                "module": slug,
-                "agent_text": agent_text or "",
-                "session_text": session_text or "",
-            }).execute()
-        except Exception as e:
-            supabase_error = str(e)
-            logger.exception("Failed to insert campaign '%s' into Supabase", slug)
-
-    # always update local store as mirror
     items.append({"name": name, "module": slug})
     _save_campaigns_store(items)
-    return JSONResponse({"ok": True, "name": name, "module": slug, "supabase_error": supabase_error})
+    sync = _journal_write("campaigns", "upsert", "module", {
+        "name": name,
+        "module": slug,
+        "agent_text": agent_text or "",
+        "session_text": session_text or "",
+    })
+    return JSONResponse({"ok": True, "name": name, "module": slug, "supabase_error": None, "sync": sync})
 
 
 @app.delete("/api/campaigns/{module}")
 async def api_campaigns_delete(module: str):
     module = (module or "").strip()
-    items = _load_campaigns_store()
+    items = _local_campaigns_store()
     found = None
     for it in items:
         if it.get("module") == module:
@@ -820,15 +1878,6 @@ async def api_campaigns_delete(module: str):
             break
     if not found:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    # remove from supabase first if available
-    client = _supabase_client()
-    supabase_error = None
-    if client:
-        try:
-            client.table("campaigns").delete().eq("module", module).execute()
-        except Exception as e:
-            supabase_error = str(e)
-            logger.exception("Failed to delete campaign '%s' from Supabase", module)
     # remove local file
     try:
         (CAMPAIGNS_DIR / f"{module}.py").unlink(missing_ok=True)
@@ -837,14 +1886,16 @@ async def api_campaigns_delete(module: str):
     # save store
     items = [it for it in items if it.get("module") != module]
     _save_campaigns_store(items)
-    return JSONResponse({"ok": True, "supabase_error": supabase_error})
+    sync = _journal_write("campaigns", "delete", "module", {"module": module})
+    return JSONResponse({"ok": True, "supabase_error": None, "sync": sync})
 
 
 # Additional Campaigns endpoints: get, update, upload prompts, seed supabase
 
 def _read_prompts_for_module(module: str) -> tuple[str, str]:
     """Import the prompt module and read constants. Falls back to empty strings on error."""
-    client = _supabase_client()
+    # An edit still waiting in the sync journal is newer than what Supabase has
+    client = None if module in SYNC_JOURNAL.pending_keys("campaigns") else _supabase_client()
     if client:
         try:
             resp = (
@@ -860,6 +1911,11 @@ def _read_prompts_for_module(module: str) -> tuple[str, str]:
                 return str(entry.get("agent_text") or ""), str(entry.get("session_text") or "")
         except Exception:
             pass
+    return _read_local_prompts(module)
+
+
+def _read_local_prompts(module: str) -> tuple[str, str]:
+    """Prompt constants from the local module file only (no Supabase round-trip)."""
     try:
         import importlib
         module_path = _normalize_prompt_module(module)
@@ -890,7 +1946,7 @@ async def api_campaigns_update(module: str = Form(...), name: str = Form(""), ag
     # Update local prompt file
     _generate_prompt_module(module, agent_text or "", session_text or "")
     # Update local store name
-    items = _load_campaigns_store()
+    items = _local_campaigns_store()
     found = False
     for it in items:
         if it.get("module") == module:
@@ -900,21 +1956,13 @@ async def api_campaigns_update(module: str = Form(...), name: str = Form(""), ag
     if not found:
         items.append({"name": name, "module": module})
     _save_campaigns_store(items)
-    # Upsert in Supabase if available
-    client = _supabase_client()
-    supabase_error = None
-    if client:
-        try:
-            client.table("campaigns").upsert({
-                "name": name,
-                "module": module,
-                "agent_text": agent_text or "",
-                "session_text": session_text or "",
-            }, on_conflict="module").execute()
-        except Exception as e:
-            supabase_error = str(e)
-            logger.exception("Failed to upsert campaign '%s' in Supabase", module)
-    return JSONResponse({"ok": True, "supabase_error": supabase_error})
+    sync = _journal_write("campaigns", "upsert", "module", {
+        "name": name,
+        "module": module,
+        "agent_text": agent_text or "",
+        "session_text": session_text or "",
+    })
+    return JSONResponse({"ok": True, "supabase_error": None, "sync": sync})
 
 
 @app.post("/api/campaigns/upload_prompts")
@@ -929,31 +1977,337 @@ async def api_campaigns_upload_prompts(which: str = Form(...), file: UploadFile
     return JSONResponse({"ok": True, "which": which, "text": content})
 
 
+SEED_CHUNK_SIZE = max(1, int(os.getenv("SUPABASE_SEED_CHUNK_SIZE", "100") or 100))
+SEED_CONCURRENCY = max(1, int(os.getenv("SUPABASE_SEED_CONCURRENCY", "4") or 4))
+IMPORT_MAX_BYTES = 10 * 1024 * 1024
+IMPORT_MAX_UNCOMPRESSED = 50 * 1024 * 1024
+
+
+async def _bulk_upsert_campaigns(client, rows: List[Dict[str, str]], chunk_size: int,
+                                 concurrency: int) -> Dict[str, Optional[str]]:
+    """Upsert ``rows`` in chunks, at most ``concurrency`` chunks in flight; returns module -> error."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results: Dict[str, Optional[str]] = {}
+
+    async def _send(chunk: List[Dict[str, str]]) -> None:
+        async with sem:
+            try:
+                await asyncio.to_thread(
+                    lambda: client.table("campaigns").upsert(chunk, on_conflict="module").execute()
+                )
+                error = None
+            except Exception as e:
+                logger.exception("Failed to upsert %d campaigns during Supabase seeding", len(chunk))
+                error = str(e)
+        for row in chunk:
+            results[row["module"]] = error
+
+    size = max(1, chunk_size)
+    await asyncio.gather(*(_send(rows[i:i + size]) for i in range(0, len(rows), size)))
+    return results
+
+
 @app.post("/api/campaigns/seed_supabase")
-async def api_campaigns_seed_supabase():
+async def api_campaigns_seed_supabase(chunk_size: int = SEED_CHUNK_SIZE, concurrency: int = SEED_CONCURRENCY):
+    """Push every local campaign to Supabase with chunked bulk upserts."""
     client = _supabase_client()
     if not client:
         raise HTTPException(status_code=400, detail="Supabase not configured")
-    items = _load_campaigns_store()
-    upserted = 0
-    errors: List[str] = []
-    for it in items:
+    rows: List[Dict[str, str]] = []
+    for it in _local_campaigns_store():
         module = it.get("module") or ""
-        name = it.get("name") or module
-        atext, stext = _read_prompts_for_module(module)
+        if not module:
+            continue
+        atext, stext = _read_local_prompts(module)
+        rows.append({"name": it.get("name") or module, "module": module, "agent_text": atext, "session_text": stext})
+    results = await _bulk_upsert_campaigns(client, rows, chunk_size, concurrency)
+    errors = [f"{module}: {err}" for module, err in results.items() if err]
+    return JSONResponse({
+        "ok": True,
+        "count": sum(1 for err in results.values() if not err),
+        "chunks": (len(rows) + max(1, chunk_size) - 1) // max(1, chunk_size),
+        "errors": errors,
+    })
+
+
+def _parse_campaign_import(filename: str, content: bytes) -> List[Dict[str, Any]]:
+    """Campaign records from a JSONL file or a zip of JSONL files and/or <module>/agent.txt + session.txt folders.
+
+    Each record keeps a ``source`` (file:line or folder) for the per-item report; records
+    that fail to parse carry an ``error`` instead of prompt text.
+    """
+    import io
+    import zipfile
+
+    def _jsonl(text: str, source: str) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for n, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                if not isinstance(obj, dict):
+                    raise ValueError("expected a JSON object")
+                out.append({**obj, "source": f"{source}:{n}"})
+            except ValueError as e:
+                out.append({"source": f"{source}:{n}", "error": f"invalid JSON: {e}"})
+        return out
+
+    if not filename.lower().endswith(".zip"):
+        return _jsonl(content.decode("utf-8-sig", errors="ignore"), filename)
+
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Not a valid zip file")
+    with zf:
+        infos = [i for i in zf.infolist() if not i.is_dir() and not i.filename.startswith("__MACOSX/")]
+        if sum(i.file_size for i in infos) > IMPORT_MAX_UNCOMPRESSED:
+            raise HTTPException(status_code=413, detail="Archive too large when extracted")
+        records: List[Dict[str, Any]] = []
+        folders: Dict[str, Dict[str, Any]] = {}
+        for info in infos:
+            path = info.filename.strip("/")
+            text = zf.read(info).decode("utf-8-sig", errors="ignore")
+            if path.lower().endswith(".jsonl"):
+                records.extend(_jsonl(text, path))
+                continue
+            folder, _, leaf = path.rpartition("/")
+            field = {"agent.txt": "agent_text", "session.txt": "session_text", "name.txt": "name"}.get(leaf.lower())
+            if folder and field:
+                module = folder.rsplit("/", 1)[-1]
+                entry = folders.setdefault(folder, {"module": module, "source": folder + "/"})
+                entry[field] = text.strip() if field == "name" else text
+        records.extend(folders.values())
+        return records
+
+
+@app.post("/api/campaigns/import")
+async def api_campaigns_import(file: UploadFile = File(...), overwrite: bool = Form(False)):
+    """Create or update many campaigns from one JSONL or zip upload; reports a result per item.
+
+    JSONL lines are ``{"name", "module"?, "agent_text", "session_text"}``. Without ``overwrite``
+    an existing module gets a fresh suffixed slug, like /api/campaigns/create.
+    """
+    if not file or not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    content = await file.read()
+    if len(content) > IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="File too large (max 10MB)")
+    records = _parse_campaign_import(file.filename, content)
+
+    items = _local_campaigns_store()
+    by_module = {it.get("module"): it for it in items}
+    results: List[Dict[str, Any]] = []
+    remote_rows: List[Dict[str, str]] = []
+    for rec in records:
+        source = rec.get("source")
+        if rec.get("error"):
+            results.append({"source": source, "status": "error", "error": rec["error"]})
+            continue
+        name = str(rec.get("name") or "").strip()
+        provided = str(rec.get("module") or "").strip()
+        if not (name or provided):
+            results.append({"source": source, "status": "error", "error": "name or module required"})
+            continue
+        agent_text = str(rec.get("agent_text") or "")
+        session_text = str(rec.get("session_text") or "")
+        slug = _slugify(provided or name)
+        name = name or slug
+        status = "created"
+        if slug in by_module:
+            if overwrite:
+                status = "updated"
+            else:
+                base_slug, i = slug, 1
+                while slug in by_module:
+                    slug = f"{base_slug}-{i}"; i += 1
         try:
-            client.table("campaigns").upsert({
-                "name": name,
-                "module": module,
-                "agent_text": atext,
-                "session_text": stext,
-            }, on_conflict="module").execute()
-            upserted += 1
+            _generate_prompt_module(slug, agent_text, session_text)
         except Exception as e:
-            errors.append(f"{module}: {e}")
-            logger.exception("Failed to upsert campaign '%s' during Supabase seeding", module)
+            results.append({"source": source, "module": slug, "status": "error", "error": str(e)})
             continue
-    return JSONResponse({"ok": True, "count": upserted, "errors": errors})
+        if status == "updated":
+            by_module[slug]["name"] = name
+        else:
+            entry = {"name": name, "module": slug}
+            items.append(entry)
+            by_module[slug] = entry
+        remote_rows.append({"name": name, "module": slug, "agent_text": agent_text, "session_text": session_text})
+        results.append({"source": source, "module": slug, "name": name, "status": status})
+
+    _save_campaigns_store(items)
+    # One journal append for the whole import; the syncer pushes it in batched upserts
+    sync = _journal_write_many("campaigns", "upsert", "module", remote_rows) if remote_rows else None
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return JSONResponse({"ok": True, "counts": counts, "sync": sync, "results": results})
+
+
+@app.get("/api/campaigns/prompt_stats")
+async def api_campaigns_prompt_stats(module: Optional[str] = None, lead_index: Optional[int] = None):
+    """Estimated prompt tokens per campaign and prompt mode, optionally for one rendered lead (1-based)."""
+    if module:
+        modules = [(module or "").strip()]
+    else:
+        modules = sorted({m for m, _, _ in _all_campaigns_map().values()})
+    lead = get_lead_by_index_1based(lead_index) if lead_index else None
+    stats = []
+    for m in modules:
+        atext, stext = _read_prompts_for_module(m)
+        stats.append({
+            "module": m,
+            "prompt_mode": normalize_prompt_mode(_campaign_setting(m, "prompt_mode")),
+            "tokens": prompt_report(atext, stext, lead),
+        })
+    return JSONResponse({"ok": True, "lead_index": lead_index if lead else None, "campaigns": stats})
+
+
+@app.get("/api/campaigns/retry_policy")
+async def api_campaigns_retry_policy(module: str):
+    """Effective redial policy of a campaign and the retry delays it produces per outcome."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    overrides = _campaign_setting(module, "retry_policy")
+    try:
+        policy = RetryPolicy.from_dict(overrides)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=500, detail=f"Stored retry policy is invalid: {exc}")
+    return JSONResponse({"ok": True, "module": module, "overrides": overrides, "policy": policy.to_dict(),
+                         "schedule_s": {o: policy.schedule(o) for o in policy.rules}})
+
+
+@app.post("/api/campaigns/retry_policy")
+async def api_campaigns_set_retry_policy(module: str = Form(...), policy: str = Form("")):
+    """Store redial overrides for a campaign (JSON, merged over the default policy); empty resets it."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    try:
+        overrides = json.loads(policy) if policy.strip() else None
+        effective = RetryPolicy.from_dict(overrides)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid retry policy: {exc}")
+    _set_campaign_setting(module, "retry_policy", overrides)
+    return JSONResponse({"ok": True, "module": module, "policy": effective.to_dict()})
+
+
+@app.get("/api/pacing")
+async def api_pacing(campaign: Optional[str] = None):
+    """Pacing mode, rolling estimates and the current dial recommendation for a campaign (default: selected)."""
+    campaign = campaign if campaign is not None else _selected_campaign()
+    plan = _pacing_plan(campaign, time.time())
+    return JSONResponse({
+        "ok": True,
+        "campaign": campaign,
+        "config": plan["config"]._asdict(),
+        "estimates": plan["stats"].to_dict(),
+        "active": plan["active"],
+        "expected_live": round(plan["expected_live"], 2),
+        "dials_now": plan["dials"],
+        "predicted_abandon_rate": round(plan["predicted_abandon_rate"], 4),
+        "max_concurrent_calls": MAX_CONCURRENT_CALLS,
+    })
+
+
+@app.post("/api/campaigns/pacing")
+async def api_campaigns_pacing(module: str = Form(...), pacing_json: str = Form("", alias="pacing")):
+    """Store pacing settings for a campaign (JSON, see backend/pacing.py); empty resets to fixed pacing."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    try:
+        data = json.loads(pacing_json) if pacing_json.strip() else None
+        cfg = pacing.PacingConfig.from_dict(data)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid pacing settings: {exc}")
+    _set_campaign_setting(module, "pacing", data)
+    _PACING_STATS.clear()
+    return JSONResponse({"ok": True, "module": module, "pacing": cfg._asdict()})
+
+
+@app.get("/api/campaigns/amd")
+async def api_campaigns_amd(module: str):
+    """Answering-machine detection settings a campaign's console calls run with."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    return JSONResponse({"ok": True, "module": module, "overrides": _campaign_setting(module, "amd"),
+                         "amd": _amd_config(module)._asdict()})
+
+
+@app.post("/api/campaigns/amd")
+async def api_campaigns_set_amd(module: str = Form(...), amd_json: str = Form("", alias="amd")):
+    """Store AMD settings for a campaign (JSON, see backend/amd.py); empty resets to the defaults."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    try:
+        data = json.loads(amd_json) if amd_json.strip() else None
+        cfg = AMDConfig.from_dict(data)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid AMD settings: {exc}")
+    _set_campaign_setting(module, "amd", data)
+    return JSONResponse({"ok": True, "module": module, "amd": cfg._asdict()})
+
+
+@app.get("/api/campaigns/limits")
+async def api_campaigns_limits(module: str):
+    """Silence timeout and maximum duration a campaign's calls run with."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    return JSONResponse({"ok": True, "module": module, "overrides": _campaign_setting(module, "limits"),
+                         "limits": _call_limits(module)._asdict()})
+
+
+@app.post("/api/campaigns/limits")
+async def api_campaigns_set_limits(module: str = Form(...), limits_json: str = Form("", alias="limits")):
+    """Store call limits for a campaign (JSON, see backend/call_limits.py); empty resets to the defaults."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    try:
+        data = json.loads(limits_json) if limits_json.strip() else None
+        limits = CallLimits.from_dict(data)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid call limits: {exc}")
+    _set_campaign_setting(module, "limits", data)
+    return JSONResponse({"ok": True, "module": module, "limits": limits._asdict()})
+
+
+@app.get("/api/campaigns/lead_scoring")
+async def api_campaigns_lead_scoring(module: str):
+    """Whether a campaign dials fresh leads by connect likelihood instead of list order."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    return JSONResponse({"ok": True, "module": module, "lead_scoring": bool(_campaign_setting(module, "lead_scoring")),
+                         "active": _orders_by_score(module)})
+
+
+@app.post("/api/campaigns/lead_scoring")
+async def api_campaigns_set_lead_scoring(module: str = Form(...), enabled: bool = Form(...)):
+    """Opt a campaign into (or out of) dialing fresh leads by connect likelihood (applies to the next claim)."""
+    module = (module or "").strip()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    _set_campaign_setting(module, "lead_scoring", enabled)
+    return JSONResponse({"ok": True, "module": module, "lead_scoring": enabled, "active": _orders_by_score(module)})
+
+
+@app.post("/api/campaigns/prompt_mode")
+async def api_campaigns_prompt_mode(module: str = Form(...), mode: str = Form(...)):
+    module = (module or "").strip()
+    mode = (mode or "").strip().lower()
+    if not module:
+        raise HTTPException(status_code=400, detail="Module required")
+    if mode not in PROMPT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(PROMPT_MODES)}")
+    _set_campaign_setting(module, "prompt_mode", mode)
+    return JSONResponse({"ok": True, "module": module, "prompt_mode": mode})
 
 
 @app.get("/api/campaigns/module_file")
@@ -973,7 +2327,6 @@ async def api_campaigns_module_file(module: str):
 
 @app.post("/api/select_campaign")
 async def api_select_campaign(campaign: Optional[str] = Form(None)):
-    global SELECTED_CAMPAIGN
     # validate against built-in + dynamic
     valid = set(CAMPAIGNS.keys())
     try:
@@ -982,83 +2335,324 @@ async def api_select_campaign(campaign: Optional[str] = Form(None)):
         pass
     if campaign and campaign not in valid:
         raise HTTPException(status_code=400, detail="Unknown campaign")
-    SELECTED_CAMPAIGN = campaign
+    controller_state.set_setting("selected_campaign", campaign)
     label = _campaign_display_name(campaign) if campaign else None
     return JSONResponse({"ok": True, "campaign": campaign, "campaign_label": label})
 
 
+def _console_status() -> Dict[str, Any]:
+    """Status of the console dialer as seen by every worker."""
+    active = controller_state.active_calls("console")
+    latest = controller_state.latest_call("console")
+    if not active:
+        status = "idle"
+    elif all(c["status"] == "stopping" for c in active):
+        status = "stopping"
+    else:
+        status = "running"
+    return {
+        "status": status,
+        "running": bool(active),
+        "lead_index": latest["lead_index"] if latest else None,
+        "calls": [_call_view(c) for c in active],
+    }
+
+
 @app.post("/api/start_call")
 async def api_start_call(lead_global_index: int = Form(...), campaign: Optional[str] = Form(None)):
     # Prefer explicit campaign from form; otherwise use last selected
-    effective_campaign = campaign if campaign is not None else SELECTED_CAMPAIGN
+    effective_campaign = campaign if campaign is not None else _selected_campaign()
     idx1 = lead_global_index + 1
-    spawn_call(idx1, effective_campaign)
+    _reap_calls()
+    call_id = spawn_call(idx1, effective_campaign)
+    status = _console_status()
     return JSONResponse({
         "ok": True,
-        "status": CURRENT_STATUS,
-        "lead_index": CURRENT_LEAD_INDEX,
+        "status": status["status"],
+        "lead_index": status["lead_index"],
+        "call_id": call_id,
         "campaign": effective_campaign,
         "campaign_label": _campaign_display_name(effective_campaign) if effective_campaign else None,
     })
 
 
 @app.post("/api/end_call")
-async def api_end_call(auto_next: bool = Form(True)):
-    """End current call; optionally start the next call automatically."""
-    global CURRENT_LEAD_INDEX
-    prev = CURRENT_LEAD_INDEX
-    had_proc = _end_current_call()
+async def api_end_call(auto_next: bool = Form(True), call_id: Optional[str] = Form(None)):
+    """End current call (or ``call_id``); optionally start the next call automatically."""
+    prev = _console_status()["lead_index"]
+    stopped, had_proc = _end_current_call(call_id)
     # Wait briefly for process to exit
-    time.sleep(0.4)
-    _cleanup_if_exited()
+    await asyncio.sleep(0.4)
+    # The explicit auto_next below replaces the watcher's, so a lead isn't dialed twice
+    _reap_calls(auto_next=not auto_next)
     started_next = False
-    if auto_next and prev is not None:
-        next_idx = prev + 1
-        spawn_call(next_idx, SELECTED_CAMPAIGN)
-        started_next = True
+    selected = _selected_campaign()
+    # The watcher may have reaped the stopped call during the sleep and started its follow-up already
+    if auto_next and prev is not None and (stopped is None or controller_state.claim_next(stopped)):
+        started_next = spawn_call(None, selected, after=prev) is not None
+        if not started_next and stopped is not None:
+            controller_state.release_next(stopped)  # e.g. the stopped call still holds the only slot
+    status = _console_status()
     return JSONResponse({
         "ok": True,
         "had_proc": had_proc,
-        "status": CURRENT_STATUS,
-        "lead_index": CURRENT_LEAD_INDEX,
+        "status": status["status"],
+        "lead_index": status["lead_index"],
         "auto_next_started": started_next,
-        "campaign": SELECTED_CAMPAIGN,
-        "campaign_label": _campaign_display_name(SELECTED_CAMPAIGN) if SELECTED_CAMPAIGN else None,
+        "campaign": selected,
+        "campaign_label": _campaign_display_name(selected) if selected else None,
     })
 
 
 @app.get("/api/status")
 async def api_status():
-    _cleanup_if_exited()
-    running = CURRENT_PROC is not None and CURRENT_PROC.poll() is None
-    lead_details = get_lead_by_index_1based(CURRENT_LEAD_INDEX) if CURRENT_LEAD_INDEX else None
-    return JSONResponse({
-        "status": CURRENT_STATUS,
-        "running": running,
-        "lead_index": CURRENT_LEAD_INDEX,
-        "campaign": SELECTED_CAMPAIGN,
-        "campaign_label": _campaign_display_name(SELECTED_CAMPAIGN) if SELECTED_CAMPAIGN else None,
-        "auto_next": AUTO_NEXT,
+    _reap_calls()
+    status = _console_status()
+    lead_index = status["lead_index"]
+    lead_details = get_lead_by_index_1based(lead_index) if lead_index else None
+    selected = _selected_campaign()
+    status.update({
+        "campaign": selected,
+        "campaign_label": _campaign_display_name(selected) if selected else None,
+        "auto_next": _auto_next(),
+        "max_concurrent_calls": MAX_CONCURRENT_CALLS,
         "lead": lead_details or {},
     })
+    return JSONResponse(status)
 
 
 @app.post("/api/auto_next")
 async def api_auto_next(enabled: bool = Form(...)):
-    global AUTO_NEXT
-    AUTO_NEXT = bool(str(enabled).lower() in ["1", "true", "yes", "on"])
-    return JSONResponse({"ok": True, "auto_next": AUTO_NEXT})
+    value = bool(str(enabled).lower() in ["1", "true", "yes", "on"])
+    controller_state.set_setting("auto_next", value)
+    return JSONResponse({"ok": True, "auto_next": value})
+
+
+@app.get("/api/metrics")
+async def api_metrics():
+    """Controller throughput, call-gap latency and event-loop lag.
+
+    Call counts come from the shared store; requests, call gaps and loop lag
+    are for the worker that answered (``worker.pid``).
+    """
+    counts = controller_state.count_calls("console")
+    active = sum(counts.get(s, 0) for s in controller_state.ACTIVE_STATUSES)
+    with _metrics_lock:
+        uptime = max(1e-9, time.time() - METRICS["started_at"])
+        requests = dict(METRICS["requests"])
+        gaps = list(_CALL_GAPS)
+        payload = {
+            "ok": True,
+            "uptime_s": round(uptime, 3),
+            "agent_module": AGENT_MODULE,
+            "calls_started": sum(counts.values()),
+            "calls_ended": sum(counts.values()) - active,
+            "calls_active": active,
+            "last_exit_code": METRICS["last_exit_code"],
+            "worker": {
+                "pid": os.getpid(),
+                "calls_started": METRICS["calls_started"],
+                "calls_ended": METRICS["calls_ended"],
+                "calls_suppressed": METRICS["calls_suppressed"],
+                "budget_warnings": METRICS["budget_warnings"],
+            },
+        }
+    total = sum(requests.values())
+    payload.update({
+        "requests_total": total,
+        "requests_per_s": round(total / uptime, 2),
+        "requests": requests,
+        "call_gap": _percentiles(gaps),
+        "loop_lag": _percentiles(list(_LOOP_LAG)),
+        "agent_usage": _usage_summary(controller_state.recent_usage(200)),
+    })
+    return JSONResponse(payload)
+
+
+@app.get("/api/usage")
+async def api_usage(limit: int = 200, kind: str = "console"):
+    """Resource use per agent call: live calls, the latest finished ones and the cost model over them."""
+    rows = controller_state.recent_usage(max(1, min(limit, 5000)), kind)
+    return JSONResponse({
+        "ok": True,
+        "available": proc_usage.AVAILABLE,
+        "interval_s": CALL_USAGE_INTERVAL,
+        "budgets": {k: v for k, v in CALL_BUDGETS.items() if v},
+        "summary": _usage_summary(rows),
+        "active": [{"id": c["id"], "usage": _call_view(c)["usage"]} for c in controller_state.active_calls(kind)],
+        "calls": rows,
+    })
+
+
+@app.get("/api/calls/{call_id}/transcript")
+async def api_call_transcript(call_id: str, since: float = 0.0):
+    """What was said on a call (CALL_TRANSCRIPTS=1), oldest first; ``since`` skips records up to that timestamp."""
+    if not transcripts.safe_call_id(call_id):
+        raise HTTPException(status_code=400, detail="Invalid call id")
+    records = transcripts.read_transcript(transcripts.transcript_dir(), call_id)
+    if records is None:
+        raise HTTPException(status_code=404, detail="No transcript for this call")
+    call = controller_state.get_call(call_id)
+    return JSONResponse({
+        "ok": True,
+        "call": _call_view(call) if call else None,
+        "extraction": json.loads(call["extraction"]) if call and call.get("extraction") else None,
+        "complete": any(r.get("event") == "end" for r in records),
+        "records": [r for r in records if (r.get("ts") or 0) > since],
+    })
+
+
+@app.get("/api/outcomes")
+async def api_outcomes(hours: float = 24.0, campaign: Optional[str] = None):
+    """What extracted calls achieved: results, objections, email corrections and callback requests."""
+    rows = controller_state.outcome_counts(time.time() - hours * 3600 if hours > 0 else 0.0, campaign)
+    results: Dict[str, int] = {}
+    objections: Dict[str, int] = {}
+    emails = {"confirmed": 0, "corrected": 0}
+    callbacks = 0
+    for row in rows:
+        results[row["result"] or "no_transcript"] = results.get(row["result"] or "no_transcript", 0) + 1
+        found = json.loads(row["extraction"]) if row["extraction"] else {}
+        for name in found.get("objections") or []:
+            objections[name] = objections.get(name, 0) + 1
+        email = found.get("email") or {}
+        emails["confirmed"] += bool(email.get("confirmed"))
+        emails["corrected"] += bool(email.get("corrected_to"))
+        callbacks += bool(found.get("callback"))
+    return JSONResponse({
+        "ok": True,
+        "rules": call_outcomes.RULES_VERSION,
+        "calls": len(rows),
+        "results": dict(sorted(results.items())),
+        "objections": dict(sorted(objections.items(), key=lambda kv: -kv[1])),
+        "emails": emails,
+        "callbacks": callbacks,
+    })
+
+
+@app.get("/api/calls/{call_id}/recording")
+async def api_call_recording(call_id: str, info: bool = False):
+    """A call's audio file (CALL_RECORDINGS=1), or with ``info`` its duration, format and overruns."""
+    if not transcripts.safe_call_id(call_id):
+        raise HTTPException(status_code=400, detail="Invalid call id")
+    directory = recording.recording_dir()
+    path = recording.find_recording(directory, call_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No recording for this call")
+    stats = recording.read_info(directory, call_id)
+    if info:
+        return JSONResponse({"ok": True, "complete": stats is not None, "recording": stats})
+    if stats is None:
+        raise HTTPException(status_code=409, detail="Call is still being recorded")
+    media = {"ogg": "audio/ogg", "mp3": "audio/mpeg", "wav": "audio/wav"}[path.suffix[1:]]
+    return FileResponse(str(path), media_type=media, filename=path.name)
 
 
 @app.post("/api/stop_all")
 async def api_stop_all():
     """Disable auto-next and end any running call (end whole session)."""
-    global AUTO_NEXT
-    AUTO_NEXT = False
-    _end_current_call()
-    time.sleep(0.4)
-    _cleanup_if_exited()
-    return JSONResponse({"ok": True, "status": CURRENT_STATUS, "auto_next": AUTO_NEXT})
+    controller_state.set_setting("auto_next", False)
+    _reap_calls(auto_next=False)
+    for call in controller_state.active_calls("console"):
+        _request_stop(call["id"])
+    await asyncio.sleep(0.4)
+    _reap_calls(auto_next=False)
+    return JSONResponse({"ok": True, "status": _console_status()["status"], "auto_next": False})
+
+
+@app.get("/api/lead_queue")
+async def api_lead_queue():
+    """Lead-queue counts for the active lead list (pending, leased, expired, retry, done) and its invalid leads."""
+    name = _lead_queue_name()
+    queue = open_queue()
+    queue.sync_size(name, len(read_leads(_leads_csv())))
+    return JSONResponse({"ok": True, "queue": name, "backend": type(queue).__name__, "stats": queue.stats(name),
+                         "next_retry_at": queue.next_retry_at(name), "invalid": controller_state.invalid_leads(name)})
+
+
+@app.post("/api/lead_queue/requeue")
+async def api_lead_queue_requeue():
+    """Make every lead of the active list dialable again; leads on a live call keep their lease."""
+    name = _lead_queue_name()
+    queue = open_queue()
+    changed = queue.requeue(name)
+    return JSONResponse({"ok": True, "queue": name, "requeued": changed, "stats": queue.stats(name)})
+
+
+@app.get("/api/lead_scores")
+async def api_lead_scores(limit: int = 20, lead: Optional[int] = None):
+    """Active list ranked by connect likelihood right now, or the counters behind one lead's score."""
+    now = time.time()
+    with _score_lock:
+        groups = _score_groups()
+        model = _score_model()
+        body: Dict[str, Any] = {"ok": True, "enabled": LEAD_SCORING,
+                                "ordering": _orders_by_score(_campaign_module(_selected_campaign())),
+                                "queue": groups["queue"], "calls": model.calls}
+        if lead is not None:
+            if not 1 <= lead <= len(groups["leads"]):
+                raise HTTPException(status_code=404, detail="Lead not found")
+            row = groups["leads"][lead - 1]
+            body["lead"] = {"lead_index": lead, "prospect_name": row["prospect_name"], **model.explain(row, now)}
+            return JSONResponse(body)
+        combos = list(groups["combos"])
+        scores = model.score_many([dict(zip(SCORE_FEATURES, c)) for c in combos], now)
+    top: List[Dict[str, Any]] = []
+    for score, combo in sorted(zip(scores, combos), key=lambda sc: -sc[0]):
+        for i in groups["combos"][combo]:
+            if len(top) >= max(0, limit):
+                break
+            row = groups["leads"][i - 1]
+            top.append({"lead_index": i, "prospect_name": row["prospect_name"], "company_name": row["company_name"],
+                        "job_title": row["job_title"], "timezone": row["timezone"], "score": round(score, 4)})
+    body["top"] = top
+    return JSONResponse(body)
+
+
+@app.get("/api/suppression")
+async def api_suppression():
+    """Do-not-call index size and the recent-dial cooldown."""
+    return JSONResponse({
+        "ok": True,
+        "index": SUPPRESSION.stats(),
+        "called_within_hours": SUPPRESSION_CALLED_WITHIN / 3600,
+        "recent_numbers": len(_RECENT_DIALS),
+    })
+
+
+@app.post("/api/suppression/add")
+async def api_suppression_add(numbers: str = Form(""), country: str = Form("")):
+    """Add numbers (separated by newlines, commas or semicolons) to the do-not-call index.
+
+    ``country`` is the calling code for national-format numbers (e.g. 44 for 020 ...).
+    """
+    items = [n for n in numbers.replace(",", "\n").replace(";", "\n").splitlines() if n.strip()]
+    valid = [k for k in (normalize_number(n, country or None) for n in items) if k is not None]
+    added = await asyncio.to_thread(SUPPRESSION.add_many, valid)
+    return JSONResponse({"ok": True, "added": added, "invalid": len(items) - len(valid), "count": SUPPRESSION.count})
+
+
+@app.get("/api/suppression/check")
+async def api_suppression_check(phone: str, explicit: bool = False, timezone: str = "", country: str = ""):
+    country = country or country_for_timezone(timezone) or ""
+    normalized = normalize_number(phone, country or None)
+    return JSONResponse({"ok": True, "phone": phone, "normalized": normalized, "checkable": normalized is not None,
+                         "reason": _suppression_reason(phone, explicit=explicit, country=country or None)})
+
+
+@app.get("/api/sync/status")
+async def api_sync_status():
+    """Campaign/CSV writes still waiting to reach Supabase."""
+    return JSONResponse({"ok": True, "remote_configured": bool(_SUPABASE_URL and _SUPABASE_SERVICE_ROLE_KEY),
+                         **SYNC_JOURNAL.status()})
+
+
+@app.post("/api/sync/flush")
+async def api_sync_flush():
+    """Replay the sync journal now instead of waiting for the next syncer tick or backoff."""
+    SYNC_JOURNAL.flush()
+    result = await asyncio.to_thread(SYNC_JOURNAL.sync_once, _supabase_client)
+    return JSONResponse({"ok": not result.get("error"), **result, **SYNC_JOURNAL.status()})
 
 
 # Start watcher thread once
@@ -1067,6 +2661,7 @@ def _ensure_watcher_started():
     if not _WATCHER_STARTED:
         t = Thread(target=_watcher_loop, daemon=True)
         t.start()
+        SYNC_JOURNAL.start(_supabase_client)
         _WATCHER_STARTED = True
 
 
@@ -1126,17 +2721,48 @@ async def start_browser_call(
     background_tasks: BackgroundTasks,
     lead_global_index: int = Form(...),
     campaign: Optional[str] = Form(None),
+    room: Optional[str] = Form(None),
 ):
-    # Create a simple deterministic room name by index (you may swap for UUID)
-    room_name = f"room-{lead_global_index+1}"
-    background_tasks.add_task(spawn_agent_connect_room, room_name, campaign)
-    return RedirectResponse(url=f"/browser/call?room={room_name}{'&campaign='+campaign if campaign else ''}", status_code=303)
+    # Reuse the agent already serving `room` if there is one; otherwise a fresh uniquely-named room
+    sess, created = _open_browser_session(lead_global_index + 1, campaign, (room or "").strip() or None)
+    if created:
+        background_tasks.add_task(spawn_agent_connect_room, sess["room"], campaign, lead_global_index + 1, sess["id"])
+    url = f"/browser/call?room={sess['room']}&session={sess['id']}"
+    if campaign:
+        url += f"&campaign={campaign}"
+    return RedirectResponse(url=url, status_code=303)
+
+
+@app.get("/api/browser/sessions")
+async def api_browser_sessions():
+    calls = controller_state.list_calls("browser", since=time.time() - BROWSER_SESSION_RETENTION)
+    items = [_call_view(c) for c in calls]
+    return JSONResponse({"ok": True, "sessions": items, "idle_timeout": BROWSER_IDLE_TIMEOUT})
+
+
+@app.post("/api/browser/{session_id}/heartbeat")
+async def api_browser_heartbeat(session_id: str):
+    if not controller_state.touch(call_id=session_id):
+        raise HTTPException(status_code=404, detail="Session not found or ended")
+    return JSONResponse({"ok": True})
+
+
+@app.post("/api/browser/{session_id}/end")
+async def api_browser_end(session_id: str):
+    call = controller_state.get_call(session_id)
+    if call is None or call["kind"] != "browser":
+        raise HTTPException(status_code=404, detail="Session not found")
+    ended = call["status"] in ("starting", "running")
+    if ended:
+        _request_stop(session_id)
+    return JSONResponse({"ok": True, "ended": ended, "session": _call_view(controller_state.get_call(session_id))})
 
 
 @app.get("/browser/call", response_class=HTMLResponse)
-async def browser_call(request: Request, room: str, campaign: Optional[str] = None):
+async def browser_call(request: Request, room: str, campaign: Optional[str] = None, session: Optional[str] = None):
     if not LIVEKIT_URL:
         raise HTTPException(status_code=500, detail="LIVEKIT_URL not configured")
+    controller_state.touch(room=room)
     return templates.TemplateResponse(
         "browser_call.html",
         {
@@ -1144,6 +2770,7 @@ async def browser_call(request: Request, room: str, campaign: Optional[str] = No
             "room": room,
             "livekit_url": LIVEKIT_URL,
             "campaign": campaign or "",
+            "session": session or "",
         },
     )
 
@@ -1152,6 +2779,7 @@ async def browser_call(request: Request, room: str, campaign: Optional[str] = No
 async def issue_token(room: str, identity: str):
     if not (LIVEKIT_API_KEY and LIVEKIT_API_SECRET and LIVEKIT_URL):
         raise HTTPException(status_code=500, detail="LiveKit credentials not configured")
+    controller_state.touch(room=room)
     now = int(time.time())
     payload = {
         "iss": LIVEKIT_API_KEY,
@@ -1174,7 +2802,7 @@ async def issue_token(room: str, identity: str):
 @app.get("/api/leads")
 async def api_get_leads(page: int = 1):
     """New endpoint to serve leads data as JSON for React frontend"""
-    leads = read_leads(LEADS_CSV)
+    leads = read_leads(_leads_csv())
     total = len(leads)
     total_pages = max(1, math.ceil(total / PAGE_SIZE))
     page = max(1, min(page, total_pages))
@@ -0,0 +1,91 @@
+"""CPU, memory and file-descriptor use of agent processes, read from /proc (Linux).
+
+An agent child may fork helpers (e.g. the LiveKit inference process), so a
+call's usage is summed over the child's whole process tree: resident memory
+(shared pages count once per process, so this overstates a little), CPU
+seconds including reaped descendants, and open descriptors. On systems
+without /proc, ``AVAILABLE`` is False and sampling returns None.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+AVAILABLE = os.path.isdir("/proc/self/fd")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024 * 1024)
+
+
+class Usage(NamedTuple):
+    rss_mb: float
+    cpu_s: float
+    fds: int
+    procs: int
+
+
+def _stat(pid: int) -> Optional[tuple]:
+    """(ppid, cpu ticks with reaped children, rss pages) from /proc/<pid>/stat."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses; fields resume after the last ')'
+    fields = raw[raw.rfind(b")") + 2:].split()
+    return int(fields[1]), sum(int(x) for x in fields[11:15]), int(fields[21])
+
+
+def _children(pid: int, ppids: Optional[Dict[int, List[int]]]) -> List[int]:
+    if ppids is not None:
+        return ppids.get(pid, [])
+    kids: List[int] = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                kids.extend(int(x) for x in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def _ppid_map() -> Dict[int, List[int]]:
+    """Children of every process, for kernels without /proc/<pid>/task/<tid>/children."""
+    out: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            st = _stat(int(name))
+            if st is not None:
+                out.setdefault(st[0], []).append(int(name))
+    return out
+
+
+_HAS_CHILDREN_FILE = os.path.exists(f"/proc/self/task/{os.getpid()}/children")
+
+
+def sample(pid: int) -> Optional[Usage]:
+    """Usage of ``pid`` and its descendants right now; None if it is gone or /proc is unavailable."""
+    if not AVAILABLE:
+        return None
+    ppids = None if _HAS_CHILDREN_FILE else _ppid_map()
+    rss = ticks = fds = procs = 0
+    todo, seen = [pid], set()
+    while todo:
+        p = todo.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        st = _stat(p)
+        if st is None:
+            continue
+        procs += 1
+        ticks += st[1]
+        rss += st[2]
+        try:
+            fds += len(os.listdir(f"/proc/{p}/fd"))
+        except OSError:
+            pass
+        todo.extend(_children(p, ppids))
+    if not procs:
+        return None
+    return Usage(rss_mb=round(rss * _PAGE_MB, 1), cpu_s=round(ticks / _CLK_TCK, 2), fds=fds, procs=procs)
@@ -0,0 +1,586 @@
+"""Controller state shared by every web worker process.
+
+The selected campaign, auto-next flag, active CSV and the calls themselves
+live in a local SQLite database (WAL mode) instead of module globals, so
+``uvicorn --workers N`` gives the same answer whichever worker handles a
+request. Each call row records the worker that spawned it (``owner_pid``);
+only that worker holds the Popen handle, but any worker can signal the
+child by pid and reap calls whose owner has gone away.
+
+Path: CONTROLLER_DB (default backend/controller.db).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DB_PATH = Path(os.getenv("CONTROLLER_DB", str(Path(__file__).resolve().parents[1] / "controller.db"))).resolve()
+
+ACTIVE_STATUSES = ("starting", "running", "stopping")
+
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,              -- console | browser
+    lead_index INTEGER,              -- 1-based
+    campaign TEXT,
+    room TEXT,
+    leads_csv TEXT,
+    pid INTEGER,
+    owner_pid INTEGER NOT NULL,
+    status TEXT NOT NULL,            -- starting | running | stopping | ended | failed
+    started_at REAL NOT NULL,
+    last_activity REAL NOT NULL,
+    stop_requested_at REAL,
+    ended_at REAL,
+    exit_code INTEGER,
+    end_reason TEXT,
+    lead_queue TEXT,                 -- lease held on backend/lead_queue.py for this call
+    lease_token TEXT,
+    lead_key TEXT,                   -- stable lead identity (backend/app/lead_diff.py)
+    phone INTEGER,                   -- normalized number dialed (backend/suppression.py)
+    attempt INTEGER,                 -- nth dial of this lead according to the lead queue
+    outcome TEXT,                    -- classified result (backend/retry_policy.py)
+    peak_rss_mb REAL,                -- agent process tree, sampled from /proc (backend/app/proc_usage.py)
+    cpu_s REAL,
+    peak_fds INTEGER,
+    over_budget TEXT,                -- comma-separated resources that went over their budget
+    result TEXT,                     -- what the conversation achieved (backend/call_outcomes.py)
+    extraction TEXT,                 -- JSON: result, email, callback, objections
+    extracted_version INTEGER,       -- RULES_VERSION that produced it; NULL = not extracted yet
+    next_claimed INTEGER             -- 1 once someone started (or took charge of) the call after this one
+);
+CREATE INDEX IF NOT EXISTS calls_status ON calls(kind, status);
+CREATE INDEX IF NOT EXISTS calls_started ON calls(kind, started_at);
+CREATE INDEX IF NOT EXISTS calls_lead ON calls(leads_csv, lead_index, started_at);
+CREATE INDEX IF NOT EXISTS calls_campaign ON calls(kind, campaign, ended_at);
+CREATE INDEX IF NOT EXISTS calls_ended ON calls(kind, ended_at);
+CREATE TABLE IF NOT EXISTS lead_index (
+    list TEXT NOT NULL,              -- lead list name (CSV file name)
+    lead_key TEXT NOT NULL,
+    lead_index INTEGER NOT NULL,     -- 1-based position in the current version of the list
+    row_hash TEXT NOT NULL,
+    problems TEXT,                   -- JSON list of validation problems, NULL if valid
+    PRIMARY KEY (list, lead_key)
+);
+CREATE INDEX IF NOT EXISTS lead_index_pos ON lead_index(list, lead_index);
+CREATE TABLE IF NOT EXISTS score_counts (
+    feature TEXT NOT NULL,           -- lead attribute, or '*' for the per-hour base (backend/lead_scoring.py)
+    value TEXT NOT NULL,
+    hour INTEGER NOT NULL,           -- lead's local hour at dial time
+    attempts INTEGER NOT NULL DEFAULT 0,
+    connects INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (feature, value, hour)
+);
+"""
+
+
+def _conn() -> sqlite3.Connection:
+    """Per-thread connection in autocommit mode; transactions are opened explicitly."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(DB_PATH), timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _migrate(conn)
+        _local.conn = conn
+    return conn
+
+
+# Columns added after the first release; older databases get them on open
+_ADDED_COLUMNS = (("lead_queue", "TEXT"), ("lease_token", "TEXT"), ("lead_key", "TEXT"), ("phone", "INTEGER"),
+                  ("attempt", "INTEGER"), ("outcome", "TEXT"), ("peak_rss_mb", "REAL"), ("cpu_s", "REAL"),
+                  ("peak_fds", "INTEGER"), ("over_budget", "TEXT"), ("result", "TEXT"), ("extraction", "TEXT"),
+                  ("extracted_version", "INTEGER"), ("next_claimed", "INTEGER"))
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    have = {r["name"] for r in conn.execute("PRAGMA table_info(calls)").fetchall()}
+    for name, decl in _ADDED_COLUMNS:
+        if name not in have:
+            try:
+                conn.execute(f"ALTER TABLE calls ADD COLUMN {name} {decl}")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+    conn.execute("CREATE INDEX IF NOT EXISTS calls_lead_key ON calls(leads_csv, lead_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS calls_phone ON calls(phone, started_at)")
+
+
+class _Tx:
+    """BEGIN IMMEDIATE ... COMMIT: serializes writers across processes."""
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = _conn()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def transaction() -> _Tx:
+    return _Tx()
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+
+def get_setting(key: str, default: Any = None) -> Any:
+    row = _conn().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return default
+    try:
+        return json.loads(row["value"])
+    except ValueError:
+        return default
+
+
+def set_setting(key: str, value: Any) -> None:
+    _conn().execute(
+        "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, json.dumps(value)),
+    )
+
+
+def init_setting(key: str, value: Any) -> None:
+    """Set ``key`` only if no worker has set it yet."""
+    _conn().execute("INSERT OR IGNORE INTO settings(key, value) VALUES(?, ?)", (key, json.dumps(value)))
+
+
+def swap_setting(key: str, value: Any) -> bool:
+    """Set ``key`` to ``value``; True only for the one caller that changed it (once-per-period jobs)."""
+    encoded = json.dumps(value)
+    with transaction() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        if row is not None and row["value"] == encoded:
+            return False
+        conn.execute(
+            "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, encoded),
+        )
+    return True
+
+
+# -----------------------------
+# Calls
+# -----------------------------
+
+def claim_call(kind: str, lead_index: Optional[int], campaign: Optional[str], *,
+               room: Optional[str] = None, leads_csv: Optional[str] = None,
+               max_active: Optional[int] = None, call_id: Optional[str] = None,
+               lead_queue: Optional[str] = None, lease_token: Optional[str] = None,
+               lead_key: Optional[str] = None, phone: Optional[int] = None,
+               attempt: Optional[int] = None) -> Optional[str]:
+    """Atomically insert a 'starting' call owned by this process.
+
+    Returns the call id, or None if ``max_active`` calls of this kind are already
+    active or another active call already holds ``room``.
+    """
+    now = time.time()
+    call_id = call_id or uuid.uuid4().hex[:12]
+    placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+    with transaction() as conn:
+        if max_active is not None:
+            n = conn.execute(
+                f"SELECT COUNT(*) FROM calls WHERE kind = ? AND status IN ({placeholders})",
+                (kind, *ACTIVE_STATUSES),
+            ).fetchone()[0]
+            if n >= max_active:
+                return None
+        if room is not None:
+            taken = conn.execute(
+                f"SELECT 1 FROM calls WHERE room = ? AND status IN ({placeholders}) LIMIT 1",
+                (room, *ACTIVE_STATUSES),
+            ).fetchone()
+            if taken:
+                return None
+        conn.execute(
+            "INSERT INTO calls(id, kind, lead_index, campaign, room, leads_csv, owner_pid, status, started_at,"
+            " last_activity, lead_queue, lease_token, lead_key, phone, attempt)"
+            " VALUES(?, ?, ?, ?, ?, ?, ?, 'starting', ?, ?, ?, ?, ?, ?, ?)",
+            (call_id, kind, lead_index, campaign, room, leads_csv, os.getpid(), now, now, lead_queue, lease_token,
+             lead_key, phone, attempt),
+        )
+    return call_id
+
+
+def update_call(call_id: str, **fields: Any) -> bool:
+    """Update columns of a call that is still active; returns False if it already finished."""
+    if not fields:
+        return True
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+    cur = _conn().execute(
+        f"UPDATE calls SET {cols} WHERE id = ? AND status IN ({placeholders})",
+        (*fields.values(), call_id, *ACTIVE_STATUSES),
+    )
+    return cur.rowcount == 1
+
+
+def attach_process(call_id: str, pid: Optional[int]) -> Optional[str]:
+    """Record the agent pid and promote 'starting' to 'running'.
+
+    Returns the resulting status so the spawner can stop an agent whose call
+    was ended while it was being launched.
+    """
+    conn = _conn()
+    conn.execute(
+        "UPDATE calls SET pid = ?, status = CASE status WHEN 'starting' THEN 'running' ELSE status END WHERE id = ?",
+        (pid, call_id),
+    )
+    row = conn.execute("SELECT status FROM calls WHERE id = ?", (call_id,)).fetchone()
+    return row["status"] if row else None
+
+
+def touch(call_id: Optional[str] = None, room: Optional[str] = None) -> bool:
+    """Bump last_activity on a starting/running call, by id or by room."""
+    if call_id:
+        where, arg = "id = ?", call_id
+    elif room:
+        where, arg = "room = ?", room
+    else:
+        return False
+    cur = _conn().execute(
+        f"UPDATE calls SET last_activity = ? WHERE {where} AND status IN ('starting', 'running')",
+        (time.time(), arg),
+    )
+    return cur.rowcount > 0
+
+
+def finish_call(call_id: str, status: str = "ended", exit_code: Optional[int] = None,
+                end_reason: Optional[str] = None) -> bool:
+    """Mark a call finished. Returns True only for the caller that made the transition."""
+    placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+    cur = _conn().execute(
+        f"UPDATE calls SET status = ?, ended_at = ?, exit_code = ?, end_reason = COALESCE(end_reason, ?)"
+        f" WHERE id = ? AND status IN ({placeholders})",
+        (status, time.time(), exit_code, end_reason, call_id, *ACTIVE_STATUSES),
+    )
+    return cur.rowcount == 1
+
+
+def claim_next(call_id: str) -> bool:
+    """Take charge of starting the call that follows ``call_id``. True for one caller only.
+
+    End Call and the watcher can both see a stopped call finish; whichever
+    claims it starts the next call, so auto-next never dials twice.
+    """
+    cur = _conn().execute("UPDATE calls SET next_claimed = 1 WHERE id = ? AND next_claimed IS NULL", (call_id,))
+    return cur.rowcount == 1
+
+
+def release_next(call_id: str) -> None:
+    """Give back a claim_next whose next call could not start, so the watcher can start it later."""
+    _conn().execute("UPDATE calls SET next_claimed = NULL WHERE id = ?", (call_id,))
+
+
+def set_outcome(call_id: str, outcome: str) -> None:
+    """Record the classified outcome of a finished call."""
+    _conn().execute("UPDATE calls SET outcome = ? WHERE id = ?", (outcome, call_id))
+
+
+def get_call(call_id: str) -> Optional[Dict[str, Any]]:
+    row = _conn().execute("SELECT * FROM calls WHERE id = ?", (call_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def active_calls(kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+    sql = f"SELECT * FROM calls WHERE status IN ({placeholders})"
+    args: List[Any] = list(ACTIVE_STATUSES)
+    if kind:
+        sql += " AND kind = ?"
+        args.append(kind)
+    return [dict(r) for r in _conn().execute(sql + " ORDER BY started_at", args).fetchall()]
+
+
+def latest_call(kind: str) -> Optional[Dict[str, Any]]:
+    row = _conn().execute(
+        "SELECT * FROM calls WHERE kind = ? ORDER BY started_at DESC LIMIT 1", (kind,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def find_active_room(room: str) -> Optional[Dict[str, Any]]:
+    placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+    row = _conn().execute(
+        f"SELECT * FROM calls WHERE kind = 'browser' AND room = ? AND status IN ({placeholders})"
+        " ORDER BY started_at DESC LIMIT 1",
+        (room, *ACTIVE_STATUSES),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def list_calls(kind: str, since: Optional[float] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    sql = "SELECT * FROM calls WHERE kind = ?"
+    args: List[Any] = [kind]
+    if since is not None:
+        sql += " AND (ended_at IS NULL OR ended_at >= ?)"
+        args.append(since)
+    sql += " ORDER BY started_at DESC LIMIT ?"
+    args.append(limit)
+    return [dict(r) for r in _conn().execute(sql, args).fetchall()]
+
+
+def count_calls(kind: str) -> Dict[str, int]:
+    rows = _conn().execute("SELECT status, COUNT(*) AS n FROM calls WHERE kind = ? GROUP BY status", (kind,))
+    return {r["status"]: r["n"] for r in rows.fetchall()}
+
+
+def leads_csvs_used(kind: str = "console") -> List[str]:
+    """Distinct lead-list paths calls were made against (as stored, possibly relative)."""
+    rows = _conn().execute("SELECT DISTINCT leads_csv FROM calls WHERE kind = ? AND leads_csv IS NOT NULL", (kind,))
+    return [r["leads_csv"] for r in rows.fetchall()]
+
+
+def iter_calls_by_lead(leads_csvs: Sequence[str], kind: str = "console", campaign: Optional[str] = None,
+                       since: Optional[float] = None, until: Optional[float] = None,
+                       batch: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Calls against ``leads_csvs`` ordered by lead_index, started_at, fetched in batches.
+
+    Uses its own connection so a long streaming export neither loads every row
+    nor shares a cursor with whatever else the calling thread does.
+    """
+    if not leads_csvs:
+        return
+    sql = (f"SELECT * FROM calls WHERE kind = ? AND leads_csv IN ({','.join('?' * len(leads_csvs))})"
+           " AND lead_index IS NOT NULL")
+    args: List[Any] = [kind, *leads_csvs]
+    if campaign:
+        sql += " AND campaign = ?"
+        args.append(campaign)
+    if since is not None:
+        sql += " AND started_at >= ?"
+        args.append(since)
+    if until is not None:
+        sql += " AND started_at < ?"
+        args.append(until)
+    _conn()  # make sure the schema exists
+    conn = sqlite3.connect(str(DB_PATH), timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        cur = conn.execute(sql + " ORDER BY lead_index, started_at", args)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            for r in rows:
+                yield dict(r)
+    finally:
+        conn.close()
+
+
+def recent_outcomes(campaign: Optional[str], limit: int = 200, kind: str = "console") -> List[tuple]:
+    """(outcome, duration_s) of the latest finished calls of a campaign, newest first."""
+    rows = _conn().execute(
+        "SELECT outcome, ended_at - started_at FROM calls WHERE kind = ? AND campaign IS ? AND ended_at IS NOT NULL"
+        " AND outcome IS NOT NULL ORDER BY ended_at DESC LIMIT ?",
+        (kind, campaign, limit),
+    ).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+def record_usage(call_id: str, rss_mb: float, cpu_s: float, fds: int, over_budget: Optional[str] = None) -> None:
+    """Fold one resource sample into a call's peaks (CPU only grows, so its peak is the latest)."""
+    _conn().execute(
+        "UPDATE calls SET peak_rss_mb = MAX(COALESCE(peak_rss_mb, 0), ?), cpu_s = MAX(COALESCE(cpu_s, 0), ?),"
+        " peak_fds = MAX(COALESCE(peak_fds, 0), ?), over_budget = COALESCE(?, over_budget) WHERE id = ?",
+        (rss_mb, cpu_s, fds, over_budget, call_id),
+    )
+
+
+def recent_usage(limit: int = 200, kind: str = "console") -> List[Dict[str, Any]]:
+    """Resource peaks of the latest finished calls that were sampled, newest first."""
+    rows = _conn().execute(
+        "SELECT id, campaign, outcome, ended_at - started_at AS duration_s, peak_rss_mb, cpu_s, peak_fds, over_budget"
+        " FROM calls WHERE kind = ? AND ended_at IS NOT NULL AND cpu_s IS NOT NULL ORDER BY ended_at DESC LIMIT ?",
+        (kind, limit),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def calls_to_extract(version: int, limit: int = 200, after: Optional[tuple] = None, redo: bool = False,
+                     ended_before: Optional[float] = None, owner_pid: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Finished calls whose outcome is missing or from rules older than ``version``, oldest first.
+
+    ``after`` is the (ended_at, id) of the last call of the previous page;
+    ``redo`` includes calls already extracted by ``version``.
+    """
+    sql = "SELECT id, ended_at FROM calls WHERE ended_at IS NOT NULL"
+    args: List[Any] = []
+    if not redo:
+        sql += " AND (extracted_version IS NULL OR extracted_version < ?)"
+        args.append(version)
+    if after is not None:
+        sql += " AND (ended_at > ? OR (ended_at = ? AND id > ?))"
+        args += [after[0], after[0], after[1]]
+    if ended_before is not None:
+        sql += " AND ended_at < ?"
+        args.append(ended_before)
+    if owner_pid is not None:
+        sql += " AND owner_pid = ?"
+        args.append(owner_pid)
+    rows = _conn().execute(sql + " ORDER BY ended_at, id LIMIT ?", (*args, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def record_extractions(rows: Sequence[tuple], version: int) -> None:
+    """Store (call id, result, extraction JSON) rows from backend/call_outcomes.py."""
+    if not rows:
+        return
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE calls SET result = ?, extraction = ?, extracted_version = ? WHERE id = ?",
+            [(result, extraction, version, call_id) for call_id, result, extraction in rows],
+        )
+
+
+def outcome_counts(since: float = 0.0, campaign: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Extracted outcomes of calls ended since ``since``: (result, extraction) rows for summaries."""
+    sql = "SELECT result, extraction FROM calls WHERE extracted_version IS NOT NULL AND ended_at >= ?"
+    args: List[Any] = [since]
+    if campaign:
+        sql += " AND campaign = ?"
+        args.append(campaign)
+    return [dict(r) for r in _conn().execute(sql, args).fetchall()]
+
+
+def score_counts(keys: Optional[Sequence[tuple]] = None) -> List[tuple]:
+    """(feature, value, hour, attempts, connects) rows, all or just ``keys`` (feature, value, hour)."""
+    conn = _conn()
+    sql = "SELECT feature, value, hour, attempts, connects FROM score_counts"
+    if keys is None:
+        return [tuple(r) for r in conn.execute(sql).fetchall()]
+    out: List[tuple] = []
+    for key in keys:
+        row = conn.execute(sql + " WHERE feature = ? AND value = ? AND hour = ?", key).fetchone()
+        if row is not None:
+            out.append(tuple(row))
+    return out
+
+
+def add_score_counts(keys: Sequence[tuple], connected: bool) -> None:
+    """Count one call against each (feature, value, hour) counter."""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO score_counts(feature, value, hour, attempts, connects) VALUES(?, ?, ?, 1, ?)"
+            " ON CONFLICT(feature, value, hour) DO UPDATE SET attempts = attempts + 1,"
+            " connects = connects + excluded.connects",
+            [(*key, int(connected)) for key in keys],
+        )
+
+
+def dialed_numbers_after(rowid: int, since: float) -> List[Dict[str, Any]]:
+    """Numbers dialed by calls inserted after ``rowid`` and started at or after ``since``."""
+    rows = _conn().execute(
+        "SELECT rowid, phone, started_at FROM calls WHERE rowid > ? AND phone IS NOT NULL AND started_at >= ?"
+        " ORDER BY rowid",
+        (rowid, since),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# -----------------------------
+# Lead identities
+# -----------------------------
+
+def lead_index_rows(list_name: str) -> Dict[str, Dict[str, Any]]:
+    """lead_key -> {lead_index, row_hash, problems} for the indexed version of a list."""
+    rows = _conn().execute(
+        "SELECT lead_key, lead_index, row_hash, problems FROM lead_index WHERE list = ?", (list_name,)
+    ).fetchall()
+    return {r["lead_key"]: {"lead_index": r["lead_index"], "row_hash": r["row_hash"],
+                            "problems": json.loads(r["problems"]) if r["problems"] else None} for r in rows}
+
+
+def lead_key_at(list_name: str, lead_index: int) -> Optional[str]:
+    row = _conn().execute(
+        "SELECT lead_key FROM lead_index WHERE list = ? AND lead_index = ?", (list_name, lead_index)
+    ).fetchone()
+    return row["lead_key"] if row else None
+
+
+def invalid_leads(list_name: str, limit: int = 100) -> Dict[str, Any]:
+    """How many leads of a list failed validation, and the first ``limit`` of them with their problems."""
+    conn = _conn()
+    count = conn.execute(
+        "SELECT COUNT(*) FROM lead_index WHERE list = ? AND problems IS NOT NULL", (list_name,)
+    ).fetchone()[0]
+    rows = conn.execute(
+        "SELECT lead_index, problems FROM lead_index WHERE list = ? AND problems IS NOT NULL"
+        " ORDER BY lead_index LIMIT ?", (list_name, max(0, limit))
+    ).fetchall()
+    return {"count": count, "leads": [{"lead_index": r["lead_index"], "problems": json.loads(r["problems"])}
+                                      for r in rows]}
+
+
+def apply_lead_index(list_name: str, upserts: Sequence[tuple], removed_keys: Sequence[str]) -> None:
+    """Write ``(lead_key, lead_index, row_hash, problems)`` rows and drop ``removed_keys`` in one transaction."""
+    with transaction() as conn:
+        conn.executemany("DELETE FROM lead_index WHERE list = ? AND lead_key = ?",
+                         ((list_name, k) for k in removed_keys))
+        conn.executemany(
+            "INSERT INTO lead_index(list, lead_key, lead_index, row_hash, problems) VALUES(?, ?, ?, ?, ?)"
+            " ON CONFLICT(list, lead_key) DO UPDATE SET lead_index = excluded.lead_index,"
+            " row_hash = excluded.row_hash, problems = excluded.problems",
+            ((list_name, k, i, h, json.dumps(p) if p else None) for k, i, h, p in upserts),
+        )
+
+
+def rekey_calls(leads_csvs: Sequence[str], old_keys: Dict[int, str], new_positions: Dict[str, Optional[int]]) -> int:
+    """Carry call history over to a new version of a lead list.
+
+    Calls made before lead keys existed get theirs from ``old_keys`` (old
+    index -> key); then every call whose key moved gets the new index, or NULL
+    if the lead was removed. A lead that comes back later finds its calls again.
+    """
+    if not leads_csvs:
+        return 0
+    aliases = ",".join("?" * len(leads_csvs))
+    with transaction() as conn:
+        conn.executemany(
+            f"UPDATE calls SET lead_key = ? WHERE leads_csv IN ({aliases}) AND lead_index = ? AND lead_key IS NULL",
+            ((key, *leads_csvs, idx) for idx, key in old_keys.items()),
+        )
+        cur = conn.executemany(
+            f"UPDATE calls SET lead_index = ? WHERE leads_csv IN ({aliases}) AND lead_key = ?"
+            " AND lead_index IS NOT ?",
+            ((idx, *leads_csvs, key, idx) for key, idx in new_positions.items()),
+        )
+        return cur.rowcount
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    """True if ``pid`` exists and is not a zombie waiting to be reaped."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
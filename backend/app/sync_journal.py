@@ -0,0 +1,392 @@
+"""Durable journal of local writes waiting to be pushed to Supabase.
+
+Campaign and CSV writes are applied to the local mirror first and appended
+here as one JSON line each. A background syncer replays the journal in
+batched upserts/deletes once Supabase is reachable, so requests never wait
+on the remote and a failed push is retried instead of lost.
+
+Files (next to SYNC_JOURNAL_PATH, default backend/sync_journal.jsonl):
+  - <journal>.jsonl      append-only entries {"ts", "table", "op", "key", "row"}
+  - <journal>.offset     byte offset of the first entry not yet applied remotely
+  - <journal>.lock       held by whichever web worker is currently syncing
+  - <journal>.attempts   failed attempts of entries Supabase rejected, by offset
+  - <journal>.dead.jsonl entries given up on, with the error
+
+Replay keeps order, so a failing entry holds back everything after it. When
+a batch fails, a one-row read of the table tells an outage (nothing counted,
+retried with backoff) from an entry Supabase rejects (a missing column, a
+constraint). The batch is then applied entry by entry, and an entry rejected
+``max_attempts`` times is moved to the dead-letter file so later ones drain.
+
+Appends take an exclusive flock so several uvicorn workers can share one
+journal; on platforms without fcntl only in-process locking is used.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Row field naming a local file whose text becomes the row's "content" at replay time
+CONTENT_FILE_FIELD = "_content_file"
+
+MAX_BACKOFF = 60.0
+MAX_ATTEMPTS = 5
+
+
+class _FileLock:
+    """flock on an open file (no-op without fcntl) plus a process-local lock."""
+
+    def __init__(self, f, local: threading.Lock, blocking: bool = True) -> None:
+        self.f = f
+        self.local = local
+        self.blocking = blocking
+        self.acquired = False
+
+    def __enter__(self) -> "_FileLock":
+        if not self.local.acquire(blocking=self.blocking):
+            return self
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX | (0 if self.blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(self.f.fileno(), flags)
+            except OSError:
+                self.local.release()
+                return self
+        self.acquired = True
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if not self.acquired:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+        self.local.release()
+
+
+class SyncJournal:
+    def __init__(self, path: Path, batch_size: int = 200, interval: float = 5.0,
+                 max_attempts: int = MAX_ATTEMPTS) -> None:
+        self.path = Path(path)
+        self.offset_path = self.path.with_suffix(".offset")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.attempts_path = self.path.with_suffix(".attempts")
+        self.dead_path = self.path.with_suffix(".dead.jsonl")
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_attempts = max(1, max_attempts)
+        self._append_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+        self.last_error: Optional[str] = None
+        self.last_sync_at: Optional[float] = None
+        self.applied_total = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+
+    def append(self, table: str, op: str, key: str, row: Dict[str, Any]) -> None:
+        """Durably record one upsert/delete of ``row`` (conflict column ``key``) for ``table``."""
+        self.append_many(table, op, key, [row])
+
+    def append_many(self, table: str, op: str, key: str, rows: List[Dict[str, Any]]) -> None:
+        """Record several writes with a single fsync (bulk imports)."""
+        if op not in ("upsert", "delete"):
+            raise ValueError(f"Unsupported journal op: {op}")
+        if not rows:
+            return
+        ts = time.time()
+        data = "".join(
+            json.dumps({"ts": ts, "table": table, "op": op, "key": key, "row": row}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        with open(self.path, "a", encoding="utf-8") as f, _FileLock(f, self._append_lock):
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._wake.set()
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+
+    def _read_offset(self) -> int:
+        try:
+            return int(self.offset_path.read_text(encoding="utf-8").strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp = self.offset_path.with_suffix(".offset.tmp")
+        tmp.write_text(str(offset), encoding="utf-8")
+        os.replace(tmp, self.offset_path)
+
+    def _read_attempts(self) -> Dict[int, int]:
+        try:
+            return {int(k): int(v) for k, v in json.loads(self.attempts_path.read_text(encoding="utf-8")).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _write_attempts(self, attempts: Dict[int, int]) -> None:
+        if not attempts:
+            if self.attempts_path.exists():
+                self.attempts_path.unlink()
+            return
+        tmp = self.attempts_path.with_suffix(".attempts.tmp")
+        tmp.write_text(json.dumps({str(k): v for k, v in attempts.items()}), encoding="utf-8")
+        os.replace(tmp, self.attempts_path)
+
+    def dead_letters(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """The most recent entries given up on, newest last."""
+        try:
+            with open(self.dead_path, "rb") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        out = []
+        for raw in lines[-limit:] if limit else lines:
+            try:
+                out.append(json.loads(raw))
+            except ValueError:
+                continue
+        return out
+
+    def _read_entries(self, limit: Optional[int] = None) -> List[Tuple[Dict[str, Any], int]]:
+        """Pending entries with the byte offset just past each one."""
+        out: List[Tuple[Dict[str, Any], int]] = []
+        offset = self._read_offset()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a write still in progress
+                offset += len(raw)
+                try:
+                    out.append((json.loads(raw), offset))
+                except ValueError:
+                    logger.warning("Skipping unreadable sync journal entry at offset %d", offset - len(raw))
+                    continue
+                if limit and len(out) >= limit:
+                    break
+        return out
+
+    def pending(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entries not yet applied remotely, oldest first (used to overlay remote reads)."""
+        return [e for e, _ in self._read_entries() if table is None or e.get("table") == table]
+
+    def pending_keys(self, table: str) -> Dict[str, str]:
+        """Key value -> last pending op ("upsert" or "delete") for ``table``."""
+        out: Dict[str, str] = {}
+        for e in self.pending(table):
+            value = (e.get("row") or {}).get(e.get("key"))
+            if value is not None:
+                out[str(value)] = e["op"]
+        return out
+
+    def status(self) -> Dict[str, Any]:
+        entries = self._read_entries()
+        dead = self.dead_letters(limit=0)
+        head_attempts = self._read_attempts().get(self._read_offset(), 0) if entries else 0
+        return {
+            "pending": len(entries),
+            "oldest_pending_age_s": round(time.time() - entries[0][0].get("ts", time.time()), 3) if entries else None,
+            "last_sync_at": self.last_sync_at,
+            "last_error": self.last_error,
+            "retry_in_s": round(max(0.0, self._next_attempt - time.time()), 3) if self.last_error else 0.0,
+            "applied_total": self.applied_total,
+            "head_attempts": head_attempts,
+            "max_attempts": self.max_attempts,
+            "dead_letters": len(dead),
+            "recent_dead_letters": [
+                {"ts": d.get("dead_at"), "table": d.get("entry", {}).get("table"), "op": d.get("entry", {}).get("op"),
+                 "key": (d.get("entry", {}).get("row") or {}).get(d.get("entry", {}).get("key")), "error": d.get("error")}
+                for d in dead[-5:]
+            ],
+        }
+
+    # -----------------------------
+    # Replay
+    # -----------------------------
+
+    @staticmethod
+    def _resolve_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if CONTENT_FILE_FIELD not in row:
+            return row
+        row = dict(row)
+        path = Path(row.pop(CONTENT_FILE_FIELD))
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None  # file gone again; a later delete entry covers it
+        row["content"] = data.decode("utf-8", errors="ignore")
+        row["size"] = len(data)
+        return row
+
+    def _apply_group(self, client: Any, table: str, op: str, key: str, rows: List[Dict[str, Any]]) -> None:
+        # Later writes to the same key win within a group
+        latest: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            latest.pop(row.get(key), None)
+            latest[row.get(key)] = row
+        items = list(latest.values())
+        for i in range(0, len(items), self.batch_size):
+            chunk = items[i:i + self.batch_size]
+            if op == "upsert":
+                resolved = [r for r in (self._resolve_row(r) for r in chunk) if r is not None]
+                if resolved:
+                    client.table(table).upsert(resolved, on_conflict=key).execute()
+            else:
+                client.table(table).delete().in_(key, [r.get(key) for r in chunk]).execute()
+
+    @staticmethod
+    def _reachable(client: Any, table: str, key: str) -> bool:
+        """Whether Supabase answers a one-row read of ``table``, i.e. a failed write was the entry's fault."""
+        try:
+            client.table(table).select(key or "*").limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    def _dead_letter(self, entry: Dict[str, Any], offset: int, error: str, attempts: int) -> None:
+        record = {"dead_at": time.time(), "offset": offset, "attempts": attempts, "error": error, "entry": entry}
+        with open(self.dead_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        logger.error("Sync journal gave up on %s %s after %d attempts: %s",
+                     entry.get("table"), entry.get("op"), attempts, error)
+
+    def _apply_one_by_one(self, client: Any, table: str, op: str, key: str,
+                          items: List[Tuple[Dict[str, Any], int, int]]) -> Tuple[int, int, Optional[str]]:
+        """Apply a rejected batch entry by entry: (applied, dead-lettered, error that stopped it)."""
+        applied = dead = 0
+        attempts = self._read_attempts()
+        for entry, start, end in items:
+            try:
+                self._apply_group(client, table, op, key, [entry.get("row") or {}])
+            except Exception as exc:
+                error = f"{table} {op}: {exc}"
+                attempts[start] = attempts.get(start, 0) + 1
+                if attempts[start] < self.max_attempts:
+                    self._write_attempts(attempts)
+                    return applied, dead, error
+                self._dead_letter(entry, start, error, attempts[start])
+                dead += 1
+            else:
+                applied += 1
+            attempts.pop(start, None)
+            self._write_attempts(attempts)
+            self._write_offset(end)
+        return applied, dead, None
+
+    def replay(self, client: Any, max_entries: int = 5000) -> Dict[str, Any]:
+        """Push pending entries in order; stops at the first failure and keeps it for retry.
+
+        An entry Supabase keeps rejecting while it answers reads is moved to
+        the dead-letter file after ``max_attempts`` tries.
+        """
+        with open(self.lock_path, "a+") as lockf, _FileLock(lockf, self._sync_lock, blocking=False) as lock:
+            if not lock.acquired:
+                return {"applied": 0, "skipped": "another worker is syncing"}
+            start = self._read_offset()
+            entries = self._read_entries(limit=max_entries)
+            # Consecutive entries with the same table/op/key column form one batch; order between groups is kept
+            groups: List[Tuple[Tuple[str, str, str], List[Tuple[Dict[str, Any], int, int]]]] = []
+            for entry, end in entries:
+                sig = (entry.get("table", ""), entry.get("op", ""), entry.get("key", ""))
+                if groups and groups[-1][0] == sig:
+                    groups[-1][1].append((entry, start, end))
+                else:
+                    groups.append((sig, [(entry, start, end)]))
+                start = end
+            applied = dead = 0
+            for (table, op, key), items in groups:
+                try:
+                    self._apply_group(client, table, op, key, [e.get("row") or {} for e, _, _ in items])
+                except Exception as exc:
+                    if not self._reachable(client, table, key):
+                        self.last_error = f"{table} {op}: {exc}"
+                        return {"applied": applied, "dead_lettered": dead, "error": self.last_error}
+                    ok, bad, error = self._apply_one_by_one(client, table, op, key, items)
+                    applied += ok
+                    dead += bad
+                    self.applied_total += ok
+                    if error:
+                        self.last_error = error
+                        return {"applied": applied, "dead_lettered": dead, "error": error}
+                    continue
+                self._write_offset(items[-1][2])
+                applied += len(items)
+                self.applied_total += len(items)
+            self.last_error = None
+            self.last_sync_at = time.time()
+            self._compact()
+            return {"applied": applied, "dead_lettered": dead, "error": None}
+
+    def _compact(self) -> None:
+        """Truncate the journal once everything in it has been applied."""
+        with open(self.path, "a", encoding="utf-8") as f, _FileLock(f, self._append_lock):
+            if self._read_offset() == os.path.getsize(self.path):
+                f.truncate(0)
+                self._write_offset(0)
+                self._write_attempts({})  # offsets restart at 0
+
+    # -----------------------------
+    # Background syncer
+    # -----------------------------
+
+    def sync_once(self, client_factory: Callable[[], Any]) -> Dict[str, Any]:
+        if not self._read_entries(limit=1):
+            return {"applied": 0, "error": None}
+        client = client_factory()
+        if client is None:
+            self.last_error = "Supabase not configured"
+            return {"applied": 0, "error": self.last_error}
+        result = self.replay(client)
+        if result.get("error"):
+            self._backoff = min(MAX_BACKOFF, (self._backoff * 2) or 1.0)
+            self._next_attempt = time.time() + self._backoff
+            logger.warning("Sync journal replay failed (retry in %.0fs): %s", self._backoff, result["error"])
+        elif result.get("applied") or result.get("dead_lettered"):
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+        return result
+
+    def flush(self) -> None:
+        """Wake the syncer now, skipping any retry backoff."""
+        self._next_attempt = 0.0
+        self._wake.set()
+
+    def _loop(self, client_factory: Callable[[], Any]) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if time.time() < self._next_attempt:
+                continue
+            try:
+                self.sync_once(client_factory)
+            except Exception:
+                logger.exception("Sync journal iteration failed")
+
+    def start(self, client_factory: Callable[[], Any]) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, args=(client_factory,), daemon=True)
+            self._thread.start()
@@ -0,0 +1,402 @@
+"""Unattended calls over a range of leads: ``python -m backend.agent batch``.
+
+    python -m backend.agent batch --campaign prompts2 --csv leads.csv --concurrency 4 --range 1:500
+    python -m backend.agent batch --csv leads.csv --range 501:            # env campaign, leads 501 to the end
+
+Each lead in the range (1-based, both ends included) gets one console call,
+started the same way the web controller's ``spawn_call`` starts one: a
+``RUN_SINGLE_CALL`` child per call, with the campaign's prompt mode, call
+limits and (if the campaign opted in) AMD from campaign_settings.json. At most ``--concurrency`` calls
+run at once, and starts are spaced ``--stagger-s`` apart. Leads on the
+do-not-call list (backend/suppression.py) are skipped. A call still running
+past its campaign's max duration plus grace is stopped.
+
+Every finished call appends a row to the results CSV (``RESULT_FIELDS``).
+The outcome comes from the child's exit code (backend/retry_policy.py).
+Child output goes to ``<log dir>/<call id>.log``. After each call the
+checkpoint (``<results>.checkpoint.json``) is rewritten atomically. Running
+the same command again resumes: leads with a result are skipped, and only
+calls that were interrupted are dialed again. A checkpoint written for
+another campaign, range or leads file is refused; pass ``--fresh`` to start
+over.
+
+Ctrl+C (or SIGTERM) stops starting calls and asks running ones to end, as
+End Call does. A second Ctrl+C kills them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from backend.amd import AMDConfig
+from backend.call_limits import CallLimits
+from backend.prompt_tools import normalize_prompt_mode
+from backend.retry_policy import classify
+from backend.suppression import SuppressionIndex, country_for_timezone, normalize_number
+
+CHECKPOINT_VERSION = 1
+SETTINGS_PATH = Path(__file__).resolve().parent / "campaign_settings.json"
+RESULT_FIELDS = ("lead_index", "prospect_name", "company_name", "phone", "outcome", "exit_code",
+                 "started_at", "duration_s", "call_id")
+POLL_S = 0.2
+KILL_AFTER_S = 20.0  # a call asked to stop that is still running this much later is killed
+
+Campaign = Tuple[str, str, str]  # (module, agent_attr, session_attr)
+
+
+def parse_range(spec: Optional[str], total: int) -> Tuple[int, int]:
+    """1-based inclusive (first, last) lead numbers from "a:b", "a:", ":b" or "a"; raises ValueError."""
+    spec = (spec or "").strip()
+    if not spec:
+        return 1, total
+    a, sep, b = spec.partition(":")
+    if not sep:
+        b = a
+    first = int(a) if a.strip() else 1
+    last = min(int(b) if b.strip() else total, total)
+    if first < 1 or first > last:
+        raise ValueError(f"range {spec!r} selects no leads (the file has {total})")
+    return first, last
+
+
+def campaign_env(campaign: Optional[Campaign], settings_path: Path = SETTINGS_PATH) -> Tuple[Dict[str, str], CallLimits]:
+    """The env the web controller gives a console call of ``campaign``, and the campaign's call limits."""
+    env: Dict[str, str] = {}
+    settings: Dict[str, Any] = {}
+    if campaign:
+        module, agent_attr, session_attr = campaign
+        try:
+            settings = json.loads(settings_path.read_text(encoding="utf-8")).get(module) or {}
+        except (OSError, ValueError, AttributeError):
+            settings = {}
+        env.update({
+            "CAMPAIGN_PROMPT_MODULE": module,
+            "CAMPAIGN_AGENT_NAME": agent_attr,
+            "CAMPAIGN_SESSION_NAME": session_attr,
+            "CAMPAIGN_PROMPT_MODE": normalize_prompt_mode(settings.get("prompt_mode")),
+        })
+    if settings.get("amd"):  # detection is opt-in per campaign, as in spawn_call
+        try:
+            env["AMD_CONFIG"] = json.dumps(AMDConfig.from_dict(settings["amd"])._asdict())
+        except (TypeError, ValueError):
+            pass
+    try:
+        limits = CallLimits.from_dict(settings.get("limits"))
+    except (TypeError, ValueError):
+        limits = CallLimits()
+    env["CALL_LIMITS"] = json.dumps(limits._asdict())
+    return env, limits
+
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _results_done(path: Path) -> Dict[int, str]:
+    """Lead number -> outcome for every settled row of an existing results file."""
+    done: Dict[int, str] = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    index = int(row.get("lead_index") or 0)
+                except ValueError:
+                    continue
+                if index and row.get("outcome") and row["outcome"] != "interrupted":
+                    done[index] = row["outcome"]
+    except OSError:
+        pass
+    return done
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    h, rem = divmod(seconds, 3600)
+    return f"{h}h{rem // 60:02d}m" if h else f"{rem // 60}m{rem % 60:02d}s"
+
+
+class _Call:
+    __slots__ = ("index", "call_id", "proc", "started", "log", "end_reason", "stop_sent")
+
+    def __init__(self, index: int, call_id: str, proc: subprocess.Popen, started: float, log: Any) -> None:
+        self.index = index
+        self.call_id = call_id
+        self.proc = proc
+        self.started = started
+        self.log = log
+        self.end_reason: Optional[str] = None
+        self.stop_sent = 0.0
+
+
+class BatchRun:
+    """One pass over a lead range; ``run`` returns 0 once every lead is settled, 130 if stopped early."""
+
+    def __init__(self, leads: List[Dict[str, str]], leads_csv: Path, first: int, last: int,
+                 env: Dict[str, str], limits: CallLimits, results: Path, identity: Dict[str, Any],
+                 concurrency: int = 1, stagger_s: float = 1.0, agent_module: str = "backend.agent",
+                 log_dir: Optional[Path] = None, progress_s: float = 30.0, fresh: bool = False,
+                 suppression: Optional[SuppressionIndex] = None) -> None:
+        self.leads = leads
+        self.leads_csv = leads_csv
+        self.env = env
+        self.limits = limits
+        self.results = results
+        self.checkpoint = results.with_name(results.name + ".checkpoint.json")
+        self.concurrency = max(1, concurrency)
+        self.stagger_s = max(0.0, stagger_s)
+        self.agent_module = agent_module
+        self.log_dir = log_dir
+        self.progress_s = progress_s
+        self.suppression = suppression
+        self.session = f"b{int(time.time()):x}"  # per invocation, so a redial never appends to an old transcript
+        self.stopping = 0  # 1 after the first Ctrl+C, 2 after the second
+        self.counts: Counter = Counter()
+        self.finished = 0  # calls placed and settled by this invocation, for the call rate
+
+        state = self._load_checkpoint(identity, fresh)
+        self.state = state
+        self.done: Dict[int, str] = {int(k): v for k, v in state["done"].items()}
+        if not fresh:
+            # Rows appended just before a crash may not have reached the checkpoint yet
+            self.done.update({i: o for i, o in _results_done(results).items() if first <= i <= last})
+        self.total = last - first + 1
+        self.pending: Deque[int] = deque(i for i in range(first, last + 1) if i not in self.done)
+        self.running: Dict[int, _Call] = {}
+
+    # -----------------------------
+    # Checkpoint and results
+    # -----------------------------
+
+    def _load_checkpoint(self, identity: Dict[str, Any], fresh: bool) -> Dict[str, Any]:
+        if not fresh and self.checkpoint.exists():
+            try:
+                state = json.loads(self.checkpoint.read_text(encoding="utf-8"))
+            except ValueError:
+                raise SystemExit(f"{self.checkpoint} is unreadable; pass --fresh to start over")
+            if state.get("identity") != identity:
+                raise SystemExit(f"{self.checkpoint} belongs to another campaign, range or leads file; "
+                                 f"pass --fresh or another --results")
+            return state
+        if fresh and self.results.exists():
+            self.results.unlink()
+        return {"version": CHECKPOINT_VERSION, "identity": identity, "created_at": time.time(), "done": {}}
+
+    def _save_checkpoint(self) -> None:
+        self.state["done"] = {str(i): o for i, o in sorted(self.done.items())}
+        self.state["updated_at"] = time.time()
+        _write_json_atomic(self.checkpoint, self.state)
+
+    def _record(self, index: int, outcome: str, exit_code: Optional[int], started: float, duration: float,
+                call_id: str = "") -> None:
+        lead = self.leads[index - 1]
+        new = not self.results.exists() or self.results.stat().st_size == 0
+        with open(self.results, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(RESULT_FIELDS)
+            writer.writerow([index, lead.get("prospect_name", ""), lead.get("company_name", ""), lead.get("phone", ""),
+                             outcome, "" if exit_code is None else exit_code,
+                             time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)), round(duration, 1), call_id])
+            f.flush()
+            os.fsync(f.fileno())
+        self.counts[outcome] += 1
+        if outcome != "interrupted":  # interrupted calls are dialed again on the next run
+            self.done[index] = outcome
+            self.finished += bool(call_id)
+            self._save_checkpoint()
+        name = lead.get("prospect_name") or "?"
+        company = f" ({lead['company_name']})" if lead.get("company_name") else ""
+        print(f"  #{index} {name}{company}: {outcome}" + (f" after {duration:.0f}s" if call_id else ""), flush=True)
+
+    # -----------------------------
+    # Calls
+    # -----------------------------
+
+    def _start(self, index: int, now: float) -> None:
+        lead = self.leads[index - 1]
+        key = normalize_number(lead.get("phone"), country_for_timezone(lead.get("timezone")))
+        if self.suppression is not None and key is not None and key in self.suppression:
+            self._record(index, "suppressed:dnc", None, now, 0.0)
+            return
+        call_id = f"{self.session}-{index}"
+        env = os.environ.copy()
+        env.update(self.env)
+        env.update({
+            "RUN_SINGLE_CALL": "1",
+            "LEAD_INDEX": str(index),
+            "LEADS_CSV_PATH": str(self.leads_csv),
+            "CALL_ID": call_id,
+        })
+        log: Any = subprocess.DEVNULL
+        if self.log_dir is not None:
+            log = open(self.log_dir / f"{call_id}.log", "wb")
+        kwargs: Dict[str, Any] = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        else:
+            kwargs["start_new_session"] = True  # Ctrl+C reaches only this process, which stops calls in order
+        try:
+            proc = subprocess.Popen([sys.executable, "-m", self.agent_module, "console"], env=env,
+                                    stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs)
+        except OSError as exc:
+            if log is not subprocess.DEVNULL:
+                log.close()
+            print(f"  #{index}: could not start the agent: {exc}", flush=True)
+            self._record(index, "failed", None, now, 0.0)
+            return
+        self.running[index] = _Call(index, call_id, proc, now, log)
+
+    @staticmethod
+    def _stop(call: _Call, now: float) -> None:
+        """Ask an agent to end its call the same way End Call does."""
+        try:
+            if sys.platform == "win32":
+                call.proc.terminate()
+            else:
+                call.proc.send_signal(signal.SIGINT)
+        except OSError:
+            pass
+        call.stop_sent = now
+
+    def _reap(self, now: float) -> None:
+        for index, call in list(self.running.items()):
+            code = call.proc.poll()
+            if code is None:
+                backstop = self.limits.backstop_at(call.started)
+                if not call.stop_sent and (self.stopping or (backstop is not None and now > backstop)):
+                    if not self.stopping:
+                        call.end_reason = "max_duration"
+                    self._stop(call, now)
+                elif call.stop_sent and (self.stopping > 1 or now - call.stop_sent > KILL_AFTER_S):
+                    call.proc.kill()
+                continue
+            del self.running[index]
+            if call.log is not subprocess.DEVNULL:
+                call.log.close()
+            self._record(index, classify(code, call.end_reason, now - call.started), code, call.started,
+                         now - call.started, call.call_id)
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        self.stopping += 1
+        if self.stopping == 1:
+            print(f"\nStopping: waiting for {len(self.running)} call(s) to end (Ctrl+C again to kill them)", flush=True)
+
+    def _progress(self, started: float, now: float) -> None:
+        settled = len(self.done)
+        elapsed = now - started
+        rate = self.finished / elapsed * 3600 if elapsed > 0 else 0.0
+        remaining = self.total - settled
+        eta = _duration(remaining / rate * 3600) if rate > 0 else "?"
+        outcomes = " ".join(f"{k}={v}" for k, v in sorted(self.counts.items()))
+        print(f"[{time.strftime('%H:%M:%S')}] {settled}/{self.total} done ({settled * 100 // max(1, self.total)}%), "
+              f"{len(self.running)} running, {rate:.1f} calls/h, ETA {eta}, elapsed {_duration(elapsed)}"
+              + (f" | {outcomes}" if outcomes else ""), flush=True)
+
+    def run(self) -> int:
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._save_checkpoint()
+        already = self.total - len(self.pending)
+        print(f"{self.total} leads, {already} already done, {len(self.pending)} to call, "
+              f"{self.concurrency} at a time. Results: {self.results}", flush=True)
+        previous = {sig: signal.signal(sig, self._on_signal)
+                    for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)) if sig is not None}
+        started = time.time()
+        next_start = 0.0
+        next_progress = started + self.progress_s
+        try:
+            while self.pending or self.running:
+                now = time.time()
+                while (not self.stopping and self.pending and len(self.running) < self.concurrency
+                       and now >= next_start):
+                    self._start(self.pending.popleft(), now)
+                    next_start = now + self.stagger_s
+                self._reap(now)
+                if self.stopping and not self.running:
+                    break
+                if self.progress_s > 0 and now >= next_progress:
+                    self._progress(started, now)
+                    next_progress = now + self.progress_s
+                time.sleep(POLL_S)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            for call in self.running.values():
+                call.proc.kill()
+            self._save_checkpoint()
+        self._progress(started, time.time())
+        left = self.total - len(self.done)
+        if left:
+            print(f"{left} lead(s) left; run the same command to resume.", flush=True)
+            return 130 if self.stopping else 1
+        print("All leads in the range are done.", flush=True)
+        return 0
+
+
+def main(argv: Sequence[str], resolve_campaign: Callable[[str], Optional[Campaign]],
+         read_leads: Callable[[str], List[Dict[str, str]]], default_csv: str) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.agent batch",
+                                     description="Call a range of leads unattended, resumably")
+    parser.add_argument("--campaign", default=None, help="campaign name or prompt module (default: .env)")
+    parser.add_argument("--csv", default=os.getenv("LEADS_CSV_PATH", default_csv), help="leads CSV")
+    parser.add_argument("--range", default=None, help="1-based lead numbers a:b, both included (default: all)")
+    parser.add_argument("--concurrency", type=int, default=1, help="calls running at once")
+    parser.add_argument("--stagger-s", type=float, default=1.0, help="seconds between call starts")
+    parser.add_argument("--results", default=None, help="results CSV (default: <csv>.results.csv)")
+    parser.add_argument("--log-dir", default=None, help="per-call agent logs (default: <results>.logs)")
+    parser.add_argument("--no-logs", action="store_true", help="discard agent output")
+    parser.add_argument("--progress-s", type=float, default=30.0, help="seconds between progress lines")
+    parser.add_argument("--fresh", action="store_true", help="ignore and replace an existing checkpoint")
+    parser.add_argument("--agent-module", default=os.getenv("AGENT_MODULE", "backend.agent").strip() or "backend.agent")
+    args = parser.parse_args(list(argv))
+
+    campaign = None
+    if args.campaign:
+        campaign = resolve_campaign(args.campaign)
+        if campaign is None:
+            parser.error(f"unknown campaign {args.campaign!r}")
+    leads_csv = Path(args.csv).resolve()
+    leads = read_leads(str(leads_csv))
+    if not leads:
+        parser.error(f"no leads in {leads_csv}")
+    try:
+        first, last = parse_range(args.range, len(leads))
+    except ValueError as exc:
+        parser.error(str(exc))
+    results = Path(args.results) if args.results else leads_csv.with_name(leads_csv.stem + ".results.csv")
+    log_dir = None if args.no_logs else Path(args.log_dir) if args.log_dir else results.with_name(results.stem + ".logs")
+    env, limits = campaign_env(campaign)
+    identity = {
+        "campaign": campaign[0] if campaign else None,
+        "csv": str(leads_csv),
+        "csv_sha1": _file_sha1(leads_csv),
+        "range": [first, last],
+    }
+    run = BatchRun(leads, leads_csv, first, last, env, limits, results, identity,
+                   concurrency=args.concurrency, stagger_s=args.stagger_s, agent_module=args.agent_module,
+                   log_dir=log_dir, progress_s=args.progress_s, fresh=args.fresh, suppression=SuppressionIndex())
+    return run.run()
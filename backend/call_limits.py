@@ -0,0 +1,85 @@
+"""Per-campaign bounds on how long a call may last and how long it may stay silent.
+
+Campaign setting ``limits`` (JSON):
+
+    {"silence_timeout_s": 30, "max_duration_s": 900, "grace_s": 15}
+
+The agent enforces both inside ``entrypoint`` (``Watchdog``, fed from the
+session's user and agent state): when nobody has spoken for
+``silence_timeout_s`` or the call reaches ``max_duration_s``, it ends the call
+and, in a single-call run, exits with the matching code from
+``OUTCOME_EXIT_CODES`` so the controller records ``silence_timeout`` or
+``max_duration`` as the call's end reason. The controller is the backstop for
+agents that hang: it stops any call still running ``grace_s`` past
+``max_duration_s`` (and kills it if it ignores the stop). 0 disables a limit.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, NamedTuple, Optional
+
+END_REASONS = ("silence_timeout", "max_duration")
+
+
+class CallLimits(NamedTuple):
+    silence_timeout_s: float = 30.0
+    max_duration_s: float = 900.0
+    grace_s: float = 15.0
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "CallLimits":
+        """Campaign limits over the defaults; raises ValueError if invalid."""
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("limits must be an object")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"unknown limits fields: {', '.join(sorted(unknown))}")
+        limits = cls(**{k: float(v or 0) for k, v in data.items()})
+        if min(limits) < 0:
+            raise ValueError("limits must not be negative")
+        return limits
+
+    def backstop_at(self, started_at: float) -> Optional[float]:
+        """When the controller stops a call the agent failed to end; None without a max duration."""
+        return started_at + self.max_duration_s + self.grace_s if self.max_duration_s else None
+
+
+class Watchdog:
+    """Decides when a running call has hit its limits; the caller feeds it speech state and the clock."""
+
+    def __init__(self, limits: CallLimits, now: float) -> None:
+        self.limits = limits
+        self.started_at = now
+        self.quiet_since: Optional[float] = now
+        self._user_speaking = False
+        self._agent_busy = False
+
+    def user_state(self, state: str, now: float) -> None:
+        self._user_speaking = state == "speaking"
+        self._update(now)
+
+    def agent_state(self, state: str, now: float) -> None:
+        # Thinking counts: a slow model turn is not the line going dead
+        self._agent_busy = state in ("speaking", "thinking")
+        self._update(now)
+
+    def activity(self, now: float) -> None:
+        """Something was said (e.g. a transcript arrived) without a state change."""
+        if self.quiet_since is not None:
+            self.quiet_since = now
+
+    def _update(self, now: float) -> None:
+        if self._user_speaking or self._agent_busy:
+            self.quiet_since = None
+        elif self.quiet_since is None:
+            self.quiet_since = now
+
+    def check(self, now: float) -> Optional[str]:
+        """The end reason once a limit is hit, else None."""
+        lim = self.limits
+        if lim.max_duration_s and now - self.started_at >= lim.max_duration_s:
+            return "max_duration"
+        if lim.silence_timeout_s and self.quiet_since is not None and now - self.quiet_since >= lim.silence_timeout_s:
+            return "silence_timeout"
+        return None
@@ -0,0 +1,308 @@
+"""What a finished call achieved, read from its transcript with deterministic rules.
+
+The scripts in backend/prompts.py pitch a short session with an SME, confirm
+the prospect's email and handle a fixed set of objections. ``extract`` walks
+a call's transcript (backend/transcripts.py) and records:
+
+- ``result``: ``booked`` when the prospect agreed to a meeting the agent asked
+  for, or the agent confirmed a follow-up; ``declined`` on a firm no;
+  ``callback`` when the prospect asked to be called another time;
+  ``undecided`` when there was a conversation but none of those, and
+  ``no_conversation`` when the prospect never spoke. The last decision in
+  the call wins, so "not interested... well, OK, Tuesday works" is booked.
+  A yes walked back in the same turn ("Okay, I don't think so") is not
+  agreement, and a reply opening with "no" to a meeting ask is a decline.
+  A turn asking to be called back ("Sure. Can you call me back tomorrow?")
+  is a callback, not a yes or no to the meeting.
+  tests/test_call_outcomes.py holds sample calls with their expected results.
+- ``email``: the address the agent read back, whether the prospect
+  confirmed it, and the correction if they gave another one (spoken forms
+  like "jane dot doe at acme dot com" included).
+- ``callback``: the phrase the prospect used ("tomorrow morning"). ``at`` is
+  set only for relative times ("in two hours"); anything else depends on
+  the lead's time zone.
+- ``objections``: the categories raised (see ``OBJECTIONS``).
+
+Rules are versioned (``RULES_VERSION``); calls extracted by older rules are
+redone. The controller extracts its own calls as they finish, in a
+one-process pool off its watcher thread. Stored calls are backfilled with:
+
+    python -m backend.call_outcomes --workers 8              # calls not yet extracted (or by older rules)
+    python -m backend.call_outcomes --workers 8 --redo       # every finished call
+    python -m backend.call_outcomes --transcript path/to/<call id>.jsonl   # print one extraction
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend import transcripts
+
+RULES_VERSION = 3
+RESULTS = ("booked", "declined", "callback", "undecided", "no_conversation")
+UNFINISHED_GRACE_S = 60.0  # a transcript without its end record is taken as final this long after the call
+
+_WEEKDAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_NUM = r"(?:\d+|an?|one|two|three|four|five|a couple of|a few)"
+_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "a couple of": 2, "a few": 3}
+_UNIT_S = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def _rx(*alternatives: str) -> "re.Pattern[str]":
+    return re.compile("|".join(f"(?:{a})" for a in alternatives), re.IGNORECASE)
+
+
+OBJECTIONS = {
+    "budget": _rx(r"\bbudget", r"\btoo expensive\b", r"\bcan'?t afford\b", r"\bno money\b", r"\bfunding\b",
+                  r"\bcosts? too much\b"),
+    "timing": _rx(r"\b(?:too|really|very|pretty) busy\b", r"\b(?:i'?m|we'?re) busy\b", r"\bbad time\b",
+                  r"\bnot (?:a good|the right) time\b", r"\bin the middle of\b", r"\bin a meeting\b",
+                  r"\bnot right now\b", r"\bnext (?:quarter|year)\b"),
+    "not_interested": _rx(r"\bnot interested\b", r"\bdon'?t (?:really )?need (?:it|this|that|anything)\b",
+                          r"\bno need\b"),
+    "competitor": _rx(r"\bwe (?:already )?use\b", r"\bwe went with\b", r"\balready (?:have|use|using)\b",
+                      r"\bour (?:current|existing) (?:tool|system|solution|vendor|platform)\b",
+                      r"\b(?:tableau|power ?bi|looker|qlik|cognos|obiee|oracle analytics|oac)\b"),
+    "trust": _rx(r"\bsales call\b", r"\bhow did you get (?:my|this) (?:number|info|details)\b", r"\bscam\b",
+                 r"\bspam\b", r"\btelemarket"),
+    "send_info": _rx(r"\bsend (?:me )?(?:some |an? |the )?(?:info|information|details|overview|something|email)\b",
+                     r"\bemail me\b", r"\bjust email\b"),
+    "authority": _rx(r"\bnot (?:the )?(?:right|best) person\b", r"\bnot my (?:call|decision|department|area)\b",
+                     r"\b(?:talk|speak) (?:to|with) (?:my|our) (?:boss|manager|director|team|it)\b",
+                     r"\bnot (?:the )?decision[- ]maker\b"),
+}
+
+_MEETING_ASK = _rx(r"\b(?:schedule|set up|book|arrange|pencil)\b.{0,60}\b(?:session|meeting|call|conversation|demo|time)\b",
+                   r"\b(?:15|fifteen)[- ]min", r"\bwould (?:that|next week|the week after|" + _WEEKDAY + r").{0,40}\bwork\b",
+                   r"\b(?:morning|afternoon) (?:work|be) better\b")
+_YES = _rx(r"^\W*(?:yes|yeah|yep|yup|sure|ok(?:ay)?|absolutely|definitely|of course|fine|why not|perfect|great)\b",
+           r"\bsounds good\b", r"\bthat works\b", r"\bworks for me\b", r"\blet'?s do (?:it|that)\b",
+           r"\b(?:i'?m|i am) (?:in|open to (?:it|that))\b", r"\b" + _WEEKDAY + r"(?: (?:morning|afternoon))? (?:works|is fine|is good)\b")
+# A yes followed by a refusal in the same turn ("Okay, I don't think so") is not a yes
+_NEGATION = _rx(r"\bdon'?t\b(?! mind)", r"\bdo not\b", r"\bnot\b(?! (?:a problem|an issue|at all))",
+                r"\bno,? thanks?\b", r"\bno,? thank you\b", r"\bcan'?t\b", r"\bwon'?t\b", r"\bnever\b")
+# A bare "no" is a decline when it answers a meeting ask
+_BARE_NO = re.compile(r"^\W*(?:no|nope|nah)\b(?!\W*(?:problem|worries|doubt))", re.IGNORECASE)
+_DECLINE = _rx(r"\bnot interested\b", r"\bno,? thanks?\b", r"\bno,? thank you\b", r"\bi don'?t think so\b",
+               r"\bdon'?t call\b", r"\bstop calling\b", r"\bremove (?:me|my|us)\b", r"\btake (?:me|us) off\b", r"\bdo not call\b",
+               r"\bwe'?re (?:all )?set\b", r"\bwe'?re good\b", r"\bnot a (?:good )?fit\b",
+               r"\bdon'?t (?:really )?need (?:it|this|that)\b", r"\bi'?ll pass\b")
+_BOOKED_CLOSE = _rx(r"\byou'?ll hear from (?:our|the|my) team\b",
+                    r"\b(?:team member|our team|our expert|the sme|someone)\b.{0,40}\bwill (?:follow up|reach out|be in touch)\b",
+                    r"\bcalendar invit", r"\b(?:i'?ve|i have|we'?ve|you'?re) (?:booked|scheduled|all set for)\b")
+_CALLBACK_ASK = _rx(r"\bcall (?:me |us )?back\b", r"\b(?:try|call|reach) (?:me |us )?(?:again|later)\b",
+                    r"\bcall me (?:tomorrow|next|on|later|in|at|after)\b",
+                    r"\b(?:reach out|follow up|get back to me) (?:later|next|tomorrow|on|in|after)\b",
+                    r"\b(?:better|good) time (?:would be|is)\b")
+# "Don't call me back" asks for no call at all
+_NO_CALL = _rx(r"\bdon'?t (?:\w+ )?call\b", r"\bdo not (?:\w+ )?call\b", r"\bnever call\b", r"\bstop calling\b")
+_CALLBACK_OFFER = _rx(r"\bcall (?:you )?back\b", r"\b(?:tomorrow|later today)\b.{0,30}\bbetter\b",
+                      r"\bbetter time\b")
+_WHEN = _rx(r"\bin " + _NUM + r" (?:minute|hour|day|week)s?\b", r"\blater (?:today|this (?:morning|afternoon|week))\b",
+            r"\bthis (?:morning|afternoon|evening)\b", r"\btonight\b", r"\btomorrow(?: (?:morning|afternoon|evening))?\b",
+            r"\bnext (?:week|month|" + _WEEKDAY + r")\b", r"\b(?:on )?" + _WEEKDAY + r"(?: (?:morning|afternoon|evening))?\b",
+            r"\bat \d{1,2}(?::\d{2})? ?(?:am|pm|a\.m\.|p\.m\.|o'?clock)?", r"\bend of (?:the )?(?:day|week)\b",
+            r"\bafter (?:lunch|\d{1,2}(?::\d{2})? ?(?:am|pm)?)\b", r"\bin the (?:morning|afternoon|evening)\b")
+_RELATIVE = re.compile(r"\bin (" + _NUM + r") (minute|hour|day|week)s?\b", re.IGNORECASE)
+_EMAIL = re.compile(r"[a-z0-9][a-z0-9._%+-]*@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}")
+_SPOKEN_EMAIL = re.compile(r"\bdot (?:com|net|org|io|co|us|ai|biz|edu)\b|@", re.IGNORECASE)
+_EMAIL_CONFIRM = _rx(r"\bcorrect\b", r"\bright\b", r"\bstill (?:the best|good)\b", r"\bconfirm\b")
+
+
+def _agrees(text: str) -> bool:
+    m = _YES.search(text)
+    return m is not None and not _NEGATION.search(text, m.end())
+
+
+def emails_in(text: str) -> List[str]:
+    """Addresses in a line, written ("jane.doe@acme.com") or spoken ("jane dot doe at acme dot com")."""
+    if not _SPOKEN_EMAIL.search(text):
+        return []
+    s = text.lower()
+    s = re.sub(r"\s+(?:at|@)\s+", "@", s)
+    s = re.sub(r"\s*\b(?:dot|period)\b\s*", ".", s)
+    s = re.sub(r"\s*\bunderscore\b\s*", "_", s)
+    s = re.sub(r"\s*\b(?:dash|hyphen)\b\s*", "-", s)
+    return [e.rstrip(".") for e in _EMAIL.findall(s)]
+
+
+def _turns(records: Sequence[Dict[str, Any]]) -> List[Tuple[str, str, float]]:
+    return [(r["role"], str(r.get("text") or ""), float(r.get("ts") or 0.0))
+            for r in records if r.get("role") in ("user", "agent") and r.get("text")]
+
+
+def _relative_at(phrase: str, ts: float) -> Optional[float]:
+    m = _RELATIVE.search(phrase)
+    if not m:
+        return None
+    count = m.group(1).lower()
+    n = int(count) if count.isdigit() else _NUMBERS.get(count, 1)
+    return round(ts + n * _UNIT_S[m.group(2).lower()])
+
+
+def extract(records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Outcome of one call from its transcript records (oldest first)."""
+    turns = _turns(records)
+    decisions: List[str] = []
+    objections = set()
+    email: Optional[Dict[str, Any]] = None
+    callback: Optional[Dict[str, Any]] = None
+    last_agent = ""
+    since_ask = 99  # user turns since the agent last asked for a meeting
+    since_offer = 99  # user turns since the agent offered to call back
+    since_email = 99  # user turns since the agent read the email back
+    for role, text, ts in turns:
+        if role == "agent":
+            last_agent = text
+            if _MEETING_ASK.search(text):
+                since_ask = 0
+            if _CALLBACK_OFFER.search(text):
+                since_offer = 0
+            found = emails_in(text)
+            if found and _EMAIL_CONFIRM.search(text) and email is None:
+                email = {"on_file": found[0], "confirmed": None, "corrected_to": None}
+                since_email = 0
+            elif found and email is not None and since_email <= 3 and found[-1] != email["on_file"]:
+                email["corrected_to"] = found[-1]  # the agent read back a correction
+            if _BOOKED_CLOSE.search(text) and decisions[-1:] != ["declined"]:
+                decisions.append("booked")
+            continue
+        since_ask += 1
+        since_offer += 1
+        since_email += 1
+        objections.update(name for name, rx in OBJECTIONS.items() if rx.search(text))
+        offered = since_offer <= 1
+        # "Call me back tomorrow", or a time (or just "sure") in answer to the agent offering a callback
+        when = _WHEN.search(text) or (_WHEN.search(last_agent) if offered and _agrees(text) else None)
+        asked_callback = bool(_CALLBACK_ASK.search(text)) and not _NO_CALL.search(text)
+        if asked_callback or (offered and when):
+            phrase = when.group(0).strip() if when else None
+            callback = {"when": phrase, "at": _relative_at(phrase, ts) if phrase else None, "said": text}
+            decisions.append("callback")
+        if asked_callback:
+            pass  # "Sure, call me back tomorrow" puts the meeting off rather than answering it
+        elif _DECLINE.search(text) or (since_ask <= 2 and not offered and _BARE_NO.search(text)):
+            decisions.append("declined")
+        elif since_ask <= 2 and not offered and _agrees(text):
+            decisions.append("booked")
+        if email is not None and since_email <= 3:
+            found = emails_in(text)
+            if found and found[-1] != email["on_file"]:
+                email["corrected_to"] = found[-1]
+                email["confirmed"] = False
+            elif since_email == 1 and email["confirmed"] is None:
+                if _agrees(text) or re.search(r"\b(?:correct|that'?s (?:it|right|me))\b", text, re.IGNORECASE):
+                    email["confirmed"] = True
+                elif re.search(r"^\W*no\b|\bactually\b|\bwrong\b|\bnot (?:quite|right|correct)\b", text, re.IGNORECASE):
+                    email["confirmed"] = False
+    spoke = any(role == "user" for role, _, _ in turns)
+    result = decisions[-1] if decisions else ("undecided" if spoke else "no_conversation")
+    return {
+        "result": result,
+        "email": email,
+        "callback": callback,
+        "objections": sorted(objections),
+        "turns": len(turns),
+        "rules": RULES_VERSION,
+    }
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+
+def extract_batch(calls: Sequence[Tuple[str, Optional[float]]], directory: str,
+                  now: float) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Process-pool task: (call id, result, extraction JSON) for each (call id, ended_at) that is ready.
+
+    Calls without a transcript get (id, None, None) so they are not looked at
+    again. A call that ended moments ago with a missing or unfinished
+    transcript is skipped until the agent's writer has caught up.
+    """
+    out: List[Tuple[str, Optional[str], Optional[str]]] = []
+    for call_id, ended_at in calls:
+        records = transcripts.read_transcript(Path(directory), call_id)
+        complete = records is not None and any(r.get("event") == "end" for r in records)
+        if not complete and now - (ended_at or 0.0) < UNFINISHED_GRACE_S:
+            continue
+        if records is None:
+            out.append((call_id, None, None))
+            continue
+        found = extract(records)
+        found["complete"] = complete
+        out.append((call_id, found["result"], json.dumps(found, ensure_ascii=False)))
+    return out
+
+
+def pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: the controller forks this from a threaded process, which fork can deadlock
+    return ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+
+
+def backfill(workers: int = 4, redo: bool = False, batch: int = 200, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Extract every finished call that needs it, ``workers`` processes at a time; writes as batches finish."""
+    from backend.app import state
+
+    directory = str(transcripts.transcript_dir())
+    started = time.time()
+    counts: Dict[str, int] = {}
+    scanned = written = 0
+    after: Optional[Tuple[float, str]] = None
+    with pool(workers) as executor:
+        pending = []
+        while True:
+            calls = state.calls_to_extract(RULES_VERSION, limit=batch, after=after, redo=redo, ended_before=started)
+            if limit is not None:
+                calls = calls[:max(0, limit - scanned)]
+            if not calls:
+                break
+            after = (calls[-1]["ended_at"], calls[-1]["id"])
+            scanned += len(calls)
+            pending.append(executor.submit(extract_batch, [(c["id"], c["ended_at"]) for c in calls], directory, started))
+            # Keep a couple of batches queued per worker; write results as they come back
+            while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                rows = pending.pop(0).result()
+                state.record_extractions(rows, RULES_VERSION)
+                written += len(rows)
+                for _, result, _ in rows:
+                    counts[result or "no_transcript"] = counts.get(result or "no_transcript", 0) + 1
+        for fut in pending:
+            rows = fut.result()
+            state.record_extractions(rows, RULES_VERSION)
+            written += len(rows)
+            for _, result, _ in rows:
+                counts[result or "no_transcript"] = counts.get(result or "no_transcript", 0) + 1
+    elapsed = time.time() - started
+    return {"scanned": scanned, "written": written, "results": dict(sorted(counts.items())),
+            "seconds": round(elapsed, 2), "calls_per_s": round(written / elapsed, 1) if elapsed else None}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extract call outcomes from stored transcripts")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--redo", action="store_true", help="re-extract calls that already have an outcome")
+    parser.add_argument("--batch", type=int, default=200, help="calls per pool task")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--transcript", default=None, help="print the extraction of one transcript file instead")
+    args = parser.parse_args()
+    if args.transcript:
+        path = Path(args.transcript)
+        records = transcripts.read_transcript(path.parent, path.name.removesuffix(".jsonl").split("~")[0])
+        if records is None:
+            parser.error(f"no transcript at {path}")
+        print(json.dumps(extract(records), indent=2))
+        return 0
+    print(json.dumps(backfill(args.workers, args.redo, max(1, args.batch), args.limit), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Connect-likelihood scores for leads from past call outcomes.
+
+Every finished call adds one attempt (and one connect if a person picked up)
+to a few counters, keyed by lead attribute and the lead's local hour at dial
+time: the overall rate for that hour, and the rate for the lead's timezone,
+job title and company in that hour. Nothing is refit; a call is just a
+handful of counter increments.
+
+A lead's score for a given moment is a naive-Bayes style combination of
+those rates in log-odds: the hour's base rate, shifted by how much each of
+its attributes connects above or below that base. Every rate is shrunk
+toward its parent (attribute -> hour base -> overall) with ``PRIOR_STRENGTH``
+pseudo-attempts, so values seen on a few calls barely move the score and an
+empty history scores every lead the same (CSV order is kept).
+
+Scoring a whole list groups leads by attribute value, so each distinct
+(attribute, value, hour) rate is computed once per pass whatever the list
+size.
+
+    python -m backend.lead_scoring --csv backend/testt.csv --top 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+FEATURES = ("timezone", "job_title", "company_name")
+BASE = "*"  # feature name of the per-hour base counters
+
+PRIOR_STRENGTH = float(os.getenv("LEAD_SCORING_PRIOR", "20") or 20)
+DEFAULT_RATE = 0.25  # prior connect rate before any call was recorded
+
+Key = Tuple[str, str, int]  # (feature, value, local hour)
+
+
+@lru_cache(maxsize=512)
+def _zone(name: str):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        return timezone.utc
+
+
+def local_hour(tz_name: Optional[str], when: float) -> int:
+    """Hour of day (0-23) at ``when`` in the lead's timezone; UTC if unknown."""
+    return datetime.fromtimestamp(when, _zone((tz_name or "").strip() or "UTC")).hour
+
+
+def feature_values(lead: Dict[str, Any]) -> Tuple[str, ...]:
+    """Normalized attribute values of a lead, in FEATURES order."""
+    return tuple(" ".join(str(lead.get(f) or "").lower().split()) for f in FEATURES)
+
+
+def _logit(p: float) -> float:
+    p = min(max(p, 1e-4), 1 - 1e-4)
+    return math.log(p / (1 - p))
+
+
+class ScoreModel:
+    """Connect counters and the scores derived from them."""
+
+    def __init__(self, prior_strength: float = PRIOR_STRENGTH) -> None:
+        self.prior = prior_strength
+        self.counts: Dict[Key, List[int]] = {}  # key -> [attempts, connects]
+
+    def load(self, rows: Iterable[Tuple[str, str, int, int, int]]) -> "ScoreModel":
+        """Replace counters with (feature, value, hour, attempts, connects) rows."""
+        for feature, value, hour, attempts, connects in rows:
+            self.counts[(feature, value, int(hour))] = [int(attempts), int(connects)]
+        return self
+
+    @staticmethod
+    def keys_for(lead: Dict[str, Any], hour: int) -> List[Key]:
+        """Counters one call to ``lead`` at local ``hour`` touches."""
+        keys = [(BASE, "", hour)]
+        keys.extend((f, v, hour) for f, v in zip(FEATURES, feature_values(lead)) if v)
+        return keys
+
+    def add(self, lead: Dict[str, Any], hour: int, connected: bool) -> List[Key]:
+        """Count one finished call; returns the counters it changed."""
+        keys = self.keys_for(lead, hour)
+        for key in keys:
+            c = self.counts.setdefault(key, [0, 0])
+            c[0] += 1
+            c[1] += int(connected)
+        return keys
+
+    @property
+    def calls(self) -> int:
+        return sum(c[0] for k, c in self.counts.items() if k[0] == BASE)
+
+    def _overall(self) -> float:
+        attempts = connects = 0
+        for (feature, _, _), (a, c) in self.counts.items():
+            if feature == BASE:
+                attempts += a
+                connects += c
+        return (connects + self.prior * DEFAULT_RATE) / (attempts + self.prior)
+
+    def _rate(self, key: Key, prior: float) -> float:
+        a, c = self.counts.get(key, (0, 0))
+        return (c + self.prior * prior) / (a + self.prior)
+
+    def score_many(self, leads: Sequence[Dict[str, Any]], when: float) -> List[float]:
+        """Connect probability of each lead if dialed at ``when``."""
+        overall = self._overall()
+        base_cache: Dict[int, Tuple[float, float]] = {}  # hour -> (base rate, its logit)
+        shift_cache: Dict[Key, float] = {}  # (feature, value, hour) -> log-odds shift
+        hour_cache: Dict[str, int] = {}
+        out: List[float] = []
+        for lead in leads:
+            tz_name = (lead.get("timezone") or "").strip()
+            hour = hour_cache.get(tz_name)
+            if hour is None:
+                hour = hour_cache[tz_name] = local_hour(tz_name, when)
+            base = base_cache.get(hour)
+            if base is None:
+                rate = self._rate((BASE, "", hour), overall)
+                base = base_cache[hour] = (rate, _logit(rate))
+            logit = base[1]
+            for feature, value in zip(FEATURES, feature_values(lead)):
+                if not value:
+                    continue
+                key = (feature, value, hour)
+                shift = shift_cache.get(key)
+                if shift is None:
+                    shift = shift_cache[key] = _logit(self._rate(key, base[0])) - base[1]
+                logit += shift
+            out.append(1.0 / (1.0 + math.exp(-logit)))
+        return out
+
+    def explain(self, lead: Dict[str, Any], when: float) -> Dict[str, Any]:
+        """Score of one lead with the counters behind it."""
+        hour = local_hour(lead.get("timezone"), when)
+        parts = []
+        for key in self.keys_for(lead, hour):
+            a, c = self.counts.get(key, (0, 0))
+            parts.append({"feature": key[0], "value": key[1], "attempts": a, "connects": c})
+        return {"local_hour": hour, "score": round(self.score_many([lead], when)[0], 4), "counters": parts}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score a lead list from the controller's call counters")
+    parser.add_argument("--csv", required=True)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--at", type=float, default=None, help="epoch seconds to score for (default: now)")
+    args = parser.parse_args()
+    import csv
+    import time
+    from backend.app import state
+    with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
+        leads = list(csv.DictReader(f))
+    model = ScoreModel().load(state.score_counts())
+    when = args.at or time.time()
+    scores = model.score_many(leads, when)
+    ranked = sorted(range(len(leads)), key=lambda i: (-scores[i], i))[:args.top]
+    print(json.dumps({"calls": model.calls, "top": [
+        {"lead_index": i + 1, "prospect_name": leads[i].get("prospect_name"), "score": round(scores[i], 4)}
+        for i in ranked]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
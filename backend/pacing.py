@@ -0,0 +1,192 @@
+"""Predictive pacing: how many dials to start so live conversations stay near a target.
+
+With one dial per available conversation slot, slots sit idle while lines
+ring out. In predictive mode the controller keeps more dials in flight than
+``target_live``, sized from each campaign's rolling answer rate and handle
+time, and stops overdialing as soon as the predicted abandonment rate (a
+prospect answers while every conversation slot is busy) would exceed
+``max_abandon_rate``.
+
+The controller only learns a call's outcome when the agent exits, so each
+active call is weighted by the probability that it has been or will be
+answered given how long it has been running: past the point where almost
+every unanswered line has rung out, a running call is almost certainly a
+conversation (``answer_probability``). New dials are answered within about
+``ring_s``, and by then some conversations have ended, so each active call
+counts only with the probability that it still holds a slot while they do,
+from the campaign's handle time (``live_probability``). The number of
+slots taken by active lines plus answers among ``k`` new dials is then
+Poisson-binomial; ``k`` is the largest value whose expected overflow past
+``target_live``, as a share of the answers the new dials bring, stays under
+the cap.
+
+Campaign setting ``pacing`` (JSON):
+
+    {"mode": "predictive", "target_live": 2, "max_abandon_rate": 0.03, "window": 200, "min_samples": 20}
+
+``backend/tools/dialer_sim.py`` replays this policy in a discrete-event
+simulation against fixed one-dial-per-slot pacing.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+MODES = ("fixed", "predictive")
+
+# Outcomes in which a person picked up and held a conversation slot (backend/retry_policy.py)
+CONNECTED_OUTCOMES = frozenset({"completed", "hung_up", "silence_timeout", "max_duration"})
+# Outcomes that say nothing about whether the line would have answered
+IGNORED_OUTCOMES = frozenset({"interrupted", "unknown"})
+
+DEFAULT_RING_S = 30.0
+DEFAULT_AHT_S = 120.0
+
+
+class PacingConfig(NamedTuple):
+    mode: str = "fixed"
+    target_live: int = 1
+    max_abandon_rate: float = 0.03
+    window: int = 200
+    min_samples: int = 20
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "PacingConfig":
+        """Campaign pacing settings over the defaults; raises ValueError if invalid."""
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("pacing must be an object")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"unknown pacing fields: {', '.join(sorted(unknown))}")
+        cfg = cls(**data)
+        cfg = cfg._replace(target_live=int(cfg.target_live), window=int(cfg.window),
+                           min_samples=int(cfg.min_samples), max_abandon_rate=float(cfg.max_abandon_rate))
+        if cfg.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if cfg.target_live < 1:
+            raise ValueError("target_live must be at least 1")
+        if not 0.0 <= cfg.max_abandon_rate < 1.0:
+            raise ValueError("max_abandon_rate must be in [0, 1)")
+        if cfg.window < 1 or cfg.min_samples < 0:
+            raise ValueError("window must be positive and min_samples not negative")
+        return cfg
+
+
+class CallStats(NamedTuple):
+    samples: int
+    answer_rate: float
+    aht_s: float   # mean length of connected calls, ring time included
+    ring_s: float  # 90th percentile length of unanswered calls
+    ring_durations: Tuple[float, ...] = ()  # sorted lengths of unanswered calls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"samples": self.samples, "answer_rate": round(self.answer_rate, 4),
+                "aht_s": round(self.aht_s, 1), "ring_s": round(self.ring_s, 1)}
+
+
+def estimate(rows: Iterable[Tuple[Optional[str], Optional[float]]]) -> CallStats:
+    """Rolling estimates from the most recent (outcome, duration_s) pairs of a campaign."""
+    answered: List[float] = []
+    unanswered: List[float] = []
+    for outcome, duration in rows:
+        if not outcome or outcome in IGNORED_OUTCOMES or duration is None:
+            continue
+        (answered if outcome in CONNECTED_OUTCOMES else unanswered).append(max(0.0, float(duration)))
+    n = len(answered) + len(unanswered)
+    unanswered.sort()
+    return CallStats(
+        samples=n,
+        answer_rate=len(answered) / n if n else 0.0,
+        aht_s=sum(answered) / len(answered) if answered else DEFAULT_AHT_S,
+        ring_s=unanswered[min(len(unanswered) - 1, int(0.9 * len(unanswered)))] if unanswered else DEFAULT_RING_S,
+        ring_durations=tuple(unanswered),
+    )
+
+
+def answer_probability(elapsed: float, stats: CallStats) -> float:
+    """P(answered | still running after ``elapsed`` seconds), from the ring-out times seen so far.
+
+    Answered calls outlast the ring phase, so only unanswered lines thin out:
+    p / (p + (1 - p) * share of unanswered calls that rang longer than ``elapsed``).
+    """
+    p = stats.answer_rate
+    if stats.ring_durations:
+        still_ringing = (len(stats.ring_durations) - bisect.bisect_right(stats.ring_durations, elapsed)) \
+            / len(stats.ring_durations)
+    else:
+        still_ringing = 1.0 if elapsed <= stats.ring_s else 0.0
+    denom = p + (1.0 - p) * still_ringing
+    return p / denom if denom > 0 else 1.0
+
+
+def slot_survival(stats: CallStats) -> float:
+    """Chance a conversation going now is still up when new dials answer, some time within ``ring_s``.
+
+    Handle times are taken as exponential with mean ``aht_s``; averaged over
+    the ring window that is aht_s / ring_s * (1 - exp(-ring_s / aht_s)).
+    """
+    ring, aht = stats.ring_s, stats.aht_s
+    if aht <= 0:
+        return 0.0
+    if ring <= 0:
+        return 1.0
+    return aht / ring * (1.0 - math.exp(-ring / aht))
+
+
+def live_probability(elapsed: float, stats: CallStats) -> float:
+    """P(a call running for ``elapsed`` seconds holds a conversation slot when new dials answer).
+
+    It must be (or become) a conversation (``answer_probability``) and still
+    be going then (``slot_survival``).
+    """
+    return answer_probability(elapsed, stats) * slot_survival(stats)
+
+
+def _overflow(dist: List[float], expected: float, slots: int) -> float:
+    """E[max(0, X - slots)] from P(X = x) for x < slots and E[X]."""
+    below = sum(x * px for x, px in enumerate(dist))
+    return max(0.0, expected - below - slots * (1.0 - sum(dist)))
+
+
+def _add_line(dist: List[float], q: float) -> List[float]:
+    """Fold one more line answering with probability ``q`` into P(X = x), x < len(dist)."""
+    out = [d * (1.0 - q) for d in dist]
+    for x in range(1, len(dist)):
+        out[x] += dist[x - 1] * q
+    return out
+
+
+def dials_to_start(cfg: PacingConfig, stats: CallStats, active: Sequence[float], capacity: int) -> Tuple[int, float]:
+    """New dials to start now and the abandonment rate predicted with them.
+
+    ``active`` holds, for every call in flight, the probability that it still
+    holds a conversation slot once new dials answer (see ``live_probability``)
+    and ``capacity`` how many more calls may be
+    started at all (dial slots). Fixed mode, or too few samples to trust the
+    estimates, keeps one call per conversation slot, which never abandons.
+    """
+    if capacity <= 0:
+        return 0, 0.0
+    if cfg.mode != "predictive" or stats.samples < cfg.min_samples or stats.answer_rate <= 0.0:
+        return max(0, min(capacity, cfg.target_live - len(active))), 0.0
+    p = stats.answer_rate
+    slots = cfg.target_live
+    dist = [1.0] + [0.0] * (slots - 1)
+    expected = 0.0
+    for q in active:
+        dist = _add_line(dist, q)
+        expected += q
+    base = _overflow(dist, expected, slots)
+    best, best_rate = 0, 0.0
+    # Judge new dials by the overflow they add, per answer they bring; it only grows with k
+    for k in range(1, capacity + 1):
+        dist = _add_line(dist, p)
+        expected += p
+        rate = (_overflow(dist, expected, slots) - base) / (k * p)
+        if rate > cfg.max_abandon_rate:
+            break
+        best, best_rate = k, rate
+    return best, best_rate
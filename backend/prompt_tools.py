@@ -0,0 +1,276 @@
+"""Prompt sizing and rendering helpers shared by the agent and the web backend.
+
+Campaign scripts are sent in full as model instructions on every call, so
+their size feeds straight into time-to-first-audio. This module estimates
+token counts, renders per-lead session instructions and offers a "compact"
+prompt mode that strips markdown decoration and repeated rules.
+
+By default instructions use a prefix-stable layout: the campaign text is sent
+byte-identical on every call and lead data goes in a short suffix, so the
+model provider can reuse cached prefixes across calls.
+
+CLI:
+    python -m backend.prompt_tools                      # every built-in/generated campaign
+    python -m backend.prompt_tools --module prompts3 --csv backend/testt.csv --lead 1
+    python -m backend.prompt_tools --verify --csv backend/testt.csv   # prefix stability of real agent calls, exit 1 on failure
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+PROMPT_MODES = ("full", "compact")
+DEFAULT_PROMPT_MODE = "full"
+
+# Where per-lead values go in the session instructions (see render_session_instructions)
+PROMPT_LAYOUTS = ("prefix_stable", "inline")
+DEFAULT_PROMPT_LAYOUT = "prefix_stable"
+
+PLACEHOLDERS = {
+    "[Prospect Name]": "prospect_name",
+    "[Resource Name]": "resource_name",
+    "[Job Title]": "job_title",
+    "[Company Name]": "company_name",
+    "[____@abc.com]": "email",
+}
+
+# Lines at least this long are treated as rules and dropped when repeated
+_MIN_DEDUPE_LEN = 24
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_EMPHASIS_RE = re.compile(r"(\*\*|__)(.+?)\1")
+_ITALIC_RE = re.compile(r"(?<![\w*])\*(?!\s)([^*\n]+?)(?<!\s)\*(?![\w*])")
+_CODE_RE = re.compile(r"`([^`\n]*)`")
+_SPACES_RE = re.compile(r"[ \t]{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough input-token estimate (~4 characters per token)."""
+    return (len(text or "") + 3) // 4
+
+
+def normalize_prompt_mode(mode: Optional[str]) -> str:
+    mode = (mode or "").strip().lower()
+    return mode if mode in PROMPT_MODES else DEFAULT_PROMPT_MODE
+
+
+def compact_prompt(text: str) -> str:
+    """Strip markdown decoration and duplicated rules; placeholders and wording are kept."""
+    out: List[str] = []
+    seen = set()
+    blank = False
+    for raw in (text or "").splitlines():
+        if _RULE_RE.match(raw):
+            continue
+        line = _HEADING_RE.sub("", raw)
+        line = _EMPHASIS_RE.sub(r"\2", line)
+        line = _ITALIC_RE.sub(r"\1", line)
+        line = _CODE_RE.sub(r"\1", line)
+        indent = len(line) - len(line.lstrip(" "))
+        line = _SPACES_RE.sub(" ", line.strip())
+        if not line:
+            blank = True
+            continue
+        key = line.lstrip("-*• ").lower()
+        if len(key) >= _MIN_DEDUPE_LEN:
+            if key in seen:
+                continue
+            seen.add(key)
+        if blank and out:
+            out.append("")
+        blank = False
+        # Keep one level of nesting so sub-bullets still read as sub-bullets
+        out.append((" " if indent >= 2 else "") + line)
+    return "\n".join(out)
+
+
+def apply_prompt_mode(text: str, mode: Optional[str]) -> str:
+    return compact_prompt(text) if normalize_prompt_mode(mode) == "compact" else (text or "")
+
+
+def compile_template(text: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Split a script into (literal, lead_field) segments at the known bracket placeholders."""
+    parts: List[Tuple[str, Optional[str]]] = []
+    rest = text or ""
+    while True:
+        hits = [(rest.find(ph), ph) for ph in PLACEHOLDERS if ph in rest]
+        if not hits:
+            parts.append((rest, None))
+            return tuple(parts)
+        pos, ph = min(hits)
+        parts.append((rest[:pos], None))
+        parts.append((ph, PLACEHOLDERS[ph]))
+        rest = rest[pos + len(ph):]
+
+
+def render_template(compiled: Tuple[Tuple[str, Optional[str]], ...], lead: Dict[str, str]) -> str:
+    """Fill a compiled template; placeholders whose lead value is empty are left as-is."""
+    out: List[str] = []
+    for text, field in compiled:
+        value = lead.get(field) if field else None
+        out.append(value if value else text)
+    return "".join(out)
+
+
+def lead_context(lead: Dict[str, str]) -> str:
+    """Structured lead block the model can reference (inline layout preface)."""
+    return (
+        f"Lead Context:\n"
+        f"- Prospect Name: {lead.get('prospect_name','')}\n"
+        f"- Job Title: {lead.get('job_title','')}\n"
+        f"- Company: {lead.get('company_name','')}\n"
+        f"- Email: {lead.get('email','')}\n"
+        f"- Phone: {lead.get('phone','')}\n"
+        f"- Timezone: {lead.get('timezone','')}\n"
+        f"- Caller (Resource Name): {lead.get('resource_name','')}\n\n"
+    )
+
+
+def lead_suffix(lead: Dict[str, str]) -> str:
+    """Per-lead block appended after the unchanged campaign script (prefix-stable layout)."""
+    lines = [
+        "",
+        "",
+        "Lead Context (use these values wherever the script shows the bracketed placeholder):",
+    ]
+    for placeholder, field in PLACEHOLDERS.items():
+        lines.append(f"- {placeholder}: {lead.get(field, '')}")
+    lines.append(f"- Phone: {lead.get('phone', '')}")
+    lines.append(f"- Timezone: {lead.get('timezone', '')}")
+    return "\n".join(lines) + "\n"
+
+
+def normalize_prompt_layout(layout: Optional[str]) -> str:
+    layout = (layout or os.getenv("PROMPT_LAYOUT", "")).strip().lower()
+    return layout if layout in PROMPT_LAYOUTS else DEFAULT_PROMPT_LAYOUT
+
+
+def render_session_instructions(compiled: Tuple[Tuple[str, Optional[str]], ...], lead: Optional[Dict[str, str]],
+                                layout: Optional[str] = None) -> str:
+    """Session instructions for one call.
+
+    - prefix_stable: the campaign script byte-for-byte, then a small lead suffix,
+      so every call for a campaign shares the same instruction prefix and
+      provider-side prefix/context caching can apply
+    - inline: lead context preface plus the script with placeholders substituted
+    """
+    if not lead:
+        return render_template(compiled, {})
+    if normalize_prompt_layout(layout) == "prefix_stable":
+        return render_template(compiled, {}) + lead_suffix(lead)
+    return lead_context(lead) + render_template(compiled, lead)
+
+
+def verify_prefix_stability(module: str, leads: List[Dict[str, str]], prompt_mode: Optional[str] = None) -> Dict[str, Any]:
+    """Run the agent's entrypoint offline for every lead and check the calls share the campaign prefix byte for byte.
+
+    Each stream is what backend.agent actually hands the model (agent
+    instructions, then the session instructions it renders for the lead), via
+    the offline fakes in backend.tools.offline, so a change to how the
+    entrypoint assembles instructions shows up here. The layout is the
+    agent's own (PROMPT_LAYOUT). Needs at least two leads.
+    """
+    import asyncio
+
+    from backend import agent
+    from backend.tools import offline
+
+    offline.use_offline_fakes()
+    selection = offline.campaign_selection(module)
+    agent_text, _, compiled = agent._cached_campaign_prompts(selection[0], selection[1], selection[2], prompt_mode)
+    static = ((agent_text or "") + "\n" + render_template(compiled, {})).encode("utf-8")
+    streams: List[bytes] = []
+    for i, lead in enumerate(leads, start=1):
+        session = asyncio.run(offline.run_call(i, module, prompt_mode, room_name=f"verify-{i}", lead=lead))
+        streams.append(session.instructions.encode("utf-8"))
+    common = len(os.path.commonprefix(streams)) if streams else 0
+    failures = [i for i, stream in enumerate(streams, start=1) if not stream.startswith(static)]
+    return {
+        "layout": normalize_prompt_layout(None),
+        "stable": len(streams) >= 2 and not failures and common >= len(static),
+        "leads_checked": len(streams),
+        "unstable_leads": failures[:20],
+        "common_prefix_bytes": common,
+        "campaign_prefix_bytes": len(static),
+        "prefix_tokens": (len(static) + 3) // 4,
+        "max_suffix_tokens": (max((len(s) - common for s in streams), default=0) + 3) // 4,
+    }
+
+
+def prompt_report(agent_text: str, session_text: str, lead: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Estimated tokens per prompt mode for one campaign (and one rendered lead, if given)."""
+    report: Dict[str, Any] = {}
+    for mode in PROMPT_MODES:
+        agent_m = apply_prompt_mode(agent_text, mode)
+        session_m = apply_prompt_mode(session_text, mode)
+        entry = {
+            "agent_tokens": estimate_tokens(agent_m),
+            "session_tokens": estimate_tokens(session_m),
+            "total_tokens": estimate_tokens(agent_m) + estimate_tokens(session_m),
+            "chars": len(agent_m) + len(session_m),
+        }
+        if lead:
+            rendered = render_session_instructions(compile_template(session_m), lead)
+            entry["rendered_session_tokens"] = estimate_tokens(rendered)
+            entry["rendered_total_tokens"] = estimate_tokens(agent_m) + estimate_tokens(rendered)
+        report[mode] = entry
+    full, compact = report["full"]["total_tokens"], report["compact"]["total_tokens"]
+    report["compact_savings_pct"] = round(100.0 * (full - compact) / full, 1) if full else 0.0
+    return report
+
+
+def _load_module_prompts(module_name: str) -> Tuple[str, str]:
+    mod = importlib.import_module(module_name)
+    return (str(getattr(mod, "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS", "") or ""),
+            str(getattr(mod, "SESSION_INSTRUCTION", "") or ""))
+
+
+def main() -> None:
+    from backend.agent import _normalize_prompt_module, _prompt_modules_on_disk, _read_leads
+
+    parser = argparse.ArgumentParser(description="Report estimated prompt tokens per campaign")
+    parser.add_argument("--module", default=None, help="prompt module, e.g. prompts3 (default: all)")
+    parser.add_argument("--csv", default=None, help="leads CSV for a rendered-lead estimate")
+    parser.add_argument("--lead", type=int, default=1, help="1-based lead index within --csv")
+    parser.add_argument("--verify", action="store_true",
+                        help="run the agent for each lead in --csv and assert every campaign keeps a byte-identical prefix")
+    parser.add_argument("--layout", choices=PROMPT_LAYOUTS, default=None, help="layout to verify (default: PROMPT_LAYOUT)")
+    args = parser.parse_args()
+    if args.verify:
+        # The agent reads these when it renders a call; this CLI runs one call at a time
+        if args.layout:
+            os.environ["PROMPT_LAYOUT"] = args.layout
+        for knob in ("FAKE_MODEL_FIRST_TEXT_MS", "FAKE_MODEL_FIRST_AUDIO_MS", "FAKE_MODEL_CHUNK_MS",
+                     "FAKE_MODEL_MS_PER_1K_TOKENS"):
+            os.environ.setdefault(knob, "0")
+
+    leads = _read_leads(args.csv) if args.csv else []
+    lead = leads[args.lead - 1] if 1 <= args.lead <= len(leads) else None
+    modules = [args.module] if args.module else sorted({m for m, _, _ in _prompt_modules_on_disk()})
+    out = {}
+    stable = True
+    for module in modules:
+        name = _normalize_prompt_module(module)
+        agent_text, session_text = _load_module_prompts(name)
+        if not args.verify:
+            out[name] = prompt_report(agent_text, session_text, lead)
+            continue
+        # Synthetic leads guarantee at least two distinct ones even without a CSV
+        sample = leads if len(leads) >= 2 else leads + [{f: f"{f}-{i}" for f in PLACEHOLDERS.values()} for i in range(2)]
+        out[name] = {}
+        for mode in PROMPT_MODES:
+            result = verify_prefix_stability(name, sample, mode)
+            out[name][mode] = result
+            stable = stable and result["stable"]
+    print(json.dumps(out, indent=2))
+    if args.verify and not stable:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
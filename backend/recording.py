@@ -0,0 +1,383 @@
+"""Call recordings: both sides of a call in one compressed stereo file, encoded off the audio path.
+
+Opt in with ``CALL_RECORDINGS=1``. The agent taps the frames it hears (the
+caller, left channel) and the frames it plays (the agent, right channel) and
+pushes a copy of each into the call's ``AudioRing``. The ring is a bounded
+buffer that never blocks. When it is full the frame is dropped and counted as
+an overrun; the call is never stalled. One writer thread per process drains
+every call's ring twice a second and lays both sides on a 16 kHz timeline by
+arrival time. It streams that timeline to one ``ffmpeg`` process per call,
+which encodes ``RECORDING_FORMAT`` into ``RECORDINGS_DIR/<call id>.<ext>``.
+``ogg`` is Opus at 24 kbit/s; ``mp3`` is also available. Without ffmpeg on
+PATH the writer thread encodes with PyAV (installed with livekit-agents),
+and without either it writes 16-bit WAV. When the call ends,
+``<call id>.json`` is written next to the recording. It holds the duration,
+the format, the overruns and the dropped audio.
+
+The agent's audio is pushed faster than real time, and an interruption can
+cut it short. ``agent_cleared`` drops whatever had not played by then, so the
+timeline is written ``EMIT_LAG_S`` behind the clock.
+
+    python -m backend.tools.recording_bench --calls 1,10,25 --seconds 20
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import av  # PyAV, a livekit-agents dependency
+except ImportError:
+    av = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "recordings"
+SAMPLE_RATE = 16000
+EMIT_LAG_S = 1.0
+RESYNC_S = 0.1  # arrival jitter below this continues a channel instead of leaving a gap
+CALLER, AGENT, _CLEAR = 0, 1, 2
+FORMATS: Dict[str, Optional[Tuple[str, int]]] = {  # extension -> (codec, bit rate)
+    "ogg": ("libopus", 24000),
+    "mp3": ("libmp3lame", 32000),
+    "wav": None,
+}
+ENCODERS = ("ffmpeg", "pyav", "wav")
+
+
+def enabled() -> bool:
+    return os.getenv("CALL_RECORDINGS", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def recording_dir() -> Path:
+    return Path(os.getenv("RECORDINGS_DIR", "").strip() or DEFAULT_DIR)
+
+
+def recording_format() -> str:
+    fmt = os.getenv("RECORDING_FORMAT", "ogg").strip().lower()
+    return fmt if fmt in FORMATS else "ogg"
+
+
+def buffer_seconds() -> float:
+    try:
+        return max(1.0, float(os.getenv("RECORDING_BUFFER_S", "10")))
+    except ValueError:
+        return 10.0
+
+
+def find_recording(directory: Path, call_id: str) -> Optional[Path]:
+    for ext in FORMATS:
+        path = directory / f"{call_id}.{ext}"
+        if path.exists():
+            return path
+    return None
+
+
+def read_info(directory: Path, call_id: str) -> Optional[Dict[str, Any]]:
+    """The call's recording stats; None while it is still recording (or never was)."""
+    try:
+        return json.loads((directory / f"{call_id}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class AudioRing:
+    """Bounded single-producer, single-consumer queue of audio chunks.
+
+    The producer (the agent's event loop) only appends and bumps ``_pushed``;
+    the consumer (the writer thread) only pops and bumps ``_popped``. Neither
+    side takes a lock, and a push that would exceed ``capacity`` bytes is
+    dropped and counted instead of waiting.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self._items: Deque[Tuple[Any, int]] = deque()
+        self._pushed = 0
+        self._popped = 0
+
+    def push(self, item: Any, nbytes: int) -> bool:
+        if self._pushed - self._popped + nbytes > self.capacity:
+            self.overruns += 1
+            self.dropped_bytes += nbytes
+            return False
+        self._pushed += nbytes
+        self._items.append((item, nbytes))
+        return True
+
+    def drain(self) -> List[Any]:
+        out = []
+        while self._items:
+            item, nbytes = self._items.popleft()
+            self._popped += nbytes
+            out.append(item)
+        return out
+
+
+class _WavSink:
+    def __init__(self, path: Path) -> None:
+        self._w = wave.open(str(path), "wb")
+        self._w.setnchannels(2)
+        self._w.setsampwidth(2)
+        self._w.setframerate(SAMPLE_RATE)
+
+    def write(self, pcm: bytes) -> None:
+        self._w.writeframes(pcm)
+
+    def close(self) -> None:
+        self._w.close()
+
+
+class _AvSink:
+    def __init__(self, path: Path, codec: str, bit_rate: int) -> None:
+        self._container = av.open(str(path), "w")
+        self._stream = self._container.add_stream(codec, rate=SAMPLE_RATE, layout="stereo")
+        self._stream.bit_rate = bit_rate
+        self._pts = 0
+
+    def write(self, pcm: bytes) -> None:
+        frame = av.AudioFrame.from_ndarray(np.frombuffer(pcm, dtype="<i2").reshape(1, -1), format="s16", layout="stereo")
+        frame.sample_rate = SAMPLE_RATE
+        frame.pts = self._pts
+        self._pts += frame.samples
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+
+    def close(self) -> None:
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+
+
+class _FfmpegSink:
+    def __init__(self, path: Path, codec: str, bit_rate: int, ffmpeg: str) -> None:
+        self._proc = subprocess.Popen(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "2",
+             "-i", "pipe:0", "-c:a", codec, "-b:a", str(bit_rate), "-y", str(path)],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def write(self, pcm: bytes) -> None:
+        self._proc.stdin.write(pcm)
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+
+
+class CallRecorder:
+    """One call's recording. Producer methods run on the agent's loop; ``service`` on the writer thread."""
+
+    def __init__(self, call_id: str, directory: Path, fmt: str = "ogg", buffer_s: float = 10.0,
+                 clock: Callable[[], float] = time.time, encoder: Optional[str] = None) -> None:
+        self.call_id = call_id
+        self.directory = Path(directory)
+        self.format = fmt
+        self.encoder = encoder  # one of ENCODERS; None picks the best available
+        self.clock = clock
+        # Room audio is at most 48 kHz mono 16-bit, for both sides
+        self.ring = AudioRing(int(buffer_s * 48000 * 2 * 2))
+        self.started_at = clock()
+        self.closing = False
+        self.path: Optional[Path] = None
+        self._sink: Any = None
+        self._sink_failed = False
+        self._pending = np.zeros((2, 0), dtype=np.int16)  # timeline from _emitted on
+        self._emitted = 0
+        self._cursor = [0, 0]
+
+    # -----------------------------
+    # Producer side (agent event loop)
+    # -----------------------------
+
+    def caller_audio(self, pcm: bytes, sample_rate: int, channels: int = 1, at: Optional[float] = None) -> None:
+        self._push(CALLER, pcm, sample_rate, channels, at)
+
+    def agent_audio(self, pcm: bytes, sample_rate: int, channels: int = 1, at: Optional[float] = None) -> None:
+        self._push(AGENT, pcm, sample_rate, channels, at)
+
+    def agent_cleared(self, at: Optional[float] = None) -> None:
+        """The agent's queued audio was dropped (interruption); cut what had not played by ``at``."""
+        self.ring.push((_CLEAR, self.clock() if at is None else at, b"", 0, 0), 0)
+
+    def close(self) -> None:
+        self.closing = True
+
+    def _push(self, channel: int, pcm: bytes, sample_rate: int, channels: int, at: Optional[float]) -> None:
+        pcm = bytes(pcm)
+        if at is None:
+            at = self.clock() - len(pcm) / (2 * channels * sample_rate)  # frames are timed by arrival
+        self.ring.push((channel, at, pcm, sample_rate, channels), len(pcm))
+
+    # -----------------------------
+    # Writer side
+    # -----------------------------
+
+    def _offset(self, at: float) -> int:
+        return int(round((at - self.started_at) * SAMPLE_RATE))
+
+    def _place(self, channel: int, at: float, pcm: bytes, sample_rate: int, channels: int) -> None:
+        samples = np.frombuffer(pcm, dtype="<i2")[::channels]
+        if sample_rate != SAMPLE_RATE and len(samples):
+            n = len(samples) * SAMPLE_RATE // sample_rate
+            samples = np.interp(np.arange(n) * (sample_rate / SAMPLE_RATE), np.arange(len(samples)), samples)
+        start = max(self._cursor[channel], self._emitted)
+        arrived = self._offset(at)
+        if arrived - start > RESYNC_S * SAMPLE_RATE:
+            start = arrived  # a real gap (silence on the line, or the agent's next turn)
+        end = start + len(samples)
+        if end - self._emitted > self._pending.shape[1]:
+            grown = np.zeros((2, max(end - self._emitted, 2 * self._pending.shape[1])), dtype=np.int16)
+            grown[:, :self._pending.shape[1]] = self._pending
+            self._pending = grown
+        self._pending[channel, start - self._emitted:end - self._emitted] = samples
+        self._cursor[channel] = end
+
+    def _cut(self, at: float) -> None:
+        pos = max(self._emitted, self._offset(at))
+        if self._cursor[AGENT] > pos:
+            self._pending[AGENT, pos - self._emitted:self._cursor[AGENT] - self._emitted] = 0
+            self._cursor[AGENT] = pos
+
+    def _open_sink(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        codec = FORMATS.get(self.format)
+        ffmpeg = shutil.which("ffmpeg") if codec and self.encoder in (None, "ffmpeg") else None
+        if ffmpeg:
+            self.encoder = "ffmpeg"
+        elif codec and av is not None and self.encoder in (None, "pyav"):
+            self.encoder = "pyav"
+        else:
+            if codec and self.encoder != "wav":
+                logger.warning("No %s encoder available; recording call %s as WAV", self.format, self.call_id)
+            self.encoder = self.format = "wav"
+        self.path = self.directory / f"{self.call_id}.{self.format}"
+        if self.encoder == "ffmpeg":
+            self._sink = _FfmpegSink(self.path, *codec, ffmpeg)
+        elif self.encoder == "pyav":
+            self._sink = _AvSink(self.path, *codec)
+        else:
+            self._sink = _WavSink(self.path)
+
+    def _emit(self, upto: int) -> None:
+        n = min(upto, max(self._cursor)) - self._emitted
+        if n <= 0:
+            return
+        if not self._sink_failed:
+            try:
+                self._sink.write(self._pending[:, :n].astype("<i2", copy=False).T.tobytes())  # interleaved L/R
+            except Exception:
+                logger.exception("Recording of call %s failed; the rest of the call is not recorded", self.call_id)
+                self._sink_failed = True
+        self._pending = self._pending[:, n:]
+        self._emitted += n
+
+    def service(self, now: float) -> bool:
+        """Move queued audio to the encoder; True once the call has ended and its file is complete."""
+        closing = self.closing  # read first: everything pushed before close() is in the ring now
+        for channel, at, pcm, sample_rate, channels in self.ring.drain():
+            if channel == _CLEAR:
+                self._cut(at)
+            else:
+                self._place(channel, at, pcm, sample_rate, channels)
+        if self._sink is None:
+            self._open_sink()
+        if not closing:
+            self._emit(self._offset(now - EMIT_LAG_S))
+            return False
+        self._emit(max(self._cursor))
+        try:
+            self._sink.close()
+        except Exception:
+            logger.exception("Failed to finish the recording of call %s", self.call_id)
+            self._sink_failed = True
+        info = {
+            "call_id": self.call_id,
+            "file": self.path.name,
+            "format": self.format,
+            "encoder": self.encoder,
+            "started_at": self.started_at,
+            "ended_at": now,
+            "duration_s": round(self._emitted / SAMPLE_RATE, 2),
+            "overruns": self.ring.overruns,
+            "dropped_bytes": self.ring.dropped_bytes,
+            "failed": self._sink_failed,
+        }
+        (self.directory / f"{self.call_id}.json").write_text(json.dumps(info), encoding="utf-8")
+        if self.ring.overruns:
+            logger.warning("Recording of call %s dropped %d frames (buffer full)", self.call_id, self.ring.overruns)
+        return True
+
+
+class RecordingWriter:
+    """Background thread that services every active recording in the process."""
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self._recorders: List[CallRecorder] = []
+        self._lock = threading.Lock()  # writer thread vs. finish() at exit; never taken by producers
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, recorder: CallRecorder) -> CallRecorder:
+        with self._lock:
+            self._recorders.append(recorder)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="recordings", daemon=True)
+            self._thread.start()
+            atexit.register(self.finish)
+        return recorder
+
+    def active(self) -> int:
+        return len(self._recorders)
+
+    def service_once(self) -> None:
+        with self._lock:
+            now = time.time()
+            for rec in list(self._recorders):
+                try:
+                    done = rec.service(now)
+                except Exception:
+                    logger.exception("Recording of call %s failed", rec.call_id)
+                    done = True
+                if done:
+                    self._recorders.remove(rec)
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.service_once()
+
+    def finish(self) -> None:
+        """Close and write out every recording now (process exit)."""
+        for rec in list(self._recorders):
+            rec.close()
+        self.service_once()
+
+
+_WRITER = RecordingWriter()
+
+
+def start(call_id: str) -> CallRecorder:
+    """Begin recording ``call_id`` with the env settings; the caller feeds it and calls ``close``."""
+    return _WRITER.add(CallRecorder(call_id, recording_dir(), recording_format(), buffer_seconds()))
@@ -0,0 +1,189 @@
+"""Redial rules for leads whose call did not reach anyone.
+
+A console agent reports how the call ended through its exit code
+(``OUTCOME_EXIT_CODES``). When a call ends, the controller classifies it
+(``classify``) and asks the campaign's policy whether and when to dial the
+lead again (``RetryPolicy.next_attempt_at``). Leads due for a retry sit in
+the lead queue ordered by due time and are claimed ahead of fresh leads
+once due (see backend/lead_queue.py).
+
+A policy is plain JSON, stored per campaign:
+
+    {
+      "max_attempts": 4,                 # total dials of one lead, first call included
+      "short_call_s": 8,                 # "completed" calls shorter than this count as hung_up
+      "jitter": 0.1,                     # +/- fraction added to every delay
+      "rules": {
+        "no_answer": {"curve": "exponential", "delay_s": 1800, "factor": 2, "max_delay_s": 86400},
+        "busy":      {"curve": "fixed", "delay_s": 300, "max_attempts": 3},
+        "voicemail": {"retry": false}
+      }
+    }
+
+Rules given for a campaign are merged over ``DEFAULT_POLICY`` rule by rule.
+Outcomes without a rule are never retried. Curves: ``fixed`` waits
+``delay_s`` every time, ``linear`` waits ``delay_s * n`` and ``exponential``
+``delay_s * factor ** (n - 1)`` before retry n, capped at ``max_delay_s``.
+
+    python -m backend.retry_policy                        # retry delays of the default policy
+    python -m backend.retry_policy --policy '{"max_attempts": 6}' --outcome no_answer
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Exit codes a console agent uses to report how the call ended
+OUTCOME_EXIT_CODES: Dict[str, int] = {
+    "completed": 0,
+    "failed": 1,
+    "no_answer": 3,
+    "busy": 4,
+    "voicemail": 5,
+    "silence_timeout": 6,  # ended by the agent's watchdog (backend/call_limits.py)
+    "max_duration": 7,
+    "interrupted": 130,
+}
+_OUTCOMES_BY_CODE = {code: name for name, code in OUTCOME_EXIT_CODES.items()}
+
+CURVES = ("fixed", "linear", "exponential")
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    "max_attempts": 4,
+    "short_call_s": 0,
+    "jitter": 0.1,
+    "rules": {
+        "no_answer": {"curve": "exponential", "delay_s": 1800, "factor": 2, "max_delay_s": 86400},
+        "busy": {"curve": "linear", "delay_s": 300, "max_delay_s": 3600, "max_attempts": 3},
+        "hung_up": {"curve": "fixed", "delay_s": 7200, "max_attempts": 2},
+        "voicemail": {"curve": "fixed", "delay_s": 14400, "max_attempts": 2},
+        "failed": {"curve": "fixed", "delay_s": 600, "max_attempts": 2},
+    },
+}
+
+
+def classify(exit_code: Optional[int], end_reason: Optional[str] = None, duration_s: Optional[float] = None,
+             short_call_s: float = 0.0) -> str:
+    """Outcome name for a finished call ("unknown" for codes outside the contract)."""
+    if end_reason == "stopped":
+        return "interrupted"
+    if end_reason in ("silence_timeout", "max_duration"):
+        # A limit ended it (backend/call_limits.py), whether the agent's watchdog or the controller's backstop
+        return end_reason
+    if exit_code is None:
+        return "failed"
+    outcome = _OUTCOMES_BY_CODE.get(exit_code)
+    if outcome is None:
+        # Killed by a signal (negative on POSIX) after a stop, or an agent-specific code
+        return "interrupted" if exit_code < 0 else "unknown"
+    if outcome == "completed" and short_call_s and duration_s is not None and duration_s < short_call_s:
+        return "hung_up"
+    return outcome
+
+
+class RetryRule(NamedTuple):
+    retry: bool = True
+    curve: str = "fixed"
+    delay_s: float = 600.0
+    factor: float = 2.0
+    max_delay_s: float = 86400.0
+    max_attempts: Optional[int] = None
+
+    def delay(self, retry_number: int) -> float:
+        """Seconds to wait before retry ``retry_number`` (1 = first redial)."""
+        n = max(1, retry_number)
+        if self.curve == "linear":
+            delay = self.delay_s * n
+        elif self.curve == "exponential":
+            delay = self.delay_s * self.factor ** (n - 1)
+        else:
+            delay = self.delay_s
+        return min(delay, self.max_delay_s)
+
+
+class RetryPolicy(NamedTuple):
+    max_attempts: int
+    short_call_s: float
+    jitter: float
+    rules: Dict[str, RetryRule]
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        """Build a policy from campaign settings merged over DEFAULT_POLICY; raises ValueError if invalid."""
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("retry policy must be an object")
+        merged = {**DEFAULT_POLICY, **{k: v for k, v in data.items() if k != "rules"}}
+        raw_rules = dict(DEFAULT_POLICY["rules"])
+        extra = data.get("rules") or {}
+        if not isinstance(extra, dict):
+            raise ValueError("rules must be an object keyed by outcome")
+        raw_rules.update(extra)
+        rules: Dict[str, RetryRule] = {}
+        for outcome, spec in raw_rules.items():
+            if outcome in ("completed", "interrupted"):
+                raise ValueError(f"{outcome} calls are never retried")
+            if not isinstance(spec, dict):
+                raise ValueError(f"rule for {outcome} must be an object")
+            unknown = set(spec) - set(RetryRule._fields)
+            if unknown:
+                raise ValueError(f"unknown fields in rule for {outcome}: {', '.join(sorted(unknown))}")
+            rule = RetryRule(**spec)
+            if rule.curve not in CURVES:
+                raise ValueError(f"curve for {outcome} must be one of {CURVES}")
+            if rule.delay_s < 0 or rule.max_delay_s < 0:
+                raise ValueError(f"delays for {outcome} must not be negative")
+            rules[outcome] = rule
+        max_attempts = int(merged["max_attempts"])
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        return cls(max_attempts=max_attempts, short_call_s=float(merged["short_call_s"] or 0),
+                   jitter=min(max(float(merged["jitter"] or 0), 0.0), 1.0), rules=rules)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "short_call_s": self.short_call_s,
+            "jitter": self.jitter,
+            "rules": {k: r._asdict() for k, r in self.rules.items()},
+        }
+
+    def next_attempt_at(self, outcome: str, attempts: int, now: Optional[float] = None,
+                        rng: Optional[random.Random] = None) -> Optional[float]:
+        """When to dial a lead again after its ``attempts``-th call ended with ``outcome``; None = never."""
+        rule = self.rules.get(outcome)
+        if rule is None or not rule.retry:
+            return None
+        limit = self.max_attempts if rule.max_attempts is None else min(self.max_attempts, rule.max_attempts)
+        if attempts >= limit:
+            return None
+        delay = rule.delay(attempts)
+        if self.jitter:
+            delay *= 1 + (rng or random).uniform(-self.jitter, self.jitter)
+        return (time.time() if now is None else now) + max(0.0, delay)
+
+    def schedule(self, outcome: str) -> List[float]:
+        """Delays (no jitter) of every retry ``outcome`` would get, for display."""
+        rule = self.rules.get(outcome)
+        if rule is None or not rule.retry:
+            return []
+        limit = self.max_attempts if rule.max_attempts is None else min(self.max_attempts, rule.max_attempts)
+        return [rule.delay(n) for n in range(1, limit)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show when a retry policy redials a lead")
+    parser.add_argument("--policy", default="", help="policy JSON (default: DEFAULT_POLICY)")
+    parser.add_argument("--outcome", default=None, help="one outcome (default: all rules)")
+    args = parser.parse_args()
+    policy = RetryPolicy.from_dict(json.loads(args.policy) if args.policy else None)
+    outcomes = [args.outcome] if args.outcome else list(policy.rules)
+    print(json.dumps({o: policy.schedule(o) for o in outcomes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
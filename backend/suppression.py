@@ -0,0 +1,449 @@
+"""Do-not-call suppression index checked before every dial.
+
+Numbers are normalized to E.164 digits and stored as uint64 keys in an
+open-addressing hash table (linear probing, load factor <= 0.7) that lives in
+a memory-mapped file, so tens of millions of numbers cost ~12 bytes each on
+disk and only the pages actually probed are resident. An optional Bloom
+filter (~1.2 bytes per number at 1% false positives) sits in the same mapping;
+its pages stay hot and answer most negative lookups without touching the
+table at all. Lookups and inserts are O(1); the table doubles (rebuilt into a
+new file) when full.
+
+Several web workers map the same file. Inserts take an flock; a worker
+notices a rebuilt file (new inode) on its next lookup and remaps it.
+
+Layout of SUPPRESSION_INDEX (default backend/suppression/index.bin):
+  64-byte header  magic, capacity, count, bloom_bits, bloom_k
+  capacity x u64  table slots (0 = empty)
+  bloom_bits / 8  Bloom filter bytes (absent if bloom_bits == 0)
+
+    python -m backend.suppression build dnc1.txt dnc2.csv    # (re)build from DNC files
+    python -m backend.suppression add +15551234567
+    python -m backend.suppression check +15551234567
+    python -m backend.suppression --country 44 check "020 7946 0958"
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+DEFAULT_DIR = Path(os.getenv("SUPPRESSION_DIR", str(Path(__file__).resolve().parent / "suppression")))
+DEFAULT_INDEX_PATH = Path(os.getenv("SUPPRESSION_INDEX", str(DEFAULT_DIR / "index.bin")))
+DEFAULT_COUNTRY = os.getenv("SUPPRESSION_DEFAULT_COUNTRY", "1").strip()
+BLOOM_FPR = float(os.getenv("SUPPRESSION_BLOOM_FPR", "0.01") or 0)  # 0 disables the Bloom front
+
+MAGIC = b"SUPIDX01"
+_HEADER = struct.Struct("<8sQQQQ")
+HEADER_SIZE = 64
+MAX_LOAD = 0.7
+REOPEN_CHECK_SECONDS = 1.0
+M64 = (1 << 64) - 1
+_NON_DIGITS = re.compile(r"\D+")
+
+
+# Calling codes for the lead timezones we see; a national-format number (trunk
+# 0) is only qualified when the lead's country is known. Region prefixes
+# ("Australia/") cover every zone under them.
+TIMEZONE_COUNTRY = {
+    "America/New_York": "1", "America/Chicago": "1", "America/Denver": "1", "America/Phoenix": "1",
+    "America/Los_Angeles": "1", "America/Anchorage": "1", "America/Detroit": "1", "America/Toronto": "1",
+    "America/Vancouver": "1", "America/Edmonton": "1", "America/Winnipeg": "1", "America/Halifax": "1",
+    "Pacific/Honolulu": "1", "US/": "1", "Canada/": "1",
+    "America/Mexico_City": "52", "America/Sao_Paulo": "55", "America/Argentina/": "54",
+    "Europe/London": "44", "Europe/Dublin": "353", "Europe/Paris": "33", "Europe/Berlin": "49",
+    "Europe/Madrid": "34", "Europe/Rome": "39", "Europe/Amsterdam": "31", "Europe/Brussels": "32",
+    "Europe/Zurich": "41", "Europe/Vienna": "43", "Europe/Stockholm": "46", "Europe/Oslo": "47",
+    "Europe/Copenhagen": "45", "Europe/Warsaw": "48", "Europe/Lisbon": "351",
+    "Asia/Kolkata": "91", "Asia/Calcutta": "91", "Asia/Singapore": "65", "Asia/Dubai": "971",
+    "Asia/Tokyo": "81", "Asia/Hong_Kong": "852", "Asia/Manila": "63", "Asia/Karachi": "92",
+    "Australia/": "61", "Pacific/Auckland": "64", "Africa/Johannesburg": "27", "Africa/Lagos": "234",
+}
+# Countries whose numbers keep the leading 0 after the country code
+_KEEPS_TRUNK_ZERO = {"39"}
+
+
+def country_for_timezone(tz: Any) -> Optional[str]:
+    """Calling code for an IANA timezone name (a lead's ``timezone`` column), or None if unknown."""
+    tz = str(tz or "").strip()
+    if not tz:
+        return None
+    if tz in TIMEZONE_COUNTRY:
+        return TIMEZONE_COUNTRY[tz]
+    for prefix, code in TIMEZONE_COUNTRY.items():
+        if prefix.endswith("/") and tz.startswith(prefix):
+            return code
+    return None
+
+
+def normalize_number(raw: Any, country: Optional[str] = None) -> Optional[int]:
+    """E.164 digits as an int, or None if ``raw`` is not a plausible, checkable phone number.
+
+    ``+`` or 00-prefixed numbers are taken as international. Other numbers are
+    national to ``country`` (a calling code, e.g. from country_for_timezone),
+    falling back to SUPPRESSION_DEFAULT_COUNTRY (default 1, NANP): 10-digit NANP
+    numbers get the 1, and outside NANP the trunk 0 is replaced by the country
+    code. A trunk-0 number with no non-NANP country to qualify it is None, so it
+    is reported as not checkable rather than misread as a NANP number.
+    """
+    text = str(raw or "").strip()
+    digits = _NON_DIGITS.sub("", text)
+    country = (country or DEFAULT_COUNTRY or "").strip()
+    if text.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        if not country or country == "1":
+            return None
+        digits = country + (digits if country in _KEEPS_TRUNK_ZERO else digits[1:])
+    elif country == "1":
+        if len(digits) == 10:
+            digits = "1" + digits
+    elif country and len(digits) <= 10:
+        # National number written without its trunk 0 (e.g. an Indian mobile)
+        digits = country + digits
+    if digits.startswith("0") or not 7 <= len(digits) <= 15:
+        return None
+    return int(digits)
+
+
+def _mix(x: int) -> int:
+    """splitmix64 finalizer: spreads phone keys (which share long prefixes) over the table."""
+    x = (x + 0x9E3779B97F4A7C15) & M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & M64
+    return x ^ (x >> 31)
+
+
+def _capacity_for(n: int) -> int:
+    return 1 << max(10, math.ceil(math.log2(max(1, n) / MAX_LOAD)))
+
+
+def _bloom_params(n: int, fpr: float) -> tuple:
+    if fpr <= 0:
+        return 0, 0
+    bits = max(1024, int(-max(1, n) * math.log(fpr) / (math.log(2) ** 2)))
+    bits = (bits + 63) // 64 * 64
+    return bits, max(1, round(bits / max(1, n) * math.log(2)))
+
+
+class SuppressionIndex:
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._inode: Optional[int] = None
+        self._checked_at = 0.0
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._slots = None
+        self._bloom = None
+        self.capacity = 0
+        self.bloom_bits = 0
+        self.bloom_k = 0
+        if self.path.exists():
+            self._open()
+
+    # -----------------------------
+    # File handling
+    # -----------------------------
+
+    @classmethod
+    def create(cls, path: Path, expected: int, bloom_fpr: float = BLOOM_FPR) -> "SuppressionIndex":
+        """Write an empty index sized for ``expected`` numbers (atomically replaces ``path``)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        capacity = _capacity_for(expected)
+        bloom_bits, bloom_k = _bloom_params(int(capacity * MAX_LOAD), bloom_fpr)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, capacity, 0, bloom_bits, bloom_k).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + capacity * 8 + bloom_bits // 8)  # sparse zeros
+        os.replace(tmp, path)
+        return cls(path)
+
+    def _open(self) -> None:
+        self.close()
+        f = open(self.path, "r+b")
+        header = f.read(HEADER_SIZE)
+        magic, capacity, _count, bloom_bits, bloom_k = _HEADER.unpack(header[:_HEADER.size])
+        if magic != MAGIC:
+            f.close()
+            raise ValueError(f"{self.path} is not a suppression index")
+        mm = mmap.mmap(f.fileno(), 0)
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+            mm.madvise(mmap.MADV_RANDOM)  # probes are random; readahead would just inflate RSS
+        self._file, self._mm = f, mm
+        self.capacity, self.bloom_bits, self.bloom_k = capacity, bloom_bits, bloom_k
+        self._slots = memoryview(mm)[HEADER_SIZE:HEADER_SIZE + capacity * 8].cast("Q")
+        start = HEADER_SIZE + capacity * 8
+        # A view, not a copy: numbers another worker adds in place are seen immediately
+        self._bloom = memoryview(mm)[start:start + bloom_bits // 8] if bloom_bits else None
+        self._inode = os.fstat(f.fileno()).st_ino
+
+    def close(self) -> None:
+        if self._bloom is not None:
+            self._bloom.release()
+            self._bloom = None
+        if self._slots is not None:
+            self._slots.release()
+            self._slots = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _maybe_reopen(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < REOPEN_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            if self._mm is not None:
+                self.close()
+            return
+        if inode != self._inode:
+            self._open()
+
+    @property
+    def count(self) -> int:
+        if self._mm is None:
+            return 0
+        return _HEADER.unpack(self._mm[:_HEADER.size])[2]
+
+    def _set_count(self, n: int) -> None:
+        self._mm[:_HEADER.size] = _HEADER.pack(MAGIC, self.capacity, n, self.bloom_bits, self.bloom_k)
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+
+    def _bloom_positions(self, h: int) -> Iterator[int]:
+        # Double hashing (Kirsch-Mitzenmacher) from the two halves of one 64-bit hash
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(self.bloom_k):
+            yield (h1 + i * h2) % self.bloom_bits
+
+    def _probe(self, key: int, h: int) -> tuple:
+        """(slot, found) for ``key``: its slot if present, else the empty slot it would take."""
+        mask = self.capacity - 1
+        slots = self._slots
+        i = (h >> 16) & mask
+        while True:
+            v = slots[i]
+            if v == key:
+                return i, True
+            if v == 0:
+                return i, False
+            i = (i + 1) & mask
+
+    def contains_key(self, key: int) -> bool:
+        with self._lock:
+            self._maybe_reopen()
+            if self._slots is None:
+                return False
+            h = _mix(key)
+            bloom = self._bloom
+            if bloom is not None:
+                bits = self.bloom_bits
+                p, step = (h & 0xFFFFFFFF) % bits, ((h >> 32) | 1) % bits
+                for _ in range(self.bloom_k):
+                    if not bloom[p >> 3] & (1 << (p & 7)):
+                        return False
+                    p += step
+                    if p >= bits:
+                        p -= bits
+            return self._probe(key, h)[1]
+
+    def __contains__(self, number: Any) -> bool:
+        key = number if isinstance(number, int) else normalize_number(number)
+        return key is not None and self.contains_key(key)
+
+    # -----------------------------
+    # Inserts
+    # -----------------------------
+
+    def _insert(self, key: int) -> bool:
+        h = _mix(key)
+        i, found = self._probe(key, h)
+        if found:
+            return False
+        self._slots[i] = key
+        if self._bloom is not None:
+            for p in self._bloom_positions(h):
+                self._bloom[p >> 3] |= 1 << (p & 7)
+        return True
+
+    def add_many(self, numbers: Iterable[Any]) -> int:
+        """Insert numbers (raw strings or normalized ints); returns how many were new."""
+        added = 0
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lockf = open(self.path.with_suffix(".lock"), "a+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lockf.fileno(), fcntl.LOCK_EX)
+                # Created under the lock, or two workers' first adds would each swap in an empty file
+                if not self.path.exists():
+                    SuppressionIndex.create(self.path, 1024).close()
+                self._maybe_reopen(force=True)
+                count = self.count
+                for number in numbers:
+                    key = number if isinstance(number, int) else normalize_number(number)
+                    if key is None:
+                        continue
+                    if count + 1 > self.capacity * MAX_LOAD:
+                        self._set_count(count)
+                        self._grow(count * 2)
+                        count = self.count
+                    if self._insert(key):
+                        count += 1
+                        added += 1
+                self._set_count(count)
+                self._mm.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lockf.fileno(), fcntl.LOCK_UN)
+                lockf.close()
+        return added
+
+    def add(self, number: Any) -> bool:
+        return self.add_many([number]) == 1
+
+    def _grow(self, expected: int) -> None:
+        keys = [k for k in self._slots if k]
+        fresh = SuppressionIndex.create(self.path.with_suffix(".grow"), expected,
+                                        bloom_fpr=BLOOM_FPR if self.bloom_bits else 0)
+        for k in keys:
+            fresh._insert(k)
+        fresh._set_count(len(keys))
+        fresh._mm.flush()
+        fresh.close()
+        os.replace(fresh.path, self.path)
+        self._open()
+
+    # -----------------------------
+    # Stats
+    # -----------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_reopen(force=True)
+            return {
+                "path": str(self.path),
+                "count": self.count,
+                "capacity": self.capacity,
+                "load": round(self.count / self.capacity, 3) if self.capacity else 0.0,
+                "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+                "bloom_bytes": self.bloom_bits // 8,
+                "bloom_k": self.bloom_k,
+            }
+
+
+_PHONE_HEADERS = ("phone", "phone_number", "phone number", "number", "telephone", "tel", "mobile", "msisdn", "e164")
+
+
+def _phone_column(header: list) -> Optional[int]:
+    """Index of the phone column in a CSV header row, or None if the row names none."""
+    names = [str(cell or "").strip().lower() for cell in header]
+    for i, name in enumerate(names):
+        if "phone" in name:
+            return i
+    for i, name in enumerate(names):
+        if name in _PHONE_HEADERS:
+            return i
+    return None
+
+
+def iter_numbers_from_file(path: Path, country: Optional[str] = None) -> Iterator[int]:
+    """Normalized numbers from a DNC file: one per line, or the phone column of a CSV.
+
+    A header naming a phone/number column picks that column, so an ID or
+    account column before it is never read as a number. Files without a
+    header use the first cell of each row that looks like a phone number.
+    """
+    with open(path, "r", encoding="utf-8-sig", errors="ignore", newline="") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        col = _phone_column(first)
+        if col is not None:
+            for record in reader:
+                key = normalize_number(record[col], country) if col < len(record) else None
+                if key is not None:
+                    yield key
+            return
+        for record in itertools.chain([first], reader):
+            for cell in record:
+                key = normalize_number(cell, country)
+                if key is not None:
+                    yield key
+                    break
+
+
+def build(paths: Iterable[Path], index_path: Path = DEFAULT_INDEX_PATH, bloom_fpr: float = BLOOM_FPR,
+          country: Optional[str] = None) -> SuppressionIndex:
+    """Rebuild the index from DNC files; sized from a first pass so it never grows mid-build."""
+    paths = [Path(p) for p in paths]
+    expected = sum(1 for p in paths for _ in iter_numbers_from_file(p, country))
+    staging = SuppressionIndex.create(index_path.with_suffix(".build"), expected, bloom_fpr=bloom_fpr)
+    count = 0
+    for p in paths:
+        for key in iter_numbers_from_file(p, country):
+            if staging._insert(key):
+                count += 1
+    staging._set_count(count)
+    staging._mm.flush()
+    staging.close()
+    os.replace(staging.path, index_path)
+    return SuppressionIndex(index_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Do-not-call suppression index")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH))
+    parser.add_argument("--country", default=None, help="calling code for national-format numbers (default SUPPRESSION_DEFAULT_COUNTRY)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="rebuild from DNC files (one number per line, or CSV with a phone column)")
+    p_build.add_argument("files", nargs="+")
+    p_build.add_argument("--bloom-fpr", type=float, default=BLOOM_FPR)
+    sub.add_parser("add", help="add numbers").add_argument("numbers", nargs="+")
+    sub.add_parser("check", help="check numbers").add_argument("numbers", nargs="+")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+    path = Path(args.index)
+    if args.cmd == "build":
+        out: Any = build(args.files, path, bloom_fpr=args.bloom_fpr, country=args.country).stats()
+    elif args.cmd == "add":
+        out = {"added": SuppressionIndex(path).add_many(normalize_number(n, args.country) for n in args.numbers)}
+    elif args.cmd == "check":
+        index = SuppressionIndex(path)
+        out = {n: normalize_number(n, args.country) in index for n in args.numbers}
+    else:
+        out = SuppressionIndex(path).stats()
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Accuracy and latency of answering-machine detection (backend/amd.py) on recorded greetings.
+
+    python -m backend.tools.amd_eval --corpus greetings/            # greetings/human/*.wav, greetings/machine/*.wav
+    python -m backend.tools.amd_eval --manifest labels.csv          # path,label rows
+    python -m backend.tools.amd_eval --synth 200 --out /tmp/amd     # write a synthetic corpus, then score it
+    python -m backend.tools.amd_eval --corpus greetings/ --config '{"greeting_ms": 1800}'
+
+Recordings are the first seconds of the callee's side of real calls, 16-bit
+PCM WAV at any rate, starting when the line was answered. Each file is fed to
+the detector in 20 ms frames as if it were arriving live. Reports accuracy
+per label (``unknown`` counts as a miss), the confusion matrix, detection
+latency in audio time and CPU time per second of audio. Exits 1 if overall
+accuracy is below ``--min-accuracy``.
+
+``--synth`` greetings are noise bursts with speech-like cadence ("Hello?" and
+a pause versus a running voicemail message, plus some hard cases); they check
+the detector end to end, they are not a substitute for real recordings.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.amd import FRAME_MS, LABELS, AMDConfig, Detector
+
+TRUTH = ("human", "machine")
+
+
+def _load_corpus(corpus: Optional[str], manifest: Optional[str]) -> List[Tuple[Path, str]]:
+    items: List[Tuple[Path, str]] = []
+    if manifest:
+        base = Path(manifest).resolve().parent
+        with open(manifest, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[1].strip() in TRUTH:
+                    items.append((base / row[0].strip(), row[1].strip()))
+    if corpus:
+        for label in TRUTH:
+            items.extend((p, label) for p in sorted((Path(corpus) / label).glob("*.wav")))
+    return items
+
+
+def detect(path: Path, cfg: AMDConfig) -> Tuple[Dict[str, Any], float, float]:
+    """Run the detector over one recording; returns the decision, audio seconds fed and CPU seconds."""
+    det = Detector(cfg)
+    fed = 0
+    cpu = 0.0
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        rate, channels = w.getframerate(), w.getnchannels()
+        per_frame = rate * FRAME_MS // 1000
+        decision = None
+        while decision is None:
+            chunk = w.readframes(per_frame)
+            if not chunk:
+                break
+            fed += len(chunk) // (2 * channels)
+            t0 = time.process_time()
+            decision = det.feed(chunk, rate, channels)
+            cpu += time.process_time() - t0
+    if decision is None:
+        # Recording ended before the analysis window did
+        return {"label": "unknown", "reason": "end_of_audio", "at_ms": fed * 1000 // rate}, fed / rate, cpu
+    return decision.to_dict(), fed / rate, cpu
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def evaluate(items: List[Tuple[Path, str]], cfg: AMDConfig) -> Dict[str, Any]:
+    confusion = {t: {label: 0 for label in LABELS} for t in TRUTH}
+    latency: Dict[str, List[float]] = {t: [] for t in TRUTH}
+    reasons: Dict[str, int] = {}
+    misses: List[Dict[str, Any]] = []
+    audio_s = cpu_s = 0.0
+    for path, truth in items:
+        decision, fed, cpu = detect(path, cfg)
+        audio_s += fed
+        cpu_s += cpu
+        confusion[truth][decision["label"]] += 1
+        reasons[f"{decision['label']}:{decision['reason']}"] = reasons.get(f"{decision['label']}:{decision['reason']}", 0) + 1
+        if decision["label"] == truth:
+            latency[truth].append(decision["at_ms"])
+        else:
+            misses.append({"file": str(path), "truth": truth, **decision})
+    correct = sum(confusion[t][t] for t in TRUTH)
+    per_label = {}
+    for t in TRUTH:
+        n = sum(confusion[t].values())
+        per_label[t] = {
+            "files": n,
+            "accuracy": round(confusion[t][t] / n, 4) if n else None,
+            "latency_ms_p50": _percentile(latency[t], 0.5),
+            "latency_ms_p95": _percentile(latency[t], 0.95),
+            "latency_ms_max": max(latency[t]) if latency[t] else None,
+        }
+    return {
+        "files": len(items),
+        "accuracy": round(correct / len(items), 4) if items else None,
+        "labels": per_label,
+        "confusion": confusion,
+        "reasons": dict(sorted(reasons.items())),
+        "cpu_ms_per_audio_s": round(cpu_s * 1000 / audio_s, 3) if audio_s else None,
+        "config": cfg._asdict(),
+        "misses": misses[:20],
+    }
+
+
+def _write_wav(path: Path, samples: List[float], rate: int) -> None:
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"".join(struct.pack("<h", max(-32768, min(32767, int(s)))) for s in samples))
+
+
+def _synth_greeting(rng: random.Random, kind: str, rate: int) -> List[float]:
+    """Line noise with voiced segments: [(gap_s, word_s), ...] then a tail of silence (and a beep for machines)."""
+    level = rng.uniform(1500, 6000)
+    noise = rng.uniform(20, 90)
+    if kind == "human":
+        words = [(rng.uniform(0.1, 1.2), rng.uniform(0.25, 0.8))]
+        if rng.random() < 0.25:  # "Hello, this is Sam" - the hard case
+            words += [(rng.uniform(0.06, 0.2), rng.uniform(0.15, 0.35)) for _ in range(rng.randint(1, 2))]
+        tail = rng.uniform(1.5, 3.0)
+    else:
+        count = rng.randint(2, 4) if rng.random() < 0.15 else rng.randint(6, 16)  # short greetings are hard
+        words = [(rng.uniform(0.05, 0.6), rng.uniform(0.15, 0.5))] + \
+                [(rng.uniform(0.06, 0.3), rng.uniform(0.15, 0.5)) for _ in range(count - 1)]
+        tail = rng.uniform(0.2, 0.6)
+    out: List[float] = []
+    for gap, length in words:
+        out.extend(rng.gauss(0, noise) for _ in range(int(gap * rate)))
+        n = int(length * rate)
+        for i in range(n):
+            # Syllable envelope (~5 Hz) over a voiced carrier
+            env = 0.35 + 0.65 * abs(math.sin(math.pi * 5 * i / rate))
+            out.append(level * env * (0.6 * math.sin(2 * math.pi * 180 * i / rate) + 0.4 * rng.uniform(-1, 1)))
+    out.extend(rng.gauss(0, noise) for _ in range(int(tail * rate)))
+    if kind == "machine":
+        out.extend(8000 * math.sin(2 * math.pi * 1000 * i / rate) for i in range(int(0.4 * rate)))
+        out.extend(rng.gauss(0, noise) for _ in range(int(2.0 * rate)))
+    return out
+
+
+def synthesize(out_dir: Path, count: int, seed: int, rate: int = 8000) -> None:
+    rng = random.Random(seed)
+    for label in TRUTH:
+        (out_dir / label).mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        label = TRUTH[i % 2]
+        _write_wav(out_dir / label / f"synth_{i:04d}.wav", _synth_greeting(rng, label, rate), rate)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Answering-machine detection accuracy and latency")
+    parser.add_argument("--corpus", default=None, help="directory with human/ and machine/ WAV files")
+    parser.add_argument("--manifest", default=None, help="CSV of path,label (paths relative to the CSV)")
+    parser.add_argument("--config", default="", help="AMD settings JSON over the defaults")
+    parser.add_argument("--synth", type=int, default=0, help="write this many synthetic greetings to --out first")
+    parser.add_argument("--out", default=None, help="directory for --synth (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--min-accuracy", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    corpus = args.corpus
+    if args.synth:
+        if not args.out:
+            import tempfile
+            args.out = tempfile.mkdtemp(prefix="amd_corpus_")
+        synthesize(Path(args.out), args.synth, args.seed)
+        corpus = args.out
+    items = _load_corpus(corpus, args.manifest)
+    if not items:
+        parser.error("no recordings found (need --corpus with human/ and machine/ WAVs, --manifest or --synth)")
+    cfg = AMDConfig.from_dict(json.loads(args.config) if args.config else None)
+    report = evaluate(items, cfg)
+    report["corpus"] = os.path.abspath(corpus) if corpus else args.manifest
+    print(json.dumps(report, indent=2))
+    return 0 if (report["accuracy"] or 0.0) >= args.min_accuracy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
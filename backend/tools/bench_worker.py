@@ -0,0 +1,125 @@
+"""Memory/CPU per concurrent call: process-per-call vs one long-lived worker.
+
+    python -m backend.tools.bench_worker --calls 8 --hold 5
+
+Both modes run the real ``backend.agent.entrypoint`` against the offline fakes
+from backend.tools.offline, so the numbers cover imports, prompt loading and
+session setup but not a remote model connection.
+
+- process: one child process per call (what RUN_SINGLE_CALL=1 does today)
+- worker:  one process importing backend.agent once and running every call on
+           its own thread, like ``python -m backend.agent worker`` with the
+           default thread executor
+
+Linux only: RSS and CPU are sampled from /proc.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _cpu_seconds(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15 (1-based); offset by the "pid (comm)" prefix
+        return (int(fields[11]) + int(fields[12])) / CLK_TCK
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _child(calls: int, hold: float) -> None:
+    """Run ``calls`` offline entrypoints concurrently on threads, then hold them open."""
+    os.environ.setdefault("FAKE_MODEL_FIRST_TEXT_MS", "0")
+    os.environ.setdefault("FAKE_MODEL_FIRST_AUDIO_MS", "0")
+    os.environ.setdefault("FAKE_MODEL_MS_PER_1K_TOKENS", "0")
+    # Plugins register on import and must do so on the main thread, as in a real worker
+    agent = importlib.import_module("backend.agent")
+    from backend.tools import offline
+    # Load the lead list once here, as the worker's prewarm does, rather than in every call thread
+    agent._read_leads_cached(os.getenv("LEADS_CSV_PATH", str(agent.BASE_DIR / "leads.csv")))
+    offline.use_offline_fakes()
+
+    def one(i: int) -> None:
+        # Each call carries its own lead/campaign and gets its own session back; nothing shared
+        asyncio.run(offline.run_call(room_name=f"bench-{i}"))
+        time.sleep(hold)
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def _measure(procs: List[subprocess.Popen], interval: float = 0.1) -> Dict[str, Any]:
+    peak_rss = 0
+    cpu: Dict[int, float] = {}
+    while any(p.poll() is None for p in procs):
+        total = 0
+        for p in procs:
+            if p.poll() is None:
+                total += _rss_kb(p.pid)
+                cpu[p.pid] = _cpu_seconds(p.pid)
+        peak_rss = max(peak_rss, total)
+        time.sleep(interval)
+    return {"peak_rss_mb": round(peak_rss / 1024, 1), "cpu_s": round(sum(cpu.values()), 2)}
+
+
+def _run_mode(mode: str, calls: int, hold: float, csv_path: str) -> Dict[str, Any]:
+    env = os.environ.copy()
+    env["LEADS_CSV_PATH"] = csv_path
+    cmd = [sys.executable, "-m", "backend.tools.bench_worker", "--child", "--hold", str(hold)]
+    if mode == "process":
+        procs = [subprocess.Popen(cmd + ["--calls", "1"], env=env) for _ in range(calls)]
+    else:
+        procs = [subprocess.Popen(cmd + ["--calls", str(calls)], env=env)]
+    stats = _measure(procs)
+    stats.update({
+        "mode": mode,
+        "calls": calls,
+        "processes": len(procs),
+        "rss_mb_per_call": round(stats["peak_rss_mb"] / calls, 1),
+        "cpu_s_per_call": round(stats["cpu_s"] / calls, 3),
+    })
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call cost of process-per-call vs worker mode")
+    parser.add_argument("--calls", type=int, default=8, help="concurrent calls")
+    parser.add_argument("--hold", type=float, default=3.0, help="seconds each call stays open after setup")
+    parser.add_argument("--csv", default=os.getenv("LEADS_CSV_PATH", "backend/testt.csv"))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(max(1, args.calls), args.hold)
+        return
+    calls = max(1, args.calls)
+    report = [_run_mode(mode, calls, args.hold, args.csv) for mode in ("process", "worker")]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
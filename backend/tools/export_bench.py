@@ -0,0 +1,115 @@
+"""Throughput and memory of the streaming lead export (backend/app/export.py).
+
+    python -m backend.tools.export_bench --leads 1000000 --calls 300000
+    python -m backend.tools.export_bench --format jsonl --per attempt
+
+Builds a synthetic lead CSV and a controller database with call attempts in a
+temporary directory, then drains the same generator /api/export streams and
+reports rows per second and RSS growth. Both inputs are generated without
+holding them in memory, so RSS growth (and ``--trace-memory`` peak heap, which
+slows the run several times over) should stay flat as --leads grows; that is
+the constant-memory check.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _write_leads(path: str, n: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("prospect_name,company_name,job_title,phone,email,timezone\n")
+        for i in range(1, n + 1):
+            f.write(f"Prospect {i},Company {i % 997},Director,+1555{i:07d},p{i}@example.com,America/New_York\n")
+
+
+def _write_calls(db_path: str, csv_path: str, leads: int, calls: int) -> None:
+    # Same schema the controller creates; rows are generated inside SQLite so setup stays off the Python heap
+    os.environ["CONTROLLER_DB"] = db_path
+    from backend.app import state
+    state._conn()
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?),
+        r AS (SELECT n, abs(random()) AS a, ? - abs(random() % 2592000) AS started FROM seq)
+        INSERT INTO calls(id, kind, lead_index, campaign, leads_csv, pid, owner_pid, status, started_at,
+                          last_activity, ended_at, exit_code, end_reason)
+        SELECT printf('c%011d', n), 'console', 1 + a % ?, CASE a % 2 WHEN 0 THEN 'A (a)' ELSE 'B (b)' END, ?,
+               0, ?, 'ended', started, started, started + 5 + a % 295,
+               CASE a % 5 WHEN 0 THEN 0 WHEN 1 THEN 1 WHEN 2 THEN 3 WHEN 3 THEN 4 ELSE 5 END,
+               CASE a % 3 WHEN 0 THEN 'stopped' ELSE 'exited' END
+        FROM r
+        """,
+        (calls, time.time(), leads, csv_path, os.getpid()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _maxrss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming export throughput")
+    parser.add_argument("--leads", type=int, default=200000)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--per", choices=["lead", "attempt"], default="lead")
+    parser.add_argument("--campaign", default=None)
+    parser.add_argument("--trace-memory", action="store_true", help="also report peak Python heap (slow)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="export-bench-")
+    csv_path = os.path.join(tmp, "leads.csv")
+    db_path = os.path.join(tmp, "controller.db")
+    t0 = time.perf_counter()
+    _write_leads(csv_path, args.leads)
+    _write_calls(db_path, csv_path, args.leads, args.calls)
+    setup_s = time.perf_counter() - t0
+
+    from backend.app import export, state
+
+    rss_before = _maxrss_kb()
+    if args.trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    out_bytes = 0
+    out_rows = 0
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        calls = state.iter_calls_by_lead([csv_path], campaign=args.campaign)
+        for chunk in export.iter_export(f, calls, fmt=args.format, per=args.per):
+            out_bytes += len(chunk)
+            out_rows += chunk.count("\n")
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if args.trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    if args.format == "csv":
+        out_rows -= 1  # header
+
+    print(json.dumps({
+        "leads": args.leads,
+        "calls": args.calls,
+        "format": args.format,
+        "per": args.per,
+        "rows": out_rows,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(out_rows / elapsed, 1) if elapsed else 0.0,
+        "mb_per_s": round(out_bytes / elapsed / 1e6, 2) if elapsed else 0.0,
+        "peak_heap_kb": peak,
+        "rss_growth_kb": max(0, _maxrss_kb() - rss_before),
+        "setup_s": round(setup_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Stand-in for backend.agent used to load-test the web controller.
+
+Point the controller at it with ``AGENT_MODULE=backend.tools.fake_agent``. Each
+child sleeps for a sampled call duration and exits with an outcome-specific
+exit code, without touching LiveKit or Gemini. SIGINT ends the call early, the
+same way ``/api/end_call`` stops a real console agent.
+
+Env vars:
+  - FAKE_CALL_MIN_SECONDS / FAKE_CALL_MAX_SECONDS: uniform call duration range (default 2..6)
+  - FAKE_CALL_OUTCOMES: weighted outcomes, e.g. "completed=0.6,no_answer=0.3,failed=0.1"
+  - FAKE_CALL_SEED: optional RNG seed for reproducible runs
+"""
+
+import os
+import random
+import signal
+import sys
+import time
+from typing import List, Tuple
+
+from backend.retry_policy import OUTCOME_EXIT_CODES
+
+DEFAULT_OUTCOMES = "completed=0.7,no_answer=0.2,busy=0.05,failed=0.05"
+
+
+def _parse_outcomes(spec: str) -> List[Tuple[str, float]]:
+    """Parse "name=weight,..." into a list of known outcomes with positive weights."""
+    weighted: List[Tuple[str, float]] = []
+    for part in (spec or "").split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OUTCOME_EXIT_CODES:
+            continue
+        try:
+            w = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            continue
+        if w > 0:
+            weighted.append((name, w))
+    return weighted or [("completed", 1.0)]
+
+
+def _sample_outcome(rng: random.Random, weighted: List[Tuple[str, float]]) -> str:
+    names = [n for n, _ in weighted]
+    weights = [w for _, w in weighted]
+    return rng.choices(names, weights=weights, k=1)[0]
+
+
+def _sample_duration(rng: random.Random) -> float:
+    try:
+        lo = float(os.getenv("FAKE_CALL_MIN_SECONDS", "2"))
+        hi = float(os.getenv("FAKE_CALL_MAX_SECONDS", "6"))
+    except ValueError:
+        lo, hi = 2.0, 6.0
+    lo = max(0.0, lo)
+    hi = max(lo, hi)
+    return rng.uniform(lo, hi)
+
+
+def main() -> int:
+    seed = os.getenv("FAKE_CALL_SEED")
+    rng = random.Random(f"{seed}:{os.getenv('LEAD_INDEX', '')}" if seed else None)
+    outcome = _sample_outcome(rng, _parse_outcomes(os.getenv("FAKE_CALL_OUTCOMES", DEFAULT_OUTCOMES)))
+    duration = _sample_duration(rng)
+
+    # Controller sends SIGINT on End Call; make sure it interrupts the sleep on every platform
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        time.sleep(duration)
+    except KeyboardInterrupt:
+        return OUTCOME_EXIT_CODES["interrupted"]
+    return OUTCOME_EXIT_CODES[outcome]
+
+
+if __name__ == "__main__":
+    # Accept and ignore the agents CLI subcommand ("console", "connect --room X", ...)
+    sys.exit(main())
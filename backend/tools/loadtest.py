@@ -0,0 +1,162 @@
+"""Load generator for the web controller in backend/app/main.py.
+
+Run the backend against the fake agent, then drive it:
+
+    AGENT_MODULE=backend.tools.fake_agent FAKE_CALL_MAX_SECONDS=1 \\
+        uvicorn backend.app.main:app --port 8000
+    python -m backend.tools.loadtest --base-url http://localhost:8000 --rps 200 --duration 30
+
+Requests are issued open-loop at ``--rps`` across a weighted mix of
+/api/start_call, /api/end_call, /api/auto_next and /api/status. At the end the
+client-side latency per endpoint is printed alongside the controller's own
+/api/metrics (call-gap latency and event-loop lag).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+DEFAULT_MIX = "status=0.7,start_call=0.15,end_call=0.1,auto_next=0.05"
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("status", "start_call", "end_call", "auto_next"):
+            continue
+        try:
+            w = float(weight)
+        except ValueError:
+            continue
+        if w > 0:
+            mix[name] = w
+    return mix or {"status": 1.0}
+
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(n - 1, int(q * n))] * 1000, 2)
+
+    return {
+        "count": n,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class LoadRun:
+    def __init__(self, client: httpx.AsyncClient, leads: int, mix: Dict[str, float], seed: Optional[int]):
+        self.client = client
+        self.leads = max(1, leads)
+        self.names = list(mix.keys())
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {n: [] for n in self.names}
+        self.errors: Dict[str, int] = {n: 0 for n in self.names}
+
+    def _request(self, name: str):
+        if name == "status":
+            return self.client.get("/api/status")
+        if name == "start_call":
+            idx = self.rng.randrange(self.leads)
+            return self.client.post("/api/start_call", data={"lead_global_index": str(idx)})
+        if name == "end_call":
+            auto = "true" if self.rng.random() < 0.5 else "false"
+            return self.client.post("/api/end_call", data={"auto_next": auto})
+        enabled = "true" if self.rng.random() < 0.5 else "false"
+        return self.client.post("/api/auto_next", data={"enabled": enabled})
+
+    async def one(self, name: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            resp = await self._request(name)
+            if resp.status_code >= 400:
+                self.errors[name] += 1
+        except Exception:
+            self.errors[name] += 1
+            return
+        self.latencies[name].append(time.perf_counter() - t0)
+
+    async def run(self, rps: float, duration: float, max_in_flight: int) -> float:
+        """Issue requests open-loop at ``rps`` for ``duration`` seconds; returns elapsed time."""
+        sem = asyncio.Semaphore(max_in_flight)
+        tasks: List[asyncio.Task] = []
+
+        async def guarded(name: str) -> None:
+            async with sem:
+                await self.one(name)
+
+        interval = 1.0 / rps
+        start = time.perf_counter()
+        next_at = start
+        while True:
+            now = time.perf_counter()
+            if now - start >= duration:
+                break
+            if now < next_at:
+                await asyncio.sleep(next_at - now)
+            name = self.rng.choices(self.names, weights=self.weights, k=1)[0]
+            tasks.append(asyncio.create_task(guarded(name)))
+            next_at += interval
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        before = (await client.get("/api/metrics")).json()
+        run = LoadRun(client, args.leads, _parse_mix(args.mix), args.seed)
+        elapsed = await run.run(args.rps, args.duration, args.max_in_flight)
+        # Stop any call left running so repeated runs start from a clean controller
+        await client.post("/api/stop_all")
+        after = (await client.get("/api/metrics")).json()
+
+    completed = sum(len(v) for v in run.latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "target_rps": args.rps,
+        "achieved_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "errors": run.errors,
+        "endpoints": {name: _summary(samples) for name, samples in run.latencies.items()},
+        "controller": {
+            "calls_started": after.get("calls_started", 0) - before.get("calls_started", 0),
+            "calls_ended": after.get("calls_ended", 0) - before.get("calls_ended", 0),
+            "requests_per_s": after.get("requests_per_s"),
+            "call_gap": after.get("call_gap"),
+            "loop_lag": after.get("loop_lag"),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive the dialer controller API at high request rates")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=100.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to generate load")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="cap on concurrent requests")
+    parser.add_argument("--leads", type=int, default=50, help="lead indexes to pick from for start_call")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    report = asyncio.run(_main(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Offline stand-ins for the realtime model and the LiveKit room.
+
+These plug into backend.agent through its factory hooks so the full
+``entrypoint`` path, up to and including ``generate_reply``, can run and be
+timed without network access:
+
+    AGENT_LLM_FACTORY=backend.tools.offline:make_fake_model
+    AGENT_SESSION_FACTORY=backend.tools.offline:make_loopback_session
+    AGENT_NOISE_CANCELLATION=0
+
+``use_offline_fakes`` sets those once per process. ``run_call`` then runs one
+call and returns its session; lead and campaign travel in the fake job's
+metadata, as in worker mode, so calls can run concurrently on threads.
+``python -m backend.tools.offline --runs 20`` benchmarks entrypoint latency
+(setup, time-to-first-text and time-to-first-audio). ``setup_first_ms`` is
+the first call on its own; ``setup`` covers the rest.
+
+Env vars (model latencies are milliseconds):
+  - FAKE_MODEL_FIRST_TEXT_MS / FAKE_MODEL_FIRST_AUDIO_MS: delay before the first chunk (default 150 / 250)
+  - FAKE_MODEL_CHUNK_MS: gap between streamed chunks (default 20)
+  - FAKE_MODEL_MS_PER_1K_TOKENS: extra prefill delay per 1k estimated input tokens (default 40)
+  - FAKE_MODEL_REPLY: canned reply text
+  - LOOPBACK_PROSPECT_WAV: 16-bit PCM WAV replayed as the prospect's audio (default: silence)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import wave
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.prompt_tools import PROMPT_MODES, estimate_tokens
+
+DEFAULT_REPLY = "Hi, this is Alice from DemandTeq, how are you today?"
+SAMPLE_RATE = 24000
+FRAME_MS = 20
+
+def _env_ms(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default)))) / 1000.0
+    except ValueError:
+        return default / 1000.0
+
+
+class FakeRealtimeModel:
+    """Streams a canned reply as text and PCM audio chunks with configurable latencies."""
+
+    def __init__(self,
+                 reply: str = DEFAULT_REPLY,
+                 first_text_latency: float = 0.15,
+                 first_audio_latency: float = 0.25,
+                 chunk_interval: float = 0.02,
+                 latency_per_1k_tokens: float = 0.04,
+                 audio_chunks: int = 25) -> None:
+        self.reply = reply
+        self.first_text_latency = first_text_latency
+        self.first_audio_latency = first_audio_latency
+        self.chunk_interval = chunk_interval
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.audio_chunks = audio_chunks
+        self._silence = b"\x00\x00" * (SAMPLE_RATE * FRAME_MS // 1000)
+
+    async def stream(self, instructions: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("text", str) and ("audio", bytes) events for one reply."""
+        prefill = self.latency_per_1k_tokens * estimate_tokens(instructions) / 1000.0
+        await asyncio.sleep(prefill + self.first_text_latency)
+        words = self.reply.split()
+        yield "text", words[0] if words else ""
+        audio_delay = max(0.0, self.first_audio_latency - self.first_text_latency)
+        await asyncio.sleep(audio_delay)
+        for i in range(self.audio_chunks):
+            yield "audio", self._silence
+            if i + 1 < len(words):
+                yield "text", words[i + 1]
+            await asyncio.sleep(self.chunk_interval)
+
+
+class LoopbackRoom:
+    """Minimal room stand-in that replays recorded prospect audio as 20 ms PCM frames."""
+
+    def __init__(self, name: str = "loopback", prospect_wav: Optional[str] = None, realtime: bool = True) -> None:
+        self.name = name
+        self.prospect_wav = prospect_wav
+        self.realtime = realtime
+        self.published: List[bytes] = []
+        self.session: Optional["LoopbackSession"] = None  # set when a LoopbackSession starts in this room
+
+    async def prospect_audio(self) -> AsyncIterator[bytes]:
+        if self.prospect_wav:
+            with wave.open(self.prospect_wav, "rb") as w:
+                per_frame = w.getframerate() * FRAME_MS // 1000
+                while True:
+                    frame = w.readframes(per_frame)
+                    if not frame:
+                        break
+                    yield frame
+                    if self.realtime:
+                        await asyncio.sleep(FRAME_MS / 1000)
+            return
+        # No recording: a short stretch of silence so the session has something to consume
+        silence = b"\x00\x00" * (SAMPLE_RATE * FRAME_MS // 1000)
+        for _ in range(50):
+            yield silence
+            if self.realtime:
+                await asyncio.sleep(FRAME_MS / 1000)
+
+    def publish_audio(self, frame: bytes) -> None:
+        self.published.append(frame)
+
+
+class FakeJobContext:
+    """Provides the attributes entrypoint uses from agents.JobContext, including the job's metadata."""
+
+    def __init__(self, room: LoopbackRoom, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.room = room
+        self.job = SimpleNamespace(metadata=json.dumps(metadata) if metadata else "")
+        self.connected_at: Optional[float] = None
+
+    async def connect(self) -> None:
+        self.connected_at = time.perf_counter()
+
+
+class LoopbackSession:
+    """AgentSession stand-in: listens to the loopback room and drives the agent's fake model."""
+
+    def __init__(self) -> None:
+        self.agent = None
+        self.room: Optional[LoopbackRoom] = None
+        self.inbound_frames = 0
+        self.timings: Dict[str, float] = {}
+        self.reply_text: List[str] = []
+        self.instructions = ""  # everything the model was given for the reply: agent text, then session text
+        self._listen_task: Optional[asyncio.Task] = None
+
+    async def start(self, room=None, agent=None, room_input_options=None, **_: Any) -> None:
+        self.timings["start"] = time.perf_counter()
+        self.room = room
+        self.agent = agent
+        if isinstance(room, LoopbackRoom):
+            room.session = self
+            self._listen_task = asyncio.create_task(self._listen(room))
+
+    async def _listen(self, room: LoopbackRoom) -> None:
+        async for _frame in room.prospect_audio():
+            self.inbound_frames += 1
+
+    async def generate_reply(self, instructions: str = "", **_: Any) -> None:
+        model = getattr(self.agent, "llm", None)
+        if not isinstance(model, FakeRealtimeModel):
+            raise RuntimeError("LoopbackSession requires the agent to use FakeRealtimeModel")
+        full = f"{getattr(self.agent, 'instructions', '')}\n{instructions}"
+        self.instructions = full
+        self.timings["reply_requested"] = time.perf_counter()
+        self.timings["input_tokens"] = estimate_tokens(full)
+        async for kind, payload in model.stream(full):
+            now = time.perf_counter()
+            if kind == "text":
+                self.timings.setdefault("first_text", now)
+                self.reply_text.append(payload)
+            else:
+                self.timings.setdefault("first_audio", now)
+                if self.room is not None:
+                    self.room.publish_audio(payload)
+        self.timings["reply_done"] = time.perf_counter()
+
+    async def aclose(self) -> None:
+        if self._listen_task:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+
+
+def make_fake_model() -> FakeRealtimeModel:
+    """Factory for AGENT_LLM_FACTORY."""
+    return FakeRealtimeModel(
+        reply=os.getenv("FAKE_MODEL_REPLY", DEFAULT_REPLY),
+        first_text_latency=_env_ms("FAKE_MODEL_FIRST_TEXT_MS", 150),
+        first_audio_latency=_env_ms("FAKE_MODEL_FIRST_AUDIO_MS", 250),
+        chunk_interval=_env_ms("FAKE_MODEL_CHUNK_MS", 20),
+        latency_per_1k_tokens=_env_ms("FAKE_MODEL_MS_PER_1K_TOKENS", 40),
+    )
+
+
+def make_loopback_session() -> LoopbackSession:
+    """Factory for AGENT_SESSION_FACTORY."""
+    return LoopbackSession()
+
+
+def use_offline_fakes() -> None:
+    """Point backend.agent's factory hooks at the fakes; once, before any call runs."""
+    os.environ["AGENT_LLM_FACTORY"] = "backend.tools.offline:make_fake_model"
+    os.environ["AGENT_SESSION_FACTORY"] = "backend.tools.offline:make_loopback_session"
+    os.environ["AGENT_NOISE_CANCELLATION"] = "0"
+
+
+def campaign_selection(campaign: Optional[str] = None) -> Tuple[str, str, str]:
+    """(module, agent_attr, session_attr) for a campaign name or prompt module (default CAMPAIGN_PROMPT_MODULE)."""
+    from backend import agent
+
+    module = campaign or os.getenv("CAMPAIGN_PROMPT_MODULE", "prompts")
+    return agent._campaign_by_name(module) or (
+        agent._normalize_prompt_module(module), "ENHANCED_DEMANDIFY_CALLER_INSTRUCTIONS", "SESSION_INSTRUCTION")
+
+
+async def run_call(lead_index: int = 1, campaign: Optional[str] = None, prompt_mode: Optional[str] = None,
+                   csv_path: Optional[str] = None, prospect_wav: Optional[str] = None,
+                   room_name: str = "loopback", lead: Optional[Dict[str, str]] = None) -> LoopbackSession:
+    """Run backend.agent.entrypoint for one lead and return its (closed) session.
+
+    Lead, campaign and prompt mode go in the job metadata rather than the
+    environment, so concurrent calls don't see each other's settings. The
+    lead is row ``lead_index`` of the CSV unless ``lead`` is given.
+    """
+    from backend import agent
+
+    if lead is None:
+        leads = agent._read_leads_cached(csv_path or os.getenv("LEADS_CSV_PATH", str(agent.BASE_DIR / "leads.csv")))
+        if not 1 <= lead_index <= len(leads):
+            raise ValueError(f"lead index {lead_index} is out of range (1-{len(leads)})")
+        lead = leads[lead_index - 1]
+    metadata = {"lead": lead, "lead_index": lead_index, "campaign": list(campaign_selection(campaign)),
+                "prompt_mode": prompt_mode or os.getenv("CAMPAIGN_PROMPT_MODE"), "call_id": room_name}
+    # The factories build sessions in the importable module, which differs from __main__ under `python -m`
+    from backend.tools import offline as registry
+    ctx = registry.FakeJobContext(registry.LoopbackRoom(name=room_name, prospect_wav=prospect_wav, realtime=False),
+                                  metadata)
+    await agent.entrypoint(ctx)
+    session = ctx.room.session
+    if session is None:
+        raise RuntimeError("entrypoint did not start a LoopbackSession; is use_offline_fakes() in effect?")
+    await session.aclose()
+    return session
+
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        "count": n,
+        "mean_ms": round(sum(ordered) / n * 1000, 2),
+        "p50_ms": round(ordered[n // 2] * 1000, 2),
+        "p95_ms": round(ordered[min(n - 1, int(0.95 * n))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def run_benchmark(runs: int, lead_index: int = 1, prospect_wav: Optional[str] = None,
+                        prewarm: bool = False, campaign: Optional[str] = None, prompt_mode: Optional[str] = None,
+                        csv_path: Optional[str] = None) -> Dict[str, Any]:
+    """Run backend.agent.entrypoint ``runs`` times against the offline fakes (see run_call)."""
+    from backend.agent import prewarm as agent_prewarm
+
+    setup: List[float] = []
+    first_text: List[float] = []
+    first_audio: List[float] = []
+    input_tokens: List[float] = []
+    prewarm_ms = None
+    if prewarm:
+        t0 = time.perf_counter()
+        agent_prewarm()
+        prewarm_ms = round((time.perf_counter() - t0) * 1000, 2)
+    for i in range(runs):
+        t0 = time.perf_counter()
+        session = await run_call(lead_index, campaign, prompt_mode, csv_path, prospect_wav, room_name=f"loopback-{i}")
+        t = session.timings
+        setup.append(t["reply_requested"] - t0)
+        first_text.append(t["first_text"] - t0)
+        first_audio.append(t["first_audio"] - t0)
+        input_tokens.append(t["input_tokens"])
+    return {
+        "runs": runs,
+        "campaign_module": campaign or os.getenv("CAMPAIGN_PROMPT_MODULE", "prompts"),
+        "prompt_mode": prompt_mode or os.getenv("CAMPAIGN_PROMPT_MODE", "full"),
+        "input_tokens": int(sum(input_tokens) / len(input_tokens)) if input_tokens else 0,
+        "prewarm_ms": prewarm_ms,
+        "setup_first_ms": round(setup[0] * 1000, 2) if setup else None,
+        "setup": _summary(setup[1:] or setup),
+        "time_to_first_text": _summary(first_text),
+        "time_to_first_audio": _summary(first_audio),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark backend.agent.entrypoint offline")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--lead-index", type=int, default=1, help="1-based lead index")
+    parser.add_argument("--campaign", default=None, help="prompt module, e.g. prompts3")
+    parser.add_argument("--csv", default=None, help="leads CSV (default: LEADS_CSV_PATH)")
+    parser.add_argument("--prospect-wav", default=os.getenv("LOOPBACK_PROSPECT_WAV") or None)
+    parser.add_argument("--prewarm", action="store_true", help="run backend.agent.prewarm before the first call")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default=None)
+    args = parser.parse_args()
+    if args.csv:
+        os.environ["LEADS_CSV_PATH"] = args.csv  # also read by backend.agent.prewarm
+    use_offline_fakes()
+    report = asyncio.run(run_benchmark(max(1, args.runs), args.lead_index, args.prospect_wav, args.prewarm,
+                                       args.campaign, args.prompt_mode, args.csv))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
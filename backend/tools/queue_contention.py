@@ -0,0 +1,152 @@
+"""Multi-process contention check for backend/lead_queue.py.
+
+    python -m backend.tools.queue_contention --workers 16 --leads 2000
+    python -m backend.tools.queue_contention --crash-rate 0.05 --lease 1     # abandoned leases get reclaimed
+    python -m backend.tools.queue_contention --url postgresql://...         # same check against Postgres
+
+Each worker process claims leads as fast as it can and completes them. With
+``--crash-rate`` a worker abandons some leases mid-call (no heartbeat, no
+completion), the way a dead node would; those leads must be reclaimed after
+the lease expires and completed by someone else.
+
+Checks (exit 1 on any violation):
+  - every lead is completed exactly once
+  - no lead is ever claimed while another worker's lease on it is live
+  - without crashes, every lead is claimed exactly once
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+from backend.lead_queue import open_queue
+
+QUEUE_NAME = "contention-check"
+
+
+def _worker(url: str, worker_id: int, lease: float, hold_ms: float, crash_rate: float, seed: int, out) -> None:
+    queue = open_queue(url)
+    rng = random.Random(seed + worker_id)
+    events: List[Tuple[str, int, str, float, float]] = []  # (kind, lead, token, t, expires)
+    idle_since = None
+    while True:
+        claimed = queue.claim(QUEUE_NAME, f"w{worker_id}", lease)
+        if claimed is None:
+            stats = queue.stats(QUEUE_NAME)
+            if stats["pending"] == 0 and stats["leased"] == 0 and stats["expired"] == 0:
+                break
+            # Leases still out: wait for them to complete or expire
+            idle_since = idle_since or time.time()
+            if time.time() - idle_since > lease * 20 + 30:
+                break
+            time.sleep(min(0.05, lease / 10))
+            continue
+        idle_since = None
+        events.append(("claim", claimed.lead_index, claimed.token, time.time(), claimed.expires_at))
+        if hold_ms:
+            time.sleep(hold_ms / 1000.0)
+        if crash_rate and rng.random() < crash_rate:
+            events.append(("abandon", claimed.lead_index, claimed.token, time.time(), 0.0))
+            continue
+        ok = queue.complete(claimed, result="0")
+        events.append(("complete" if ok else "lost", claimed.lead_index, claimed.token, time.time(), 0.0))
+    out.put((worker_id, events))
+
+
+def _check(events: List[Tuple[int, Tuple[str, int, str, float, float]]], leads: int, crash_rate: float) -> Dict[str, Any]:
+    completes = Counter()
+    claims = Counter()
+    by_lead: Dict[int, List[Tuple[float, float, str, int]]] = defaultdict(list)
+    ended: Dict[str, float] = {}
+    for worker_id, (kind, lead, token, t, expires) in events:
+        if kind == "claim":
+            claims[lead] += 1
+            by_lead[lead].append((t, expires, token, worker_id))
+        elif kind == "complete":
+            completes[lead] += 1
+            ended[token] = t
+        elif kind == "lost":
+            ended[token] = t
+    missing = [i for i in range(1, leads + 1) if completes[i] == 0]
+    duplicates = [i for i, n in completes.items() if n > 1]
+    # A new claim must start after the previous lease was completed or expired
+    overlaps = []
+    for lead, items in by_lead.items():
+        items.sort()
+        for (t0, exp0, tok0, _), (t1, _, _, _) in zip(items, items[1:]):
+            if t1 < min(exp0, ended.get(tok0, exp0)) - 0.05:  # small allowance for clock reads across processes
+                overlaps.append(lead)
+                break
+    reclaimed = sum(1 for n in claims.values() if n > 1)
+    ok = not missing and not duplicates and not overlaps and (crash_rate > 0 or reclaimed == 0)
+    return {
+        "exactly_once": ok,
+        "leads": leads,
+        "claims": sum(claims.values()),
+        "completed": sum(completes.values()),
+        "reclaimed_leads": reclaimed,
+        "missing": missing[:20],
+        "duplicate_completions": duplicates[:20],
+        "overlapping_leases": overlaps[:20],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exactly-once lead assignment under multi-process contention")
+    parser.add_argument("--url", default=None, help="queue URL (default: a fresh temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--leads", type=int, default=1000)
+    parser.add_argument("--lease", type=float, default=2.0, help="lease seconds")
+    parser.add_argument("--hold-ms", type=float, default=0.0, help="simulated call time per lead")
+    parser.add_argument("--crash-rate", type=float, default=0.0, help="fraction of leases abandoned without completion")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if not url:
+        tmpdir = tempfile.mkdtemp(prefix="lead-queue-")
+        url = f"sqlite:///{os.path.join(tmpdir, 'queue.db')}"
+    queue = open_queue(url)
+    queue.requeue(QUEUE_NAME)
+    queue.sync_size(QUEUE_NAME, args.leads)
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(url, i, args.lease, args.hold_ms, args.crash_rate, args.seed, out))
+        for i in range(max(1, args.workers))
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    events: List[Tuple[int, Tuple[str, int, str, float, float]]] = []
+    for _ in procs:
+        worker_id, worker_events = out.get()
+        events.extend((worker_id, e) for e in worker_events)
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    report = _check(events, args.leads, args.crash_rate)
+    report.update({
+        "backend": type(queue).__name__,
+        "workers": len(procs),
+        "elapsed_s": round(elapsed, 3),
+        "claims_per_s": round(report["claims"] / elapsed, 1) if elapsed else 0.0,
+        "final_stats": queue.stats(QUEUE_NAME),
+    })
+    print(json.dumps(report, indent=2))
+    if not report["exactly_once"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""CPU cost of call recording (backend/recording.py) per concurrent call.
+
+    python -m backend.tools.recording_bench --calls 1,10,25 --seconds 20
+    python -m backend.tools.recording_bench --calls 10 --encoder wav
+    python -m backend.tools.recording_bench --calls 50 --buffer-s 1 --stall-s 3   # force overruns
+
+Plays N synthetic calls in real time through the same writer the agent uses.
+Every 20 ms each call pushes a 48 kHz caller frame. While the agent is
+talking it also pushes 24 kHz agent frames at twice real time, as the
+realtime model does, and one turn in five is interrupted. For each N it
+reports:
+- ``push_us``: time one tap takes on the audio path (mean and max). This is
+  all the agent's event loop pays per frame.
+- ``cpu_pct_per_call``: writer thread plus encoder CPU (ffmpeg children
+  included) as a percentage of one core, per call, with the producers' own
+  CPU taken out.
+- ``overruns``: frames dropped because a ring was full.
+- ``kb_per_min``: recorded file size per call minute.
+
+``--stall-s`` freezes the writer for that long mid-run to show overruns
+being counted while producers keep going.
+"""
+
+import argparse
+import json
+import math
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend import recording
+
+FRAME_S = 0.02
+
+
+def _frames(rate: int, seed: int, count: int = 50) -> List[bytes]:
+    """Pre-generated 20 ms frames of voice-like noise, so producing audio costs almost nothing."""
+    rng = np.random.default_rng(seed)
+    n = int(rate * FRAME_S)
+    t = np.arange(n) / rate
+    return [(rng.normal(0, 800, n) + 3000 * np.sin(2 * math.pi * rng.uniform(120, 240) * t)).astype("<i2").tobytes()
+            for _ in range(count)]
+
+
+def _stall(writer: recording.RecordingWriter, seconds: float) -> None:
+    """Keep the writer from draining, as a slow disk or a stuck encoder would."""
+    with writer._lock:
+        time.sleep(seconds)
+
+
+def run(calls: int, seconds: float, fmt: str, encoder: Optional[str], buffer_s: float, stall_s: float,
+        out_dir: Path) -> Dict[str, Any]:
+    writer = recording.RecordingWriter()
+    recs = [writer.add(recording.CallRecorder(f"bench{calls}_{i}", out_dir, fmt, buffer_s, encoder=encoder))
+            for i in range(calls)]
+    caller, agent = _frames(48000, 1), _frames(24000, 2)
+    rng = random.Random(calls)
+    # Per call: frames of agent speech still to push in the current turn, and ticks until the next turn
+    talking = [0] * calls
+    next_turn = [rng.randint(25, 200) for _ in range(calls)]
+    push_times: List[float] = []
+
+    cpu0, kids0 = time.process_time(), resource.getrusage(resource.RUSAGE_CHILDREN)
+    producer_cpu = 0.0
+    started = time.perf_counter()
+    ticks = int(seconds / FRAME_S)
+    for tick in range(ticks):
+        t_cpu = time.thread_time()
+        for i, rec in enumerate(recs):
+            t0 = time.perf_counter()
+            rec.caller_audio(caller[tick % len(caller)], 48000)
+            push_times.append(time.perf_counter() - t0)
+            if talking[i]:
+                for _ in range(min(2, talking[i])):
+                    t0 = time.perf_counter()
+                    rec.agent_audio(agent[(tick + i) % len(agent)], 24000)
+                    push_times.append(time.perf_counter() - t0)
+                    talking[i] -= 1
+                if talking[i] and rng.random() < 0.2 / 75:
+                    rec.agent_cleared()  # caller barged in
+                    talking[i] = 0
+            else:
+                next_turn[i] -= 1
+                if next_turn[i] <= 0:
+                    talking[i] = rng.randint(75, 250)  # 1.5-5 s of agent speech
+                    next_turn[i] = rng.randint(100, 300)
+        producer_cpu += time.thread_time() - t_cpu
+        if stall_s and tick == ticks // 3:
+            threading.Thread(target=_stall, args=(writer, stall_s), daemon=True).start()
+        delay = started + (tick + 1) * FRAME_S - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    for rec in recs:
+        rec.close()
+    while writer.active():
+        time.sleep(0.05)
+    wall = time.perf_counter() - started
+    kids1 = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (time.process_time() - cpu0 - producer_cpu) + (kids1.ru_utime - kids0.ru_utime) + (kids1.ru_stime - kids0.ru_stime)
+    infos = [recording.read_info(out_dir, rec.call_id) or {} for rec in recs]
+    sizes = [(out_dir / info["file"]).stat().st_size for info in infos if info.get("file")]
+    push_times.sort()
+    return {
+        "calls": calls,
+        "seconds": round(wall, 2),
+        "format": infos[0].get("format") if infos else None,
+        "encoder": infos[0].get("encoder") if infos else None,
+        "push_us": {
+            "mean": round(sum(push_times) / len(push_times) * 1e6, 2),
+            "p99": round(push_times[int(0.99 * (len(push_times) - 1))] * 1e6, 2),
+            "max": round(push_times[-1] * 1e6, 2),
+        },
+        "cpu_pct_per_call": round(cpu / wall / calls * 100, 3),
+        "cpu_pct_total": round(cpu / wall * 100, 2),
+        "overruns": sum(info.get("overruns", 0) for info in infos),
+        "recorded_s_per_call": round(sum(info.get("duration_s", 0) for info in infos) / calls, 2),
+        "kb_per_min": round(sum(sizes) / 1024 / calls / (seconds / 60), 1) if sizes else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Call recording CPU overhead per concurrent call")
+    parser.add_argument("--calls", default="1,10,25", help="comma-separated concurrency levels")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--format", default="ogg", choices=sorted(recording.FORMATS))
+    parser.add_argument("--encoder", default=None, choices=recording.ENCODERS, help="default: best available")
+    parser.add_argument("--buffer-s", type=float, default=10.0, help="ring size per call, seconds of audio")
+    parser.add_argument("--stall-s", type=float, default=0.0, help="freeze the writer this long mid-run")
+    parser.add_argument("--keep", action="store_true", help="keep the recordings (path is printed)")
+    args = parser.parse_args()
+
+    out_dir = Path(tempfile.mkdtemp(prefix="recording_bench_"))
+    try:
+        results = [run(int(n), args.seconds, args.format, args.encoder, args.buffer_s, args.stall_s, out_dir)
+                   for n in args.calls.split(",") if n.strip()]
+    finally:
+        if not args.keep:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    print(json.dumps({"results": results, "out_dir": str(out_dir) if args.keep else None}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Memory and lookup cost of the suppression index (backend/suppression.py).
+
+    python -m backend.tools.suppression_bench --numbers 10000000
+    python -m backend.tools.suppression_bench --numbers 2000000 --compare-set
+
+Writes a synthetic DNC file of random NANP numbers to a temp dir, builds the
+index from it, then times lookups for numbers on the list and numbers not on
+it, with and without the Bloom front. RSS is read from /proc (Linux) and split
+into private memory (RssAnon, what the index really costs each worker) and
+mapped file pages (RssFile: clean page cache shared by every worker mapping
+the index, reclaimable under pressure; the kernel maps up to 64KB around each
+touched page, so a few probes already show up here).
+``--compare-set`` also loads the same numbers into a plain Python set.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from backend import suppression
+
+
+def _rss_kb() -> dict:
+    out = {"anon": 0, "file": 0}
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    out["anon"] = int(line.split()[1])
+                elif line.startswith("RssFile:"):
+                    out["file"] = int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return out
+
+
+def _growth(after: dict, before: dict) -> dict:
+    return {k: after[k] - before[k] for k in before}
+
+
+def _lookup_ns(index: suppression.SuppressionIndex, keys) -> float:
+    t0 = time.perf_counter_ns()
+    for k in keys:
+        index.contains_key(k)
+    return (time.perf_counter_ns() - t0) / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Suppression index memory/lookup benchmark")
+    parser.add_argument("--numbers", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--compare-set", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="suppression-bench-"))
+    dnc = tmp / "dnc.txt"
+    # Area codes 200-999 only; "misses" below use 100-199 so they are never on the list
+    with open(dnc, "w", encoding="utf-8") as f:
+        for _ in range(args.numbers):
+            f.write(f"+1{rng.randint(200, 999)}{rng.randint(0, 9_999_999):07d}\n")
+    on_list = []
+    with open(dnc, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i % max(1, args.numbers // args.lookups) == 0:
+                on_list.append(suppression.normalize_number(line))
+    on_list = on_list[:args.lookups]
+    misses = [int(f"1{rng.randint(100, 199)}{rng.randint(0, 9_999_999):07d}") for _ in range(args.lookups)]
+
+    report = {"numbers": args.numbers}
+    for label, fpr in (("bloom", suppression.BLOOM_FPR or 0.01), ("no_bloom", 0.0)):
+        rss0 = _rss_kb()
+        t0 = time.perf_counter()
+        index = suppression.build([dnc], tmp / f"{label}.bin", bloom_fpr=fpr)
+        build_s = time.perf_counter() - t0
+        rss_loaded = _rss_kb()
+        stats = index.stats()
+        # Misses first: with the Bloom front they should leave the table pages untouched
+        miss_ns = _lookup_ns(index, misses)
+        rss_after_misses = _rss_kb()
+        hit_ns = _lookup_ns(index, on_list)
+        assert all(index.contains_key(k) for k in on_list[:1000])
+        false_pos = sum(index.contains_key(k) for k in misses)
+        report[label] = {
+            "unique": stats["count"],
+            "build_s": round(build_s, 2),
+            "file_mb": round(stats["file_bytes"] / 1e6, 1),
+            "bloom_mb": round(stats["bloom_bytes"] / 1e6, 1),
+            "bytes_per_number": round(stats["file_bytes"] / max(1, stats["count"]), 1),
+            "rss_after_build_kb": _growth(rss_loaded, rss0),
+            "rss_after_misses_kb": _growth(rss_after_misses, rss0),
+            "rss_after_hits_kb": _growth(_rss_kb(), rss0),
+            "hit_lookup_ns": round(hit_ns),
+            "miss_lookup_ns": round(miss_ns),
+            "false_positives": false_pos,
+        }
+        index.close()
+        os.remove(tmp / f"{label}.bin")
+
+    if args.compare_set:
+        rss0 = _rss_kb()
+        with open(dnc, "r", encoding="utf-8") as f:
+            plain = {suppression.normalize_number(line) for line in f}
+        report["python_set"] = {"rss_kb": _growth(_rss_kb(), rss0), "unique": len(plain)}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Replay of backend/app/sync_journal.py past an entry Supabase keeps rejecting.
+
+    python -m backend.tools.sync_poison
+    python -m backend.tools.sync_poison --before 50 --after 50 --outage 4 --max-attempts 3
+
+Writes ``--before`` campaign upserts, one prospects upsert with a column the
+fake table does not have (the way a missing ``preview`` column fails), then
+``--after`` more. An in-memory stand-in for the Supabase client is first
+down for ``--outage`` sync rounds, then back. Each round is one
+``SyncJournal.replay`` and is reported.
+
+Checks (exit 1 on any violation):
+  - nothing is given up on while Supabase is down
+  - the rejected entry is dead-lettered after ``--max-attempts`` rounds
+  - every other entry reaches the tables, and the journal ends empty
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.app.sync_journal import SyncJournal
+
+TABLE_COLUMNS = {
+    "campaigns": {"module", "name", "content", "updated_at"},
+    "prospect_csvs": {"name", "content", "size", "uploaded_at"},
+}
+
+
+class _Result:
+    def __init__(self, data: Any = None) -> None:
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client: "FakeClient", table: str) -> None:
+        self.client = client
+        self.table = table
+        self.action: Optional[tuple] = None
+
+    def upsert(self, rows: List[Dict[str, Any]], on_conflict: str) -> "_Query":
+        self.action = ("upsert", rows, on_conflict)
+        return self
+
+    def delete(self) -> "_Query":
+        self.action = ("delete",)
+        return self
+
+    def in_(self, key: str, values: List[Any]) -> "_Query":
+        self.action = ("delete", key, values)
+        return self
+
+    def select(self, columns: str) -> "_Query":
+        self.action = ("select",)
+        return self
+
+    def limit(self, n: int) -> "_Query":
+        return self
+
+    def execute(self) -> _Result:
+        if self.client.down:
+            raise ConnectionError("Supabase unreachable")
+        rows = self.client.tables.setdefault(self.table, {})
+        kind = self.action[0] if self.action else "select"
+        if kind == "upsert":
+            _, new, key = self.action
+            for row in new:
+                unknown = set(row) - TABLE_COLUMNS[self.table]
+                if unknown:
+                    raise ValueError(f"column {sorted(unknown)[0]!r} of relation {self.table!r} does not exist")
+            for row in new:
+                rows[row[key]] = row
+        elif kind == "delete":
+            _, key, values = self.action
+            for value in values:
+                rows.pop(value, None)
+        return _Result(list(rows.values())[:1])
+
+
+class FakeClient:
+    """Just enough of the supabase-py query builder for SyncJournal."""
+
+    def __init__(self) -> None:
+        self.down = False
+        self.tables: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sync journal replay past a rejected entry")
+    parser.add_argument("--before", type=int, default=20)
+    parser.add_argument("--after", type=int, default=20)
+    parser.add_argument("--outage", type=int, default=3, help="rounds with Supabase down")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="sync_poison_"))
+    journal = SyncJournal(tmp / "journal.jsonl", max_attempts=args.max_attempts)
+    for i in range(args.before):
+        journal.append("campaigns", "upsert", "module", {"module": f"m{i}", "name": f"Campaign {i}", "content": "..."})
+    journal.append("prospect_csvs", "upsert", "name", {"name": "leads.csv", "content": "a,b\n", "preview": "a,b\n"})
+    for i in range(args.before, args.before + args.after):
+        journal.append("campaigns", "upsert", "module", {"module": f"m{i}", "name": f"Campaign {i}", "content": "..."})
+
+    client = FakeClient()
+    rounds = []
+    failures = []
+    for n in range(args.outage + args.max_attempts + 1):
+        client.down = n < args.outage
+        result = journal.replay(client)
+        status = journal.status()
+        rounds.append({"round": n + 1, "supabase": "down" if client.down else "up",
+                       "applied": result.get("applied"), "dead_lettered": result.get("dead_lettered"),
+                       "pending": status["pending"], "head_attempts": status["head_attempts"],
+                       "error": result.get("error")})
+        if client.down and status["dead_letters"]:
+            failures.append(f"round {n + 1}: an entry was dead-lettered during the outage")
+
+    status = journal.status()
+    dead = journal.dead_letters()
+    campaigns = client.tables.get("campaigns", {})
+    if status["pending"]:
+        failures.append(f"{status['pending']} entries still pending")
+    if len(dead) != 1 or dead[0]["entry"]["table"] != "prospect_csvs":
+        failures.append(f"expected the prospects upsert alone in the dead-letter file, got {len(dead)} entries")
+    elif dead[0]["attempts"] != args.max_attempts:
+        failures.append(f"dead-lettered after {dead[0]['attempts']} attempts, not {args.max_attempts}")
+    if len(campaigns) != args.before + args.after:
+        failures.append(f"{len(campaigns)} of {args.before + args.after} campaign rows reached the table")
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps({"rounds": rounds, "status": status, "campaign_rows": len(campaigns),
+                      "failures": failures}, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
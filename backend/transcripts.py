@@ -0,0 +1,244 @@
+"""Per-call transcripts, written off the audio path.
+
+Opt in with ``CALL_TRANSCRIPTS=1``. ``entrypoint`` attaches ``record_session``
+to the session, which turns final user transcriptions
+(``user_input_transcribed``) and the agent's spoken lines
+(``conversation_item_added`` with role ``assistant``) into records. The event
+callbacks only append to a deque (atomic in CPython, no lock taken on the
+event loop); one writer thread per process drains it every
+``flush_interval`` seconds, or sooner once ``batch_size`` records are waiting,
+and appends them to ``<TRANSCRIPTS_DIR>/<call_id>.jsonl``. A file that grows
+past ``max_bytes`` rolls over to ``<call_id>~1.jsonl``, ``<call_id>~2.jsonl``...
+(``~`` never appears in a call id, so ``abc.1`` cannot collide with a part of ``abc``).
+
+One JSON object per line:
+
+    {"ts": 1730000000.1, "role": "user", "text": "Hello?"}
+    {"ts": 1730000001.4, "role": "agent", "text": "Hi, is this Dana?", "interrupted": false}
+    {"ts": 1730000090.0, "event": "end", "reason": "user_initiated"}
+
+The first line of a call is ``{"ts", "event": "start", "call_id", ...}``.
+Records still queued when the process exits are flushed at exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "transcripts"
+_CALL_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+def enabled() -> bool:
+    return os.getenv("CALL_TRANSCRIPTS", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def transcript_dir() -> Path:
+    return Path(os.getenv("TRANSCRIPTS_DIR", "").strip() or DEFAULT_DIR)
+
+
+def safe_call_id(call_id: str) -> Optional[str]:
+    """``call_id`` if it can name a file (no separators or '..'), else None."""
+    call_id = str(call_id or "")
+    return call_id if _CALL_ID.match(call_id) and ".." not in call_id else None
+
+
+def part_path(directory: Path, call_id: str, part: int) -> Path:
+    """File of a call's transcript part (0 is the first)."""
+    return directory / (f"{call_id}.jsonl" if part == 0 else f"{call_id}~{part}.jsonl")
+
+
+def part_paths(directory: Path, call_id: str) -> List[Path]:
+    """A call's transcript files, oldest first."""
+    parts = []
+    n = 0
+    while True:
+        path = part_path(directory, call_id, n)
+        if not path.exists():
+            return parts
+        parts.append(path)
+        n += 1
+
+
+def read_transcript(directory: Path, call_id: str) -> Optional[List[Dict[str, Any]]]:
+    """All records of a call in order; None if it has no transcript."""
+    parts = part_paths(directory, call_id)
+    if not parts:
+        return None
+    out: List[Dict[str, Any]] = []
+    for path in parts:
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a batch still being written
+                try:
+                    out.append(json.loads(raw))
+                except ValueError:
+                    logger.warning("Skipping unreadable transcript line in %s", path)
+    return out
+
+
+class TranscriptWriter:
+    """Background appender shared by every call in the process."""
+
+    def __init__(self, directory: Path, flush_interval: float = 1.0, batch_size: int = 64,
+                 max_bytes: int = 5 * 1024 * 1024, max_pending: int = 20000, idle_close_s: float = 60.0) -> None:
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.idle_close_s = idle_close_s
+        self.dropped = 0
+        self.written = 0
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()  # writer thread vs. flush() at exit; never taken by put()
+        self._files: Dict[str, Tuple[TextIO, int, int, float]] = {}  # call_id -> (file, part, size, last write)
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------
+    # Producer side (event loop)
+    # -----------------------------
+
+    def put(self, call_id: str, record: Dict[str, Any]) -> None:
+        """Queue one record; never blocks. Drops it (counted) if the disk has fallen far behind."""
+        if len(self._queue) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._queue.append((call_id, record))
+        if len(self._queue) == self.batch_size or record.get("event") == "end":
+            self._wake.set()
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+
+    def _open(self, call_id: str, part: int) -> Tuple[TextIO, int]:
+        f = open(part_path(self.directory, call_id, part), "a", encoding="utf-8")
+        return f, f.tell()
+
+    def _current(self, call_id: str, now: float) -> Tuple[TextIO, int, int, float]:
+        entry = self._files.get(call_id)
+        if entry is None:
+            # Resume after the last existing part (e.g. a writer restarted mid-call)
+            part = max(0, len(part_paths(self.directory, call_id)) - 1)
+            f, size = self._open(call_id, part)
+            entry = (f, part, size, now)
+        f, part, size, _ = entry
+        if size >= self.max_bytes:
+            f.close()
+            part += 1
+            f, size = self._open(call_id, part)
+        return f, part, size, now
+
+    def _write_batch(self) -> int:
+        with self._write_lock:
+            batch: Dict[str, List[str]] = {}
+            ended = set()
+            while self._queue:
+                call_id, record = self._queue.popleft()
+                batch.setdefault(call_id, []).append(json.dumps(record, ensure_ascii=False) + "\n")
+                if record.get("event") == "end":
+                    ended.add(call_id)
+            if not batch and not self._files:
+                return 0
+            now = time.time()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for call_id, lines in batch.items():
+                try:
+                    f, part, size, _ = self._current(call_id, now)
+                    data = "".join(lines)
+                    f.write(data)
+                    f.flush()
+                    self._files[call_id] = (f, part, size + len(data.encode("utf-8")), now)
+                    self.written += len(lines)
+                except OSError:
+                    logger.exception("Failed to write transcript for call %s", call_id)
+                    self._files.pop(call_id, None)
+            for call_id, (f, _, _, last) in list(self._files.items()):
+                if call_id in ended or now - last >= self.idle_close_s:
+                    f.close()
+                    del self._files[call_id]
+        return sum(len(lines) for lines in batch.values())
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._write_batch()
+            except Exception:
+                logger.exception("Transcript writer iteration failed")
+
+    def start(self) -> "TranscriptWriter":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="transcripts", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        return self
+
+    def flush(self) -> None:
+        """Write everything queued now, from the calling thread."""
+        try:
+            self._write_batch()
+        except Exception:
+            logger.exception("Transcript flush failed")
+
+
+_WRITER: Dict[str, TranscriptWriter] = {}
+_WRITER_LOCK = threading.Lock()
+
+
+def writer() -> TranscriptWriter:
+    """The process's writer for TRANSCRIPTS_DIR, started on first use."""
+    with _WRITER_LOCK:
+        if "w" not in _WRITER:
+            _WRITER["w"] = TranscriptWriter(transcript_dir()).start()
+        return _WRITER["w"]
+
+
+def record_session(session: Any, call_id: str, info: Optional[Dict[str, Any]] = None,
+                   out: Optional[TranscriptWriter] = None) -> bool:
+    """Subscribe to ``session``'s transcription events; False if the call id can't name a file."""
+    call_id = safe_call_id(call_id) or ""
+    if not call_id or not hasattr(session, "on"):
+        return False
+    out = out or writer()
+    out.put(call_id, {"ts": time.time(), "event": "start", "call_id": call_id, **(info or {})})
+
+    def on_user(ev: Any) -> None:
+        if ev.is_final and ev.transcript.strip():
+            record = {"ts": ev.created_at, "role": "user", "text": ev.transcript}
+            if ev.speaker_id:
+                record["speaker_id"] = ev.speaker_id
+            out.put(call_id, record)
+
+    def on_item(ev: Any) -> None:
+        item = ev.item
+        if getattr(item, "role", None) != "assistant":
+            return  # user lines come from on_user, as they are transcribed
+        text = item.text_content or ""
+        if text.strip():
+            out.put(call_id, {"ts": ev.created_at, "role": "agent", "text": text,
+                              "interrupted": bool(getattr(item, "interrupted", False))})
+
+    def on_close(ev: Any) -> None:
+        reason = getattr(ev, "reason", None)
+        out.put(call_id, {"ts": time.time(), "event": "end", "reason": str(getattr(reason, "value", reason) or "")})
+
+    session.on("user_input_transcribed", on_user)
+    session.on("conversation_item_added", on_item)
+    session.on("close", on_close)
+    return True
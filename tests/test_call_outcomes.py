@@ -0,0 +1,42 @@
+"""Sample calls and the result backend/call_outcomes.py should extract from each."""
+
+from typing import List, Tuple
+
+import pytest
+
+from backend.call_outcomes import extract
+
+_ASK = "Would you be open to a quick 15-minute session with one of our SMEs next week?"
+
+# (name, expected result, turns)
+CALLS: List[Tuple[str, str, List[Tuple[str, str]]]] = [
+    ("yes", "booked", [("agent", _ASK), ("user", "Sure, Tuesday works.")]),
+    ("okay then refusal", "declined", [("agent", _ASK), ("user", "Okay, I don't think so, not really.")]),
+    ("okay but not now", "undecided", [("agent", _ASK), ("user", "Okay but I can't commit to anything.")]),
+    ("bare no with competitor", "declined", [("agent", _ASK), ("user", "No, we already use Tableau.")]),
+    ("nope", "declined", [("agent", _ASK), ("user", "Nope.")]),
+    ("no problem", "booked", [("agent", _ASK), ("user", "No problem, Thursday afternoon is fine.")]),
+    ("sure, don't mind", "booked", [("agent", _ASK), ("user", "Sure, I don't mind.")]),
+    ("no, not an ask", "undecided", [("agent", "Have you looked at analytics tools before?"),
+                                     ("user", "No, not really.")]),
+    ("no thanks", "declined", [("agent", _ASK), ("user", "Yeah no thanks.")]),
+    ("sure, call me back", "callback", [("agent", _ASK), ("user", "Sure. Can you call me back tomorrow?")]),
+    ("don't call back", "declined", [("agent", _ASK), ("user", "Not interested, don't call me back.")]),
+    ("changed mind", "booked", [("agent", _ASK), ("user", "Not interested."),
+                                ("agent", "Understood. Would next week work for just 15 minutes?"),
+                                ("user", "Well, okay, let's do it.")]),
+]
+
+
+def _records(turns: List[Tuple[str, str]]) -> List[dict]:
+    return [{"role": role, "text": text, "ts": float(i)} for i, (role, text) in enumerate(turns)]
+
+
+@pytest.mark.parametrize("expected, turns", [c[1:] for c in CALLS], ids=[c[0] for c in CALLS])
+def test_result(expected: str, turns: List[Tuple[str, str]]) -> None:
+    assert extract(_records(turns))["result"] == expected
+
+
+def test_callback_request_keeps_its_time() -> None:
+    out = extract(_records([("agent", _ASK), ("user", "Sure. Can you call me back tomorrow?")]))
+    assert out["callback"]["when"] == "tomorrow"